@@ -1,158 +1,387 @@
+import multiprocessing
 import random
-from typing import List, Tuple
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+import numpy as np
 from inventory import Book
-from copy import deepcopy
 from datetime import datetime
-from customer import Customer
-
-def alt_solve(store, books: List['Book'], remaining_capacity: int, current_date: datetime) -> List[Tuple['Book', int]]:
-    """Late Acceptance Hill Climbing solver for restocking optimization."""
-    def calculate_preference_score(book: Book) -> float:
-        """Calculate a preference score based on known customer behaviors"""
-        score = 0.0
-        rating_weight = 0.33
-        price_weight = 0.33
-        author_weight = 0.05
-        genre_weight = 0.05
-        
-        if book.average_rating:
-            score += rating_weight * float(book.average_rating) * 20
-            
-        if float(book.price) <= 8.0:
-            score += price_weight * 100
-        
-        if book.authors in store.inventory.books[:1000]:
-            score += author_weight * 100
-            
-        popular_genres = ["Fiction", "Mystery", "Romance", "Fantasy"]
-        if book.genre in popular_genres:
-            score += genre_weight * 100
-            
-        return score
-
-    def cost(decisions: List[Tuple['Book', int]]) -> float:
-        total_cost = 0
-        total_quantity = 0
-        month = current_date.month
-        seasonal_keywords = Customer.seasonal_keywords.get(month, [])
-        unique_authors = set()
-        
-        for book, quantity in decisions:
-            if total_quantity > remaining_capacity:
-                return float('inf')
-            
-            total_quantity += quantity
-            unique_authors.add(book.authors)
-            
-            if book.price <= 8.0:
-                total_cost -= 100 * quantity
+from features import (AUTHOR_BONUS, AUTHOR_SHORTFALL, MIN_AUTHORS, UNDERFILL_PENALTY, UNDERFILL_RATIO,
+                      FeatureTable)
+from plan_cache import remap_plan
+from preference_pools import SamplingPool
+
+
+@dataclass(frozen=True)
+class Termination:
+    """
+    When alt_solve stops, mirroring Timefold's TerminationConfig.
+
+    Limits left as None are not applied; the search stops at the first one
+    reached. Times are in seconds from the start of alt_solve, so
+    spent_limit bounds the whole solve including the initial solution.
+    best_score_limit stops once the best cost is at or below it.
+    """
+    spent_limit: Optional[float] = None
+    unimproved_spent_limit: Optional[float] = None
+    unimproved_iterations: Optional[int] = None
+    best_score_limit: Optional[float] = None
+    max_iterations: Optional[int] = 200
+
+    @classmethod
+    def time_budget(cls, seconds, unimproved_iterations=None):
+        """Run for a wall-clock budget rather than a fixed iteration count."""
+        return cls(spent_limit=seconds, unimproved_iterations=unimproved_iterations, max_iterations=None)
+
+
+# Called with (iteration, elapsed seconds, cost, plan) for every new best;
+# alt_solve passes decisions (book, quantity) as the plan
+BestCallback = Callable[[int, float, float, object], None]
+
+# Clock reads are amortized over this many iterations
+_CLOCK_INTERVAL = 64
+
+
+class RestockState:
+    """
+    Mutable LAHC solution: a restock quantity per candidate index.
+
+    The cost is kept as running sums (linear unit costs, total quantity,
+    titles per author) so set_quantity and cost are O(1). A move is undone
+    by setting the previous quantity back.
+    """
+
+    def __init__(self, unit_costs, authors, capacity):
+        self.unit_costs = unit_costs
+        self.authors = authors
+        self.capacity = capacity
+        self.quantities = {}
+        self.chosen = SamplingPool()
+        self.titles_by_author = {}
+        self.linear = 0.0
+        self.total = 0
+
+    def set_quantity(self, index, quantity) -> int:
+        """Set a candidate's quantity (0 drops it) and return the previous one."""
+        old = self.quantities.get(index, 0)
+        if quantity == old:
+            return old
+        self.linear += self.unit_costs[index] * (quantity - old)
+        self.total += quantity - old
+        author = self.authors[index]
+        if old == 0:
+            self.quantities[index] = quantity
+            self.chosen.add(index)
+            self.titles_by_author[author] = self.titles_by_author.get(author, 0) + 1
+        elif quantity == 0:
+            del self.quantities[index]
+            self.chosen.remove(index)
+            remaining = self.titles_by_author[author] - 1
+            if remaining:
+                self.titles_by_author[author] = remaining
             else:
-                total_cost += (book.price - 8.0) * quantity * 20
-            
-            rating = float(book.average_rating if book.average_rating else 0)
-            if rating >= 4.5:
-                total_cost -= rating * quantity * 30
-            
-            if len(unique_authors) < 20:
-                total_cost += 200
-            
-            seasonal_matches = sum(1 for keyword in seasonal_keywords 
-                                if keyword.lower() in f"{book.title} {book.authors}".lower())
-            total_cost -= seasonal_matches * quantity * 20
-            
-            current_stock = store.stock.get(book, 0)
-            if current_stock < 3:
-                total_cost -= 50 * quantity
-            elif current_stock > 30:
-                total_cost += 40 * quantity
-
-        author_count_bonus = len(unique_authors) * 50
-        total_cost -= author_count_bonus
-        
-        if total_quantity < remaining_capacity * 0.8:
-            total_cost += (remaining_capacity - total_quantity) * 10
-            
-        return total_cost
-
-    def create_neighbor(current_decisions: List[Tuple['Book', int]]) -> List[Tuple['Book', int]]:
-        new_decisions = deepcopy(current_decisions)
-        current_authors = set(book.authors for book, _ in new_decisions)
-        
-        if random.random() < 0.4:
-            available_books = [b for b in books 
-                             if b not in [d[0] for d in new_decisions]
-                             and b.authors not in current_authors
-                             and b.price <= 8.0
-                             and float(b.average_rating or 0) >= 4.5]
-            if available_books:
-                new_book = random.choice(available_books)
-                new_qty = random.randint(3, 10)
-                new_decisions.append((new_book, new_qty))
+                del self.titles_by_author[author]
         else:
-            if new_decisions:
-                idx = random.randrange(len(new_decisions))
-                book, qty = new_decisions[idx]
-                if book.price <= 8.0 and book.average_rating >= 4.5:
-                    delta = random.randint(1, 5)
-                else:
-                    delta = random.randint(-5, -1)
-                new_qty = max(0, qty + delta)
-                if new_qty == 0:
-                    new_decisions.pop(idx)
-                else:
-                    new_decisions[idx] = (book, new_qty)
-        
-        return new_decisions
-
-    current_decisions = []
-    initial_total = 0
-    seasonal_books = [
-        b for b in books 
-        if any(k.lower() in f"{b.title} {b.authors} {b.genre}".lower() 
-               for k in Customer.seasonal_keywords.get(current_date.month, []))
-    ]
-    
-    seasonal_portion = int(remaining_capacity * 0.4)
-    seasonal_books = [
-        b for b in seasonal_books 
-        if float(b.average_rating or 0) >= 4.5 and float(b.price) <= 8.0
-    ]
-    
-    for book in sorted(seasonal_books, key=lambda x: float(x.average_rating or 0), reverse=True):
-        if initial_total < seasonal_portion:
-            remaining_seasonal = seasonal_portion - initial_total
-            qty = min(15, max(5, remaining_seasonal // 10))
-            current_decisions.append((book, qty))
-            initial_total += qty
-
-    remaining_books = sorted(
-        [b for b in books if b not in [d[0] for d in current_decisions]],
-        key=calculate_preference_score,
-        reverse=True
+            self.quantities[index] = quantity
+        return old
+
+    def cost(self) -> float:
+        if self.total > self.capacity:
+            return float('inf')
+        authors = len(self.titles_by_author)
+        cost = self.linear - AUTHOR_BONUS * authors + AUTHOR_SHORTFALL * max(0, MIN_AUTHORS - authors)
+        if self.total < self.capacity * UNDERFILL_RATIO:
+            cost += (self.capacity - self.total) * UNDERFILL_PENALTY
+        return cost
+
+    def plan(self) -> dict:
+        return dict(self.quantities)
+
+
+@dataclass(frozen=True)
+class RestockProblem:
+    """
+    One restock problem: the candidates' feature table plus the capacity
+    and construction orders. Holds plain arrays only, so it can be shared
+    with (or shipped once to) worker processes.
+    """
+    features: FeatureTable
+    seasonal_order: np.ndarray   # good seasonal candidates, best rated first
+    preference_order: np.ndarray # all candidates, best preference score first
+    capacity: int
+    seasonal_portion: int
+
+    def __len__(self):
+        return len(self.features)
+
+    @property
+    def unit_costs(self) -> np.ndarray:
+        return self.features.unit_costs
+
+    @property
+    def authors(self) -> np.ndarray:
+        return self.features.author
+
+    @property
+    def good(self) -> np.ndarray:
+        return self.features.good
+
+
+def build_problem(store, books: List['Book'], remaining_capacity: int, current_date: datetime) -> RestockProblem:
+    """Restock problem over books (the candidates) for remaining_capacity."""
+    features = FeatureTable.build(store, [book.row for book in books], current_date.month)
+    seasonal_books = np.flatnonzero(features.good & features.seasonal_seed)
+    return RestockProblem(
+        features=features,
+        seasonal_order=seasonal_books[np.argsort(-features.rating[seasonal_books], kind="stable")],
+        preference_order=np.argsort(-features.preference, kind="stable"),
+        capacity=remaining_capacity,
+        seasonal_portion=int(remaining_capacity * 0.4),
     )
-    
-    while initial_total < remaining_capacity and remaining_books:
-        book = remaining_books.pop(0)
-        qty = min(random.randint(5, 20), remaining_capacity - initial_total)
-        current_decisions.append((book, qty))
+
+
+def new_state(problem: RestockProblem) -> RestockState:
+    return RestockState(problem.unit_costs.tolist(), problem.authors.tolist(), problem.capacity)
+
+
+def initial_plan(problem: RestockProblem, rng, start: Optional[dict] = None) -> dict:
+    """
+    Greedy start: seasonal good books first, then by preference score.
+
+    start (candidate index -> quantity, e.g. a remapped earlier plan) is
+    kept as far as capacity allows and the greedy fill tops it up.
+    """
+    plan = {}
+    initial_total = 0
+    for i, qty in (start or {}).items():
+        qty = min(qty, problem.capacity - initial_total)
+        if qty <= 0:
+            break
+        plan[i] = qty
+        initial_total += qty
+
+    for i in problem.seasonal_order.tolist():
+        if initial_total >= problem.seasonal_portion:
+            break
+        if i in plan:
+            continue
+        remaining_seasonal = problem.seasonal_portion - initial_total
+        qty = min(15, max(5, remaining_seasonal // 10))
+        plan[i] = qty
+        initial_total += qty
+
+    for i in problem.preference_order.tolist():
+        if initial_total >= problem.capacity:
+            break
+        if i in plan:
+            continue
+        qty = min(rng.randint(5, 20), problem.capacity - initial_total)
+        plan[i] = qty
         initial_total += qty
+    return plan
+
+
+def lahc_search(problem: RestockProblem, rng, termination: Optional[Termination] = None,
+                history_length: int = 10, initial: Optional[dict] = None,
+                on_best: Optional[BestCallback] = None, started: Optional[float] = None) -> Tuple[dict, float]:
+    """
+    Late Acceptance Hill Climbing over a RestockProblem.
+
+    Each iteration applies one move in place (add a new affordable, high
+    rated book by an author not yet in the plan, or nudge one quantity)
+    and undoes it when it is not accepted. Starts from initial (default
+    initial_plan) and returns the best (plan, cost); plans map candidate
+    index to quantity.
+    """
+    started = started if started is not None else time.perf_counter()
+    termination = termination or Termination()
+    state = new_state(problem)
+    authors = state.authors
+    good = problem.good.tolist()
+    good_indexes = np.flatnonzero(problem.good).tolist()
+    for i, qty in (initial if initial is not None else initial_plan(problem, rng)).items():
+        state.set_quantity(i, qty)
+
+    def add_book_move():
+        """Add a good book by a new author; returns the undo record or None."""
+        for _ in range(8):  # rejection sampling over the good candidates
+            index = rng.choice(good_indexes)
+            if index not in state.quantities and authors[index] not in state.titles_by_author:
+                return index, state.set_quantity(index, rng.randint(3, 10))
+        return None
+
+    def change_quantity_move():
+        index = state.chosen.sample(rng)
+        qty = state.quantities[index]
+        delta = rng.randint(1, 5) if good[index] else rng.randint(-5, -1)
+        return index, state.set_quantity(index, max(0, qty + delta))
+
+    current_cost = state.cost()
+    cost_history = [current_cost] * history_length
+    best_plan = state.plan()
+    best_cost = current_cost
+    if on_best is not None:
+        on_best(0, time.perf_counter() - started, best_cost, best_plan)
+
+    max_iterations = termination.max_iterations
+    unimproved_limit = termination.unimproved_iterations
+    score_limit = termination.best_score_limit
+    timed = termination.spent_limit is not None or termination.unimproved_spent_limit is not None
+    deadline = started + termination.spent_limit if termination.spent_limit is not None else float('inf')
+    improved_at = 0
+    improved_time = started
+
+    i = 0
+    while max_iterations is None or i < max_iterations:
+        if score_limit is not None and best_cost <= score_limit:
+            break
+        if unimproved_limit is not None and i - improved_at >= unimproved_limit:
+            break
+        if timed and i % _CLOCK_INTERVAL == 0:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if (termination.unimproved_spent_limit is not None and
+                    now - improved_time >= termination.unimproved_spent_limit):
+                break
+
+        if good_indexes and rng.random() < 0.4:
+            move = add_book_move()
+        elif state.chosen:
+            move = change_quantity_move()
+        else:
+            move = None
+
+        if move is not None:
+            candidate_cost = state.cost()
+            if (candidate_cost <= cost_history[i % history_length] or
+                candidate_cost <= best_cost):
+                current_cost = candidate_cost
+                if candidate_cost < best_cost:
+                    best_plan = state.plan()
+                    best_cost = candidate_cost
+                    improved_at = i
+                    if timed:
+                        improved_time = time.perf_counter()
+                    if on_best is not None:
+                        on_best(i + 1, time.perf_counter() - started, best_cost, best_plan)
+            else:
+                index, old_quantity = move
+                state.set_quantity(index, old_quantity)
+
+        cost_history[i % history_length] = current_cost
+        i += 1
+
+    return best_plan, best_cost
+
+
+def alt_solve(store, books: List['Book'], remaining_capacity: int, current_date: datetime,
+              termination: Optional[Termination] = None, history_length: int = 10,
+              on_best: Optional[BestCallback] = None, warm_start: Optional[dict] = None) -> List[Tuple['Book', int]]:
+    """
+    Late Acceptance Hill Climbing solver for restocking optimization.
+
+    Runs lahc_search until termination (200 iterations by default) and
+    returns (book, quantity) decisions. on_best receives the initial
+    solution and every improvement as decisions, i.e. the best-score
+    trajectory. warm_start is an earlier plan (catalog row -> quantity)
+    to start from, topped up greedily.
+    """
+    started = time.perf_counter()
+    problem = build_problem(store, books, remaining_capacity, current_date)
+    initial = None
+    if warm_start:
+        initial = initial_plan(problem, store.random, remap_plan(warm_start, problem.features.rows))
+
+    def decisions(plan):
+        return [(books[i], qty) for i, qty in plan.items() if qty > 0]
+
+    callback = None
+    if on_best is not None:
+        callback = lambda i, elapsed, cost, plan: on_best(i, elapsed, cost, decisions(plan))
+    plan, _ = lahc_search(problem, store.random, termination, history_length, initial=initial,
+                          on_best=callback, started=started)
+    return decisions(plan)
+
+
+# Multi-start: the problem every worker of a per-call pool searches, set
+# in the worker by the pool initializer (never by the calling process)
+_problem = None
+
+
+def _init_search_worker(problem):
+    global _problem
+    _problem = problem
+
+
+def _search_task(args):
+    problem, seed, history_length, termination, initial = args
+    return lahc_search(problem if problem is not None else _problem, random.Random(seed), termination,
+                       history_length, initial=initial)
+
+
+def _search_context():
+    fork = "fork" in multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if fork else "spawn")
+
+
+def search_pool(processes: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Process pool to pass to alt_solve_multistart as executor, so restock
+    after restock reuses the same workers; the owner shuts it down.
+    """
+    return ProcessPoolExecutor(max_workers=processes, mp_context=_search_context())
+
+
+def alt_solve_multistart(store, books: List['Book'], remaining_capacity: int, current_date: datetime,
+                         starts: int = 4, rounds: int = 1, termination: Optional[Termination] = None,
+                         history_lengths: Tuple[int, ...] = (5, 10, 20, 50), elite_share: float = 0.5,
+                         processes: Optional[int] = None, warm_start: Optional[dict] = None,
+                         executor: Optional[ProcessPoolExecutor] = None) -> List[Tuple['Book', int]]:
+    """
+    Run starts independent LAHC searches in a process pool and keep the best plan.
+
+    Each search gets its own seed (drawn from store.random) and a history
+    length from history_lengths, and runs for termination per round. After
+    each round, elite_share of the searches restart from the best plan so
+    far and the rest continue from their own best. With warm_start (an
+    earlier plan, catalog row -> quantity) the first search starts from it.
+
+    executor (see search_pool) is used as is and left running; the problem
+    then travels with each task. Without one, a pool of processes (default
+    starts) workers is started for this call, handed the problem once
+    through its initializer, and shut down before returning.
+    """
+    problem = build_problem(store, books, remaining_capacity, current_date)
+    termination = termination or Termination()
+    histories = [history_lengths[k % len(history_lengths)] for k in range(starts)]
+    plans = [None] * starts
+    if warm_start:
+        plans[0] = initial_plan(problem, store.random, remap_plan(warm_start, problem.features.rows))
+    best_plan, best_cost = {}, float('inf')
+
+    def search(pool, task_problem):
+        nonlocal best_plan, best_cost, plans
+        for _ in range(rounds):
+            tasks = [(task_problem, store.random.getrandbits(64), histories[k], termination, plans[k])
+                     for k in range(starts)]
+            results = list(pool.map(_search_task, tasks))
+            for plan, cost in results:
+                if cost < best_cost:
+                    best_plan, best_cost = plan, cost
+            # Elite exchange: part of the searches restart from the best plan
+            elite = int(round(starts * elite_share))
+            order = sorted(range(starts), key=lambda k: results[k][1], reverse=True)
+            plans = [results[k][0] for k in range(starts)]
+            for k in order[:elite]:
+                plans[k] = best_plan
+
+    if executor is not None:
+        search(executor, problem)
+    else:
+        with ProcessPoolExecutor(max_workers=processes or starts, mp_context=_search_context(),
+                                 initializer=_init_search_worker, initargs=(problem,)) as pool:
+            search(pool, None)
 
-    history_length = 10
-    cost_history = [cost(current_decisions)] * history_length
-    best_decisions = current_decisions
-    best_cost = cost(current_decisions)
-    
-    for i in range(200):
-        candidate_decisions = create_neighbor(current_decisions)
-        candidate_cost = cost(candidate_decisions)
-        
-        if (candidate_cost <= cost_history[i % history_length] or 
-            candidate_cost <= best_cost):
-            current_decisions = candidate_decisions
-            if candidate_cost < best_cost:
-                best_decisions = candidate_decisions
-                best_cost = candidate_cost
-        
-        cost_history[i % history_length] = cost(current_decisions)
-    
-    return [(book, qty) for book, qty in best_decisions if qty > 0]
\ No newline at end of file
+    return [(books[i], qty) for i, qty in best_plan.items() if qty > 0]
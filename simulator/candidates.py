@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class CandidateMix:
+    """
+    How restock candidates are drawn from the catalog.
+
+    top_rated books are the best by rating plus uniform noise in
+    [-rating_noise, rating_noise]; random_extra (plus the remaining
+    capacity, when scale_with_capacity) further books are drawn uniformly
+    from the rest of the catalog.
+    """
+    top_rated: int = 1000
+    random_extra: int = 2000
+    rating_noise: float = 0.2
+    scale_with_capacity: bool = True
+
+
+def select_candidates(catalog, remaining_capacity, rng, mix=None, exclude=None) -> np.ndarray:
+    """
+    Candidate catalog rows for a restock, shuffled.
+
+    The top rated books are found with a partial selection (argpartition)
+    instead of a full sort, and the random share is drawn from a boolean
+    mask of the rows not already taken. exclude is an optional boolean
+    mask (or array of row ids) of rows that must not be offered at all.
+    """
+    mix = mix or CandidateMix()
+    n = len(catalog)
+    available = np.ones(n, dtype=bool)
+    if exclude is not None:
+        exclude = np.asarray(exclude)
+        if exclude.dtype == bool:
+            available &= ~exclude[:n]
+        else:
+            available[exclude] = False
+    pool = np.flatnonzero(available)
+
+    noisy = catalog.rating[pool] + rng.uniform(-mix.rating_noise, mix.rating_noise, len(pool))
+    k = min(mix.top_rated, len(pool))
+    if k < len(pool):
+        top = pool[np.argpartition(-noisy, k - 1)[:k]]
+    else:
+        top = pool
+    available[top] = False
+
+    rest = np.flatnonzero(available)
+    extra = mix.random_extra + (max(0, remaining_capacity) if mix.scale_with_capacity else 0)
+    chosen = rng.choice(rest, size=min(extra, len(rest)), replace=False)
+    return rng.permutation(np.concatenate([top, chosen]))
@@ -0,0 +1,358 @@
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+from collections.abc import Sequence
+
+from seasonal import SeasonalIndex, SOLVER_MODE, book_text
+
+
+def normalize_title(title) -> str:
+    """Index key for titles: case-folded with whitespace collapsed."""
+    return " ".join(str(title).split()).casefold()
+
+
+class Categories:
+    """Maps categorical values (authors, genres) to dense integer codes."""
+
+    def __init__(self, values=()):
+        self.values = []
+        self._codes = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value) -> int:
+        """Return the code for value, registering it if unseen."""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def find(self, value) -> int:
+        """Return the code for value, or -1 if it was never registered."""
+        return self._codes.get(value, -1)
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+
+class Book:
+    """A catalog row. Attributes are read straight from the catalog columns."""
+    __slots__ = ("catalog", "row", "__weakref__")
+
+    def __init__(self, title, authors, genre, price, isbn, publication_date=None, average_rating=0.0, num_pages=0):
+        # A standalone book gets its own one-row catalog; Inventory.add_book
+        # moves it into the shared catalog.
+        catalog = Catalog()
+        row = catalog.append(title, authors, genre, price, isbn,
+                             publication_date, average_rating, num_pages)
+        catalog.adopt(self, row)
+
+    @classmethod
+    def _view(cls, catalog, row):
+        book = object.__new__(cls)
+        book.catalog = catalog
+        book.row = row
+        return book
+
+    # Views are immutable; copying one must not copy the whole catalog
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @property
+    def title(self):
+        return self.catalog._title[self.row]
+
+    @property
+    def authors(self):
+        return self.catalog.authors[self.catalog._author_code[self.row]]
+
+    @property
+    def genre(self):
+        return self.catalog.genres[self.catalog._genre_code[self.row]]
+
+    @property
+    def price(self) -> float:
+        return float(self.catalog._price[self.row])
+
+    @property
+    def isbn(self):
+        return self.catalog._isbn[self.row]
+
+    @property
+    def publication_date(self):
+        return self.catalog._publication_date[self.row]
+
+    @property
+    def average_rating(self) -> float:
+        return float(self.catalog._rating[self.row])
+
+    @property
+    def num_pages(self) -> int:
+        return int(self.catalog._pages[self.row])
+
+    def __repr__(self):
+        return f"Book(title={self.title}, isbn={self.isbn})"
+
+
+class BookSequence(Sequence):
+    """Read-only list-like view of every book in a catalog, in row order."""
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+
+    def __len__(self):
+        return len(self._catalog)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._catalog.book(row) for row in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("book index out of range")
+        return self._catalog.book(index)
+
+    def __iter__(self):
+        book = self._catalog.book
+        for row in range(len(self._catalog)):
+            yield book(row)
+
+    def __contains__(self, book):
+        return isinstance(book, Book) and book.catalog is self._catalog
+
+
+class Catalog:
+    """
+    Columnar book catalog.
+
+    Every book is an integer row id. Numeric attributes live in NumPy arrays,
+    authors and genres are stored as categorical codes, and Book objects are
+    thin views created on demand. A view is kept only while something
+    references it, and there is at most one per row at a time, so identity
+    is stable for as long as anyone can observe it.
+    """
+    _GROWTH = 2
+
+    def __init__(self, capacity=0):
+        self._size = 0
+        self._title = np.empty(capacity, dtype=object)
+        self._isbn = np.empty(capacity, dtype=object)
+        self._publication_date = np.empty(capacity, dtype=object)
+        self._author_code = np.empty(capacity, dtype=np.int32)
+        self._genre_code = np.empty(capacity, dtype=np.int32)
+        self._price = np.empty(capacity, dtype=np.float64)
+        self._rating = np.empty(capacity, dtype=np.float64)
+        self._pages = np.empty(capacity, dtype=np.int32)
+        self.authors = Categories()
+        self.genres = Categories()
+        # Views are only kept while something else references them
+        self._views = weakref.WeakValueDictionary()
+        self._views_lock = threading.Lock()
+        self._isbn_index = None
+        self._title_index = None
+        self._author_index = None
+        self._seasonal = {}
+
+    def __len__(self):
+        return self._size
+
+    # Column accessors, trimmed to the populated rows
+    @property
+    def title(self) -> np.ndarray:
+        return self._title[:self._size]
+
+    @property
+    def isbn(self) -> np.ndarray:
+        return self._isbn[:self._size]
+
+    @property
+    def publication_date(self) -> np.ndarray:
+        return self._publication_date[:self._size]
+
+    @property
+    def author_code(self) -> np.ndarray:
+        return self._author_code[:self._size]
+
+    @property
+    def genre_code(self) -> np.ndarray:
+        return self._genre_code[:self._size]
+
+    @property
+    def price(self) -> np.ndarray:
+        return self._price[:self._size]
+
+    @property
+    def rating(self) -> np.ndarray:
+        return self._rating[:self._size]
+
+    @property
+    def pages(self) -> np.ndarray:
+        return self._pages[:self._size]
+
+    def _reserve(self, capacity):
+        if capacity <= len(self._price):
+            return
+        capacity = max(capacity, len(self._price) * self._GROWTH, 16)
+        for name in ("_title", "_isbn", "_publication_date", "_author_code",
+                     "_genre_code", "_price", "_rating", "_pages"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def append(self, title, authors, genre, price, isbn, publication_date=None, average_rating=0.0, num_pages=0) -> int:
+        """Add one book and return its row id."""
+        row = self._size
+        self._reserve(row + 1)
+        self._title[row] = title
+        self._isbn[row] = isbn
+        self._publication_date[row] = publication_date
+        self._author_code[row] = self.authors.code(authors)
+        self._genre_code[row] = self.genres.code(genre)
+        self._price[row] = price
+        self._rating[row] = average_rating
+        self._pages[row] = num_pages
+        self._size += 1
+        self._index_rows(range(row, row + 1))
+        return row
+
+    def extend(self, title, authors, genre, price, isbn, publication_date, average_rating, num_pages) -> np.ndarray:
+        """Add a batch of books given as equal-length columns and return their row ids."""
+        count = len(price)
+        start = self._size
+        self._reserve(start + count)
+        stop = start + count
+        self._title[start:stop] = np.asarray(title, dtype=object)
+        self._isbn[start:stop] = np.asarray(isbn, dtype=object)
+        self._publication_date[start:stop] = np.asarray(publication_date, dtype=object)
+        self._author_code[start:stop] = self._encode(self.authors, authors)
+        self._genre_code[start:stop] = self._encode(self.genres, genre)
+        self._price[start:stop] = price
+        self._rating[start:stop] = average_rating
+        self._pages[start:stop] = num_pages
+        self._size = stop
+        self._index_rows(range(start, stop))
+        return np.arange(start, stop)
+
+    @staticmethod
+    def _encode(categories, values) -> np.ndarray:
+        local_codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        lookup = np.fromiter((categories.code(value) for value in uniques),
+                             dtype=np.int32, count=len(uniques))
+        return lookup[local_codes]
+
+    # Lookup indexes. Each is built on first use and then kept current by
+    # append/extend.
+    def _index_rows(self, rows):
+        if self._isbn_index is not None:
+            for row in rows:
+                self._isbn_index.setdefault(self._isbn[row], row)
+        if self._title_index is not None:
+            for row in rows:
+                self._title_index.setdefault(normalize_title(self._title[row]), []).append(row)
+        if self._author_index is not None:
+            for row in rows:
+                self._author_index.setdefault(int(self._author_code[row]), []).append(row)
+
+    @property
+    def isbn_index(self) -> dict:
+        """ISBN -> row id of its first occurrence."""
+        if self._isbn_index is None:
+            index = {}
+            for row, isbn in enumerate(self.isbn):
+                index.setdefault(isbn, row)
+            self._isbn_index = index
+        return self._isbn_index
+
+    @property
+    def title_index(self) -> dict:
+        """Normalized title -> row ids (titles are not unique)."""
+        if self._title_index is None:
+            index = {}
+            for row, title in enumerate(self.title):
+                index.setdefault(normalize_title(title), []).append(row)
+            self._title_index = index
+        return self._title_index
+
+    @property
+    def author_index(self) -> dict:
+        """Author code -> row ids."""
+        if self._author_index is None:
+            codes = self.author_code
+            order = np.argsort(codes, kind="stable")
+            boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+            self._author_index = {
+                int(codes[group[0]]): group.tolist()
+                for group in np.split(order, boundaries) if len(group)
+            }
+        return self._author_index
+
+    def row_for_isbn(self, isbn) -> int:
+        """Row id for an ISBN, or -1 if it is not in the catalog."""
+        return self.isbn_index.get(isbn, -1)
+
+    def rows_for_title(self, title) -> list:
+        """Row ids whose normalized title matches, exact matches first."""
+        rows = self.title_index.get(normalize_title(title), [])
+        exact = [row for row in rows if self._title[row] == title]
+        return exact + [row for row in rows if self._title[row] != title]
+
+    def rows_for_author(self, authors) -> list:
+        """Row ids for an exact authors value."""
+        code = self.authors.find(authors)
+        return self.author_index.get(code, []) if code >= 0 else []
+
+    def seasonal(self, mode=SOLVER_MODE) -> SeasonalIndex:
+        """Seasonal keyword matches for every row, computed once per mode."""
+        index = self._seasonal.get(mode)
+        if index is None or len(index.mask) != self._size:
+            authors = self.authors.values
+            if mode.include_genre:
+                genres = self.genres.values
+                texts = [book_text(title, authors[a], genres[g]) for title, a, g
+                         in zip(self.title, self.author_code, self.genre_code)]
+            else:
+                texts = [book_text(title, authors[a]) for title, a in zip(self.title, self.author_code)]
+            index = SeasonalIndex.build(texts, mode)
+            self._seasonal[mode] = index
+        return index
+
+    def book(self, row) -> Book:
+        """Return the Book view for a row id."""
+        row = int(row)
+        view = self._views.get(row)
+        if view is None:
+            # One view per row at a time, even when threads race here
+            with self._views_lock:
+                view = self._views.get(row)
+                if view is None:
+                    view = self._views[row] = Book._view(self, row)
+        return view
+
+    def adopt(self, book, row):
+        """Rebind book to a row of this catalog, as that row's view."""
+        with self._views_lock:
+            book.catalog, book.row = self, row
+            self._views[row] = book
+
+    def books_at(self, rows) -> list:
+        """Return Book views for an iterable of row ids."""
+        book = self.book
+        return [book(row) for row in rows]
+
+    @property
+    def books(self) -> BookSequence:
+        return BookSequence(self)
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from catalog import Catalog, Categories
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+CACHE_DIR_NAME = ".catalog_cache"
+
+# Numeric columns are stored as .npy files and memory-mapped on load
+NUMERIC_COLUMNS = ("author_code", "genre_code", "price", "rating", "pages")
+# Text columns are stored as NUL-separated UTF-8 blobs
+TEXT_COLUMNS = ("title", "isbn", "publication_date")
+
+
+def file_digest(path, chunk_size=1 << 20) -> str:
+    """Content hash of a file, read in chunks."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_key(csv_path, content_hash=None) -> dict:
+    """Identity of a source CSV: resolved path, size, mtime and content hash."""
+    stat = os.stat(csv_path)
+    return {
+        "path": os.path.abspath(csv_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "content_hash": content_hash,
+    }
+
+
+def _cache_root(csv_path, cache_dir):
+    return cache_dir or os.path.join(os.path.dirname(os.path.abspath(csv_path)), CACHE_DIR_NAME)
+
+
+def _manifest_path(csv_path, cache_dir):
+    path = os.path.abspath(csv_path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    path_id = hashlib.blake2b(path.encode("utf-8"), digest_size=4).hexdigest()
+    return os.path.join(_cache_root(csv_path, cache_dir), f"{stem}-{path_id}.json")
+
+
+def _encode_text(values) -> bytes:
+    strings = ["" if value is None or value != value else str(value) for value in values]
+    if any("\x00" in s for s in strings):
+        raise ValueError("text column contains NUL characters")
+    return "\x00".join(strings).encode("utf-8")
+
+
+def _decode_text(blob: bytes, count: int, empty_as_none=False) -> np.ndarray:
+    strings = blob.decode("utf-8").split("\x00") if count else []
+    if empty_as_none:
+        strings = [s if s else None for s in strings]
+    column = np.empty(count, dtype=object)
+    column[:] = strings
+    return column
+
+
+def save_snapshot(catalog, report, snapshot_dir):
+    """Write the catalog columns and ingest report into snapshot_dir."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    for name in NUMERIC_COLUMNS:
+        np.save(os.path.join(snapshot_dir, f"{name}.npy"), np.ascontiguousarray(getattr(catalog, name)))
+    for name in TEXT_COLUMNS:
+        with open(os.path.join(snapshot_dir, f"{name}.txt"), "wb") as f:
+            f.write(_encode_text(getattr(catalog, name)))
+    for name in ("authors", "genres"):
+        with open(os.path.join(snapshot_dir, f"{name}.txt"), "wb") as f:
+            f.write(_encode_text(getattr(catalog, name).values))
+    with open(os.path.join(snapshot_dir, "report.json"), "w") as f:
+        json.dump({"loaded": report.loaded, "rejected": report.rejected,
+                   "rows": len(catalog),
+                   "authors": len(catalog.authors), "genres": len(catalog.genres)}, f)
+
+
+def load_snapshot(snapshot_dir):
+    """Rebuild a Catalog from snapshot_dir. Numeric columns are memory-mapped read-only."""
+    with open(os.path.join(snapshot_dir, "report.json")) as f:
+        meta = json.load(f)
+    rows = meta["rows"]
+
+    catalog = Catalog()
+    for name in NUMERIC_COLUMNS:
+        setattr(catalog, f"_{name}", np.load(os.path.join(snapshot_dir, f"{name}.npy"), mmap_mode="r"))
+    for name in TEXT_COLUMNS:
+        with open(os.path.join(snapshot_dir, f"{name}.txt"), "rb") as f:
+            setattr(catalog, f"_{name}", _decode_text(f.read(), rows, empty_as_none=(name == "publication_date")))
+    for name in ("authors", "genres"):
+        with open(os.path.join(snapshot_dir, f"{name}.txt"), "rb") as f:
+            setattr(catalog, name, Categories(_decode_text(f.read(), meta[name])))
+    catalog._size = rows
+    return catalog, meta
+
+
+def cached_catalog(csv_path, build, cache_dir=None, verify_hash=False):
+    """
+    Return (catalog, meta) for csv_path, using a binary snapshot when it is fresh.
+
+    build(csv_path) must return (catalog, report) and is only called when the
+    snapshot is missing or stale. A snapshot is fresh when path, size and
+    mtime match; if only the mtime changed, the content hash decides. With
+    verify_hash=True the content hash is always checked.
+    """
+    manifest_path = _manifest_path(csv_path, cache_dir)
+    key = source_key(csv_path)
+    manifest = None
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning(f"Ignoring unreadable catalog cache manifest {manifest_path}: {e}")
+
+    if manifest and manifest.get("version") == SNAPSHOT_VERSION and manifest["source"]["path"] == key["path"]:
+        cached = manifest["source"]
+        same_stat = cached["size"] == key["size"] and cached["mtime_ns"] == key["mtime_ns"]
+        if same_stat and not verify_hash:
+            fresh = True
+        elif cached["size"] == key["size"]:
+            key["content_hash"] = file_digest(csv_path)
+            fresh = key["content_hash"] == cached["content_hash"]
+        else:
+            fresh = False
+
+        snapshot_dir = os.path.join(os.path.dirname(manifest_path), manifest["snapshot"])
+        if fresh and os.path.isdir(snapshot_dir):
+            if not same_stat:
+                # Touched but unchanged: refresh the manifest so the next run skips hashing
+                manifest["source"] = key
+                _write_manifest(manifest_path, manifest)
+            log.info(f"Loaded catalog snapshot for {csv_path}")
+            return load_snapshot(snapshot_dir)
+
+    log.info(f"Catalog snapshot for {csv_path} is missing or stale, rebuilding")
+    catalog, report = build(csv_path)
+    if key["content_hash"] is None:
+        key["content_hash"] = file_digest(csv_path)
+    try:
+        _store(manifest_path, manifest, key, catalog, report)
+    except (OSError, ValueError) as e:
+        log.warning(f"Could not write catalog snapshot for {csv_path}: {e}")
+    return catalog, {"loaded": report.loaded, "rejected": report.rejected}
+
+
+def _store(manifest_path, old_manifest, key, catalog, report):
+    root = os.path.dirname(manifest_path)
+    os.makedirs(root, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(manifest_path))[0]
+    snapshot_dir = tempfile.mkdtemp(prefix=f"{stem}-{key['content_hash'][:12]}-", dir=root)
+    try:
+        save_snapshot(catalog, report, snapshot_dir)
+    except Exception:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        raise
+    # The manifest is replaced atomically, so readers see either the old or the new snapshot
+    _write_manifest(manifest_path, {
+        "version": SNAPSHOT_VERSION,
+        "source": key,
+        "snapshot": os.path.basename(snapshot_dir),
+    })
+    if old_manifest and old_manifest.get("snapshot") and old_manifest["snapshot"] != os.path.basename(snapshot_dir):
+        shutil.rmtree(os.path.join(root, old_manifest["snapshot"]), ignore_errors=True)
+
+
+def _write_manifest(manifest_path, manifest):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(manifest_path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
@@ -0,0 +1,66 @@
+import os
+import random
+import sys
+
+import pytest
+
+# The simulator modules import each other as top-level modules (they are run
+# from this directory), so make that work under pytest too.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog import Catalog  # noqa: E402
+from inventory import Inventory  # noqa: E402
+from store import Store  # noqa: E402
+
+
+def make_inventory(n=400, seed=7):
+    rng = random.Random(seed)
+    words = ["Love", "Magic", "Snow", "Garden", "River", "Night", "Potter", "Stone"]
+    catalog = Catalog()
+    for i in range(n):
+        catalog.append(
+            title=f"{rng.choice(words)} {rng.choice(words)} {i}",
+            authors=f"Author {rng.randrange(40)}",
+            genre=rng.choice(["Fiction", "Mystery", "Romance", "Fantasy"]),
+            price=round(rng.uniform(4, 14), 2),
+            isbn=f"isbn-{i}",
+            average_rating=round(rng.uniform(3.5, 5.0), 2),
+            num_pages=rng.randrange(80, 600),
+        )
+    return Inventory(catalog)
+
+
+@pytest.fixture
+def store():
+    random.seed(3)
+    return Store(make_inventory(), storage_capacity=600)
+
+
+def churn(store, steps=300, seed=11):
+    rng = random.Random(seed)
+    books = store.inventory.books
+    for _ in range(steps):
+        if store.stock and rng.random() < 0.6:
+            book = rng.choice(list(store.stock))
+            store.sell_book(isbn=book.isbn, quantity=rng.randint(1, store.stock[book]))
+        else:
+            store._add_stock(rng.choice(books), rng.randint(1, 5))
+
+
+def isbn13(rng):
+    digits = [rng.randrange(10) for _ in range(12)]
+    total = sum(d * (3 if i % 2 else 1) for i, d in enumerate(digits))
+    return "".join(map(str, digits)) + str((10 - total % 10) % 10)
+
+
+def write_catalog_csv(path, n=200, seed=7):
+    """A valid catalog CSV in the dataset's format (price with £, ISBN-13s)."""
+    rng = random.Random(seed)
+    words = ["Love", "Magic", "Snow", "Garden", "River", "Night", "Potter", "Stone"]
+    lines = ["title,authors,genre,price,isbn,publication_date,average_rating,num_pages"]
+    for i in range(n):
+        lines.append(f"{rng.choice(words)} {rng.choice(words)} {i},Author {rng.randrange(40)},"
+                     f"{rng.choice(['Fiction', 'Mystery', 'Romance', 'Fantasy'])},£{rng.uniform(4, 14):.2f},"
+                     f"{isbn13(rng)},1/1/2000,{rng.uniform(3.5, 5.0):.2f},{rng.randrange(80, 600)}")
+    path.write_text("\n".join(lines) + "\n")
+    return path
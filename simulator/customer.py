@@ -1,113 +1,27 @@
 import random
-from collections import Counter
-from datetime import datetime
+import weakref
+import numpy as np
+from dataclasses import dataclass
+
+from seasonal import SEASONAL_KEYWORDS
+from preference_pools import CHEAP_PRICE, sample_pools
+
+# Preference types in code order (see demand.py)
+PREFERENCE_TYPES = ("title", "author", "genre", "rating", "price", "none")
+
+
+def _top_codes(counts, k):
+    """Codes of the k largest counts, most frequent first (ties keep first-seen order)."""
+    order = np.argsort(-counts, kind="stable")
+    return [int(code) for code in order[:k] if counts[code] > 0]
+
+
+def _book(store, row):
+    return store.inventory.catalog.book(row)
 
-class Customer:
-    seasonal_keywords = {
-        1: [
-            "Habits", "Motivation", "Resolutions", "Change", "Clear", "Sincero", "Kiyosaki",
-            "Mindset", "Goals", "Minimalism", "Atomic", "Power", "Purpose", "Clarity",
-            "Growth", "Robbins", "Success", "Wealth", "Focus", "Planning", "Determination",
-            "Energy", "New", "Start", "Beginnings", "Discipline", "Achievement", "Strategy",
-            "Vision", "Optimism", "Renewal", "Career", "Dreams", "Balance", "Reinvention",
-            "Resolve", "Practice", "Choices", "Wellness", "Health", "Challenge", "Routine",
-            "Self", "Discovery", "Inner", "Strength", "Clarity", "Progress", "Foundations",
-            "Building", "Empower", "Reboot", "Goals", "Clear"
-        ],
-        2: [
-            "Love", "Romance", "Sparks", "Austen", "Brontë", "Hearts", "Cupid", "Pride",
-            "Prejudice", "Outlander", "Passion", "Valentine", "Affection", "Jane", "Darcy",
-            "Wedding", "Relationships", "Sweet", "Nicholas", "Tenderness", "Crush", "Roses",
-            "Letters", "Poetry", "Emotions", "Yearning", "Longing", "Forever", "Destiny",
-            "Devotion", "Admire", "Cherish", "Couples", "Amour", "Connection", "Sentiments",
-            "Romance", "Roses", "Charm", "Charming", "Elegant", "Couples", "Darling",
-            "Kisses", "Flirt", "Attraction", "Sweetheart", "Candlelight", "Darling",
-            "Wistful", "Endearing", "Magnetic", "Swoon"
-        ],
-        3: [
-            "Spring", "Growth", "Green", "Empowerment", "Feminism", "Angelou", "Blossoms",
-            "Change", "Equality", "Renewal", "Women", "Sheryl", "Wollstonecraft", "Nature",
-            "Forest", "Awakening", "Maya", "Dreams", "Rights", "Courage", "Strength",
-            "Resilience", "Spirit", "Voice", "March", "Embrace", "Blossoming", "Equality",
-            "Reform", "Advocacy", "Leaders", "Unity", "Visionary", "Inspire", "Bloom",
-            "Roots", "Canopy", "Branches", "Petals", "Eco", "Seeds", "Rivers", "Sunshine",
-            "Morning", "New", "Fields", "Meadows", "Hope", "Rejuvenate", "Sheryl", "Bright",
-            "History", "Compassion", "Leader", "Fragrance"
-        ],
-        4: [
-            "Nature", "Tolkien", "Hobbit", "Garden", "Easter", "Middle-Earth", "Flowers",
-            "Rivers", "Trees", "Adventures", "Renewal", "Mystical", "Green", "Outdoor",
-            "Magic", "Bloom", "Spring", "Lore", "Wanderlust", "Fantasy", "Serenity",
-            "Wildlife", "Planting", "Wander", "Frodo", "Shire", "Trails", "Mountains",
-            "Quiet", "Peace", "Village", "Plant", "Blossom", "Rain", "Budding", "Hiking",
-            "Renewal", "Outdoor", "Woods", "Earth", "Sunshine", "Growth", "Gardens",
-            "Simplicity", "Nurture", "Landscapes", "Awaken", "Leaves", "Tolkien", "Fauna",
-            "Flora", "Cycles", "Meadow", "Fields"
-        ],
-        5: [
-            "Mother", "Family", "Gifting", "Home", "Domestic", "Cookbooks", "Recipes",
-            "Love", "Parenting", "Barbara", "Sisters", "Nurture", "Alcott", "Little",
-            "Women", "Warmth", "Care", "Comfort", "Kingsolver", "Traditions", "Memories",
-            "Heartfelt", "Generations", "Household", "Gathering", "Kindness", "Loyalty",
-            "Support", "Affection", "Mom", "Floral", "Motherhood", "Matriarch", "Love",
-            "Heritage", "Feminine", "Daughter", "Son", "Close", "Heirloom", "Memories",
-            "Tales", "Portrait", "Serenity", "Heartwarming", "Kitchen", "Dinner",
-            "Gathering", "Togetherness", "Bonds", "Warm", "Cooks", "Handwritten"
-        ],
-        6: [
-            "Pride", "Love", "Wilde", "LGBTQ+", "Freedom", "Equality", "Rainbow", "Summer",
-            "Romance", "Colorful", "Alice", "Heartstopper", "Bright", "Levithan", "Inclusion",
-            "Adventures", "Stories", "Joy", "Sunlight", "Bonds", "Allies", "Festivals", "Prideful",
-            "Bold", "Empower", "Celebration", "Courage", "Stories", "Awareness", "Creativity",
-            "Literature", "Identity", "Acceptance", "Friendship", "Discovery", "Humanity", "Brave",
-            "Storytelling", "Vibrant", "Bonds", "Authentic", "Expression", "Diversity", "Voice",
-            "Society", "Progress", "Liberation", "Sparkle", "Unique", "Spectrum", "Parade", "Euphoria"
-        ],
-        7: [
-            "Adventure", "King", "Thrillers", "Patterson", "Heat", "Island", "Sand", "Beach",
-            "Murder", "Crime", "Suspense", "Fire", "Danger", "Sun", "Mystery", "Clues", "Waves",
-            "Stephen", "Chase", "James", "Journey", "Summer", "Coast", "Detectives", "Dunes",
-            "Secrets", "Hidden", "Sea", "Oceans", "Heatwave", "Plot", "Intrigue", "Cryptic", "Twists",
-            "Breakout", "Sunset", "Island", "Quest", "Lagoon", "Obsession", "Mirage", "Ambush",
-            "Spy", "Intensity", "Tides", "Chills", "Fog", "Puzzles"
-        ],
-        8: [
-            "Education", "School", "Potter", "Rowling", "Magic", "Fantasy", "Students", "Library",
-            "Knowledge", "Spells", "Wands", "Hogwarts", "Children", "Youth", "Backpacks", "Lessons",
-            "Wisdom", "Reading", "Discover", "Secrets", "Textbooks", "Fiction", "Enigma", "Study",
-            "Triumph", "Dormitories", "Wizards", "Teachers", "Quidditch", "Potions", "Maps", "Tales",
-            "Fantastic", "Learning", "Pages", "Adventure", "Scholars", "Ladders", "Genius", "Inspiration",
-            "Stories", "Discovery", "Dreams", "Imagination", "History", "Writing", "Fantasy"
-        ],
-        9: [
-            "Classics", "Literature", "Orwell", "Fitzgerald", "Steinbeck", "College", "Reading",
-            "Study", "Gatsby", "Essays", "Culture", "Mice", "Hemingway", "Victorian", "Seminar",
-            "Discourse", "Renaissance", "Fiction", "Chapter", "Verse", "Legacy", "Knowledge",
-            "Classrooms", "Wisdom", "Libraries", "Timeless", "Heritage", "Canon", "Poetry", 
-            "Structure", "Reflection", "Analysis", "Prose", "Stories", "Timeless", "Study", "Booklist"
-        ],
-        10: [
-            "Halloween", "Horror", "Monsters", "Dracula", "Ghosts", "King", "Poe", "Shadows",
-            "Nightmares", "Darkness", "Frights", "Spooky", "Haunted", "Creepy", "Shelley",
-            "Witches", "Magic", "Thrills", "Vampires", "Fog", "Evil", "Paranormal", "Candles",
-            "Graveyard", "Midnight", "Sorcery", "Chills", "Howling", "Frights", "Screams",
-            "Mysterious", "Curse", "Phantom", "Cryptic", "Haze", "Terror", "Gothic", "Eerie"
-        ],
-        11: [
-            "Family", "Thanksgiving", "Harvest", "Dinner", "Gratitude", "Traditions", "Stories", 
-            "Feast", "Home", "Warmth", "Togetherness", "Closeness", "Gathering", "Kinship",
-            "Bonds", "Seasonal", "Table", "Nostalgia", "Cooking", "Kindness", "Support",
-            "Giving", "Celebration", "Unity", "Heartfelt", "Generations", "Heritage", "Recipes"
-        ],
-        12: [
-            "Christmas", "Magic", "Rowling", "Potter", "Cozy", "Snow", "Gifts", "Dickens", 
-            "Family", "Traditions", "Holiday", "Lights", "Wands", "Hearth", "Joy", "Yule",
-            "Cheer", "Santa", "Nostalgia", "Cookies", "Fireplace", "Candles", "Festive",
-            "Frost", "Lanterns", "Classic", "Snowfall", "Ornaments", "Carols", "Tree", 
-            "Merry", "Sleigh", "North", "Heartwarming", "December", "Magic"
-        ]
-    }
 
+class Customer:
+    seasonal_keywords = SEASONAL_KEYWORDS
 
     def __init__(self, preference_type, preference_value):
         self.preference_type = preference_type
@@ -123,142 +37,197 @@ class Customer:
         elif self.preference_type == "rating":
             return self._choose_by_rating(store, current_date)
         elif self.preference_type == "price":
-            return self._choose_by_price(store)
+            return self._choose_by_price(store, current_date)
         else:
             return self._choose_by_none(store, current_date)
 
     def _choose_by_author(self, store):
-        matched_books = [book for book in store.stock.keys() 
-                        if self.preference_value in book.authors]
+        pools = store.preference_pools.author_pools(self.preference_value)
+        row = sample_pools(pools)
         # 80% chance to walk away if no exact match
-        if not matched_books and random.random() < 0.8:
+        if row is None and random.random() < 0.8:
             return None
-        return random.choice(matched_books) if matched_books else None
+        return _book(store, row) if row is not None else None
 
     def _choose_by_genre(self, store, current_date):
-        month = current_date.month
-        keywords = self.seasonal_keywords.get(month, [])
-        seasonal_matches = []
-        genre_matches = []
-        
-        for book in store.stock.keys():
-            if self.preference_value == book.genre:
-                if any(keyword in (book.title + " " + book.authors) for keyword in keywords):
-                    seasonal_matches.append(book)
-                genre_matches.append(book)
-        
+        pools = store.preference_pools
+        seasonal_matches = pools.genre_pool(self.preference_value, current_date.month)
+        genre_matches = pools.genre_pool(self.preference_value)
+
         # First try seasonal matches
         if seasonal_matches:
-            return random.choice(seasonal_matches)
+            return _book(store, seasonal_matches.sample())
         # Then try genre matches, but 80% chance to walk away if not seasonal
         if genre_matches and random.random() > 0.8:
-            return random.choice(genre_matches)
+            return _book(store, genre_matches.sample())
         return None
 
     def _choose_by_title(self, store):
-        for book in store.stock.keys():
-            if self.preference_value == book.title:
-                return book
+        book = store.stock_index.find_title(self.preference_value)
+        if book is not None:
+            return book
         # 80% chance to walk away if exact title not found
         if random.random() < 0.8:
             return None
         return None
 
     def _choose_by_rating(self, store, current_date):
-        month = current_date.month
-        keywords = self.seasonal_keywords.get(month, [])
-        seasonal_rated_books = []
-        high_rated_books = []
-        
-        for book in store.stock.keys():
-            if book.average_rating >= 4.5:
-                if any(keyword in (book.title + " " + book.authors) for keyword in keywords):
-                    seasonal_rated_books.append(book)
-                high_rated_books.append(book)
-        
+        pools = store.preference_pools
+        seasonal_rated_books = pools.seasonal_high_rated[current_date.month - 1]
+        high_rated_books = pools.high_rated
+
         # Try seasonal high-rated books first
         if seasonal_rated_books:
-            return random.choice(seasonal_rated_books)
+            return _book(store, seasonal_rated_books.sample())
         # Then try just high-rated books, but 80% chance to walk away if not seasonal
         if high_rated_books and random.random() > 0.8:
-            return random.choice(high_rated_books)
+            return _book(store, high_rated_books.sample())
         return None
 
-    def _choose_by_price(self, store):
-        month = datetime.now().month
-        keywords = self.seasonal_keywords.get(month, [])
-        seasonal_cheap_books = []
-        cheap_books = []
-        
-        for book in store.stock.keys():
-            if book.price <= 8.0:  # Changed from 9.0 to 8.0
-                if any(keyword in (book.title + " " + book.authors) for keyword in keywords):
-                    seasonal_cheap_books.append(book)
-                cheap_books.append(book)
-        
+    def _choose_by_price(self, store, current_date):
+        pools = store.preference_pools
+        # The preference value is the most the customer will pay
+        limit = self.preference_value if self.preference_value is not None else CHEAP_PRICE
+        seasonal_cheap_book = pools.seasonal_by_price[current_date.month - 1].cheapest(limit)
+        cheap_book = pools.by_price.cheapest(limit)
+
         # Try seasonal affordable books first
-        if seasonal_cheap_books:
-            return min(seasonal_cheap_books, key=lambda x: x.price)
+        if seasonal_cheap_book is not None:
+            return _book(store, seasonal_cheap_book)
         # Then try just cheap books, but 80% chance to walk away if not seasonal
-        if cheap_books and random.random() > 0.8:
-            return min(cheap_books, key=lambda x: x.price)
+        if cheap_book is not None and random.random() > 0.8:
+            return _book(store, cheap_book)
         return None
 
     def _choose_by_none(self, store, current_date):
-        month = current_date.month
-        keywords = self.seasonal_keywords.get(month, [])
-        seasonal_books = []
-        backup_books = []
-
-        for book in store.stock.keys():
-            if any(keyword in (book.title + " " + book.authors) for keyword in keywords):
-                if book.price <= 8.0 and book.average_rating >= 4.5:  
-                    seasonal_books.append(book)
-            elif book.price <= 8.0 and book.average_rating >= 4.5:  
-                backup_books.append(book)
+        pools = store.preference_pools
+        seasonal_books = pools.seasonal_good[current_date.month - 1]
+        # Backup books are the non-seasonal good ones; they are only used when
+        # there are no seasonal ones, so that is the whole "good" pool
+        backup_books = pools.good
 
         # Try seasonal good books first
         if seasonal_books:
-            return random.choice(seasonal_books)
+            return _book(store, seasonal_books.sample())
         # Then try backup books, but 80% chance to walk away if not seasonal
         if backup_books and random.random() > 0.8:
-            return random.choice(backup_books)
+            return _book(store, backup_books.sample())
         return None
 
     @staticmethod
-    def generate_customer_profiles(num_customers, store):
-        customer_profiles = []
-        inventory_titles = [book.title for book in store.inventory.books]
-        inventory_authors = [book.authors for book in store.inventory.books]
-        inventory_genres = [book.genre for book in store.inventory.books]
-
-        # Find the most popular authors and genres
-        author_counts = Counter(inventory_authors)
-        most_popular_authors = [author for author, count in author_counts.most_common(5)]
-        genre_counts = Counter(inventory_genres)
-        most_popular_genres = [genre for genre, count in genre_counts.most_common(5)]
-
-        # New distribution with increased seasonal/genre importance
-        for _ in range(num_customers // 50):  # 2% title preference
-            title = random.choice(inventory_titles)
-            customer_profiles.append(Customer("title", title))
-            
-        for _ in range(num_customers // 25):  # 4% author preference
-            author = random.choice(most_popular_authors)
-            customer_profiles.append(Customer("author", author))
-            
-        for _ in range(num_customers * 25 // 100):  # 25% genre/seasonal preference (major increase)
-            genre = random.choice(most_popular_genres)
-            customer_profiles.append(Customer("genre", genre))
-            
-        for _ in range(num_customers * 30 // 100):  # 30% rating preference
-            customer_profiles.append(Customer("rating", None))
-            
-        for _ in range(num_customers * 35 // 100):  # 35% price preference
-            customer_profiles.append(Customer("price", 8.0))  
-            
-        remaining = num_customers - len(customer_profiles)  # ~4% no specific preference
-        for _ in range(remaining):
-            customer_profiles.append(Customer("none", None))
-            
-        return customer_profiles
\ No newline at end of file
+    def generate_customer_profiles(num_customers, store, rng=None):
+        """Daily profiles drawn from the store catalog's cached CustomerPopulation."""
+        return CustomerPopulation.for_catalog(store.inventory.catalog).customers(num_customers, rng)
+
+
+@dataclass(frozen=True)
+class ProfileMix:
+    """
+    Shares of each preference type among a day's customer profiles.
+
+    Counts are floor(num_customers * share); whatever is left over gets no
+    specific preference ("none"). Title preferences are drawn uniformly from
+    the catalog, author and genre preferences from the top_authors /
+    top_genres most frequent values. Price-driven customers buy the
+    cheapest stocked book that costs at most price_limit.
+    """
+    title: float = 0.02
+    author: float = 0.04
+    genre: float = 0.25  # genre/seasonal preference (major increase)
+    rating: float = 0.30
+    price: float = 0.35
+    top_authors: int = 5
+    top_genres: int = 5
+    price_limit: float = CHEAP_PRICE
+
+    def counts(self, num_customers):
+        """Profile count per type, in PREFERENCE_TYPES order."""
+        counts = [int(num_customers * share) for share in
+                  (self.title, self.author, self.genre, self.rating, self.price)]
+        return counts + [max(0, num_customers - sum(counts))]
+
+
+class CustomerPopulation:
+    """
+    Generates daily customer profiles from catalog popularity statistics.
+
+    Author and genre frequencies are counted once and topped up when the
+    catalog grows, instead of being recounted from every book each day.
+    Profiles come out as compact arrays: a PREFERENCE_TYPES code and a value
+    id per customer (catalog row for title, author/genre code, else -1).
+    """
+    _by_catalog = weakref.WeakKeyDictionary()
+
+    def __init__(self, catalog, mix=None):
+        self.catalog = catalog
+        self.mix = mix or ProfileMix()
+        self._counted = 0
+        self._author_counts = np.zeros(0, dtype=np.int64)
+        self._genre_counts = np.zeros(0, dtype=np.int64)
+        self.refresh()
+
+    @classmethod
+    def for_catalog(cls, catalog):
+        """Shared population for a catalog with the default mix."""
+        population = cls._by_catalog.get(catalog)
+        if population is None:
+            population = cls._by_catalog[catalog] = cls(catalog)
+        return population
+
+    @staticmethod
+    def _add_counts(counts, codes, size):
+        grown = np.zeros(size, dtype=np.int64)
+        grown[:len(counts)] = counts
+        grown += np.bincount(codes, minlength=size)
+        return grown
+
+    def refresh(self):
+        """Fold catalog rows added since the last call into the statistics."""
+        catalog = self.catalog
+        if self._counted == len(catalog) and self._counted:
+            return
+        new = slice(self._counted, len(catalog))
+        self._author_counts = self._add_counts(self._author_counts, catalog.author_code[new], len(catalog.authors))
+        self._genre_counts = self._add_counts(self._genre_counts, catalog.genre_code[new], len(catalog.genres))
+        self._counted = len(catalog)
+        self.top_authors = np.array(_top_codes(self._author_counts, self.mix.top_authors), dtype=np.int64)
+        self.top_genres = np.array(_top_codes(self._genre_counts, self.mix.top_genres), dtype=np.int64)
+
+    def generate(self, num_customers, rng=None):
+        """Return (type_codes, value_ids) arrays for num_customers profiles."""
+        rng = rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+        self.refresh()
+        counts = self.mix.counts(num_customers)
+        type_codes = np.repeat(np.arange(len(PREFERENCE_TYPES), dtype=np.int8), counts)
+        value_ids = np.full(num_customers, -1, dtype=np.int64)
+
+        title_end = counts[0]
+        author_end = title_end + counts[1]
+        genre_end = author_end + counts[2]
+        if counts[0] and len(self.catalog):
+            value_ids[:title_end] = rng.integers(len(self.catalog), size=counts[0])
+        if counts[1] and len(self.top_authors):
+            value_ids[title_end:author_end] = self.top_authors[rng.integers(len(self.top_authors), size=counts[1])]
+        if counts[2] and len(self.top_genres):
+            value_ids[author_end:genre_end] = self.top_genres[rng.integers(len(self.top_genres), size=counts[2])]
+        return type_codes, value_ids
+
+    def customer(self, type_code, value_id):
+        """Customer object for one encoded profile."""
+        kind = PREFERENCE_TYPES[type_code]
+        if kind == "title":
+            value = self.catalog.title[value_id] if value_id >= 0 else None
+        elif kind == "author":
+            value = self.catalog.authors[value_id] if value_id >= 0 else None
+        elif kind == "genre":
+            value = self.catalog.genres[value_id] if value_id >= 0 else None
+        elif kind == "price":
+            value = self.mix.price_limit
+        else:
+            value = None
+        return Customer(kind, value)
+
+    def customers(self, num_customers, rng=None):
+        """Profiles as Customer objects, for the one-at-a-time simulation."""
+        type_codes, value_ids = self.generate(num_customers, rng)
+        return [self.customer(int(t), int(v)) for t, v in zip(type_codes, value_ids)]
@@ -0,0 +1,166 @@
+import numpy as np
+
+from customer import PREFERENCE_TYPES
+from preference_pools import CHEAP_PRICE
+
+TITLE, AUTHOR, GENRE, RATING, PRICE, NONE = range(len(PREFERENCE_TYPES))
+
+# Probability that a customer settles for a non-seasonal fallback
+# (Customer walks away when random() <= 0.8)
+FALLBACK_RATE = 0.2
+
+
+def encode_profiles(profiles, catalog):
+    """
+    Turn Customer profiles into (type_codes, value_ids) arrays, the same
+    encoding CustomerPopulation.generate produces: catalog row for title
+    preferences, author/genre code for author/genre preferences, else -1.
+    """
+    type_codes = np.empty(len(profiles), dtype=np.int8)
+    value_ids = np.full(len(profiles), -1, dtype=np.int64)
+    for i, customer in enumerate(profiles):
+        kind = customer.preference_type
+        type_codes[i] = PREFERENCE_TYPES.index(kind) if kind in PREFERENCE_TYPES else NONE
+        if kind == "title":
+            rows = catalog.rows_for_title(customer.preference_value)
+            value_ids[i] = rows[0] if rows else -1
+        elif kind == "author":
+            value_ids[i] = catalog.authors.find(customer.preference_value)
+        elif kind == "genre":
+            value_ids[i] = catalog.genres.find(customer.preference_value)
+    return type_codes, value_ids
+
+
+def _sample(pools, count, rng):
+    """count uniform draws over the union of pools (row ids); pools must be non-empty."""
+    sizes = np.fromiter((len(pool) for pool in pools), dtype=np.int64, count=len(pools))
+    picks = (rng.random(count) * sizes.sum()).astype(np.int64)
+    if len(pools) == 1:
+        rows = pools[0]._rows
+        return np.fromiter((rows[i] for i in picks), dtype=np.int64, count=count)
+    bounds = np.cumsum(sizes)
+    which = np.searchsorted(bounds, picks, side="right")
+    offsets = picks - (bounds - sizes)[which]
+    return np.fromiter((pools[w]._rows[o] for w, o in zip(which, offsets)), dtype=np.int64, count=count)
+
+
+def _primary_or_fallback(primary, fallback, count, rng):
+    """Rows for count customers: primary pool if non-empty, else fallback with FALLBACK_RATE."""
+    chosen = np.full(count, -1, dtype=np.int64)
+    if primary:
+        chosen[:] = _sample([primary], count, rng)
+        return chosen
+    settle = rng.random(count) < FALLBACK_RATE
+    if fallback and settle.any():
+        chosen[settle] = _sample([fallback], int(settle.sum()), rng)
+    return chosen
+
+
+def _cheapest_or_fallback(primary, fallback, limit, count, rng):
+    """_primary_or_fallback for price pools: everyone takes the cheapest row within limit."""
+    chosen = np.full(count, -1, dtype=np.int64)
+    row = primary.cheapest(limit)
+    if row is not None:
+        chosen[:] = row
+        return chosen
+    settle = rng.random(count) < FALLBACK_RATE
+    row = fallback.cheapest(limit)
+    if row is not None:
+        chosen[settle] = row
+    return chosen
+
+
+def resolve_choices(store, type_codes, value_ids, month, rng, price_limit=CHEAP_PRICE):
+    """
+    Resolve a batch of customers against the store's current preference pools.
+
+    Returns one row id per customer, -1 where the customer walks away.
+    Customers with the same (type, value) are resolved together; price
+    customers pay at most price_limit.
+    """
+    pools = store.preference_pools
+    catalog = store.inventory.catalog
+    chosen = np.full(len(type_codes), -1, dtype=np.int64)
+    keys = type_codes.astype(np.int64) * (len(catalog) + 1) + (value_ids + 1)
+    for key in np.unique(keys):
+        members = np.flatnonzero(keys == key)
+        kind = int(type_codes[members[0]])
+        value = int(value_ids[members[0]])
+        count = len(members)
+
+        if kind in (TITLE, AUTHOR, GENRE) and value < 0:
+            continue  # preference for something the catalog does not have
+        if kind == AUTHOR:
+            author_pools = pools.author_pools(catalog.authors[value])
+            if author_pools:
+                chosen[members] = _sample(author_pools, count, rng)
+        elif kind == TITLE:
+            title = catalog.title[value]
+            book = store.stock_index.find_title(title)
+            if book is not None:
+                chosen[members] = book.row
+        elif kind == GENRE:
+            genre = catalog.genres[value]
+            chosen[members] = _primary_or_fallback(
+                pools.genre_pool(genre, month), pools.genre_pool(genre), count, rng)
+        elif kind == RATING:
+            chosen[members] = _primary_or_fallback(
+                pools.seasonal_high_rated[month - 1], pools.high_rated, count, rng)
+        elif kind == PRICE:
+            chosen[members] = _cheapest_or_fallback(
+                pools.seasonal_by_price[month - 1], pools.by_price, price_limit, count, rng)
+        else:
+            chosen[members] = _primary_or_fallback(
+                pools.seasonal_good[month - 1], pools.good, count, rng)
+    return chosen
+
+
+def simulate_day(store, type_codes, value_ids, num_customers, current_date, rng, price_limit=CHEAP_PRICE):
+    """
+    Simulate one day of demand in bulk.
+
+    Draws the day's customers from the encoded profiles (type_codes,
+    value_ids as produced by CustomerPopulation.generate), resolves all of
+    them at once and applies the sales as one update per pass. When a title
+    sells out, the later customers who picked it are resolved again against
+    the updated pools, in arrival order, which is what they would have seen
+    had they been served one at a time. price_limit is what price-driven
+    customers pay at most (ProfileMix.price_limit).
+
+    Returns (rows, quantities) of the books sold, one entry per title.
+    """
+    picks = rng.integers(len(type_codes), size=num_customers) if len(type_codes) else np.zeros(0, dtype=np.int64)
+    pending_types = type_codes[picks]
+    pending_values = value_ids[picks]
+    sold = {}
+
+    while len(pending_types) and store.stock:
+        chosen = resolve_choices(store, pending_types, pending_values, current_date.month, rng, price_limit)
+        buying = np.flatnonzero(chosen >= 0)
+        if not len(buying):
+            break
+        rows = chosen[buying]
+
+        # Rank each buyer among the buyers of the same title, in arrival order
+        order = np.argsort(rows, kind="stable")
+        sorted_rows = rows[order]
+        group_start = np.r_[0, np.flatnonzero(np.diff(sorted_rows)) + 1]
+        group_sizes = np.diff(np.r_[group_start, len(sorted_rows)])
+        rank = np.arange(len(sorted_rows)) - np.repeat(group_start, group_sizes)
+        titles = sorted_rows[group_start]
+        available = np.array([store.stock_of(row) for row in titles], dtype=np.int64)
+        served = rank < np.repeat(available, group_sizes)
+
+        quantities = np.minimum(group_sizes, available)
+        store.apply_sales(titles, quantities)
+        for row, quantity in zip(titles.tolist(), quantities.tolist()):
+            if quantity:
+                sold[row] = sold.get(row, 0) + quantity
+
+        bumped = np.sort(buying[order[~served]])
+        pending_types = pending_types[bumped]
+        pending_values = pending_values[bumped]
+
+    rows = np.fromiter(sold.keys(), dtype=np.int64, count=len(sold))
+    quantities = np.fromiter(sold.values(), dtype=np.int64, count=len(sold))
+    return rows, quantities
@@ -0,0 +1,174 @@
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from seasonal import METRICS_MODE, SOLVER_MODE
+
+# Cost terms (lower is better)
+AFFORDABLE_PRICE = 8.0
+HIGH_RATING = 4.5
+AUTHOR_BONUS = 50          # per distinct author in the plan
+MIN_AUTHORS = 20
+AUTHOR_SHORTFALL = 200     # per author below MIN_AUTHORS
+UNDERFILL_RATIO = 0.8
+UNDERFILL_PENALTY = 10     # per unit of unused capacity when below UNDERFILL_RATIO
+
+# Preference score inputs (construction order of the restock solvers)
+POPULAR_GENRES = ("Fiction", "Mystery", "Romance", "Fantasy")
+POPULAR_AUTHOR_ROWS = 1000  # authors of the first rows of the catalog count as popular
+
+# Stock-independent features kept per catalog, for this many candidate sets
+FEATURE_CACHE_SIZE = 4
+
+
+def unit_cost(price, rating, seasonal_matches, current_stock) -> float:
+    """Cost contribution of one restocked copy of a book."""
+    cost = -100.0 if price <= AFFORDABLE_PRICE else (price - AFFORDABLE_PRICE) * 20
+    if rating >= HIGH_RATING:
+        cost -= rating * 30
+    cost -= seasonal_matches * 20
+    if current_stock < 3:
+        cost -= 50
+    elif current_stock > 30:
+        cost += 40
+    return cost
+
+
+def unit_costs(price, rating, seasonal_matches, current_stock) -> np.ndarray:
+    """unit_cost over parallel arrays (same operations, so the same floats)."""
+    cost = np.where(price <= AFFORDABLE_PRICE, -100.0, (price - AFFORDABLE_PRICE) * 20)
+    cost = np.where(rating >= HIGH_RATING, cost - rating * 30, cost)
+    cost = cost - seasonal_matches * 20
+    return cost + np.select([current_stock < 3, current_stock > 30], [-50, 40], 0)
+
+
+@dataclass(frozen=True)
+class FeatureTable:
+    """
+    Per-candidate features of one restock problem, as parallel arrays.
+
+    Index i describes candidate i (catalog row rows[i]). author holds dense
+    codes local to the table, so distinct authors of a plan are counted
+    with one reduceat over author_order. Built once per restock and shared
+    read-only by every solver (and pickled to worker processes).
+
+    Everything but stock and unit_costs depends only on the catalog, the
+    candidates and the month, so build reuses those arrays for a candidate
+    set it has seen (forks of a store offer the same candidates).
+    """
+    rows: np.ndarray
+    price: np.ndarray
+    rating: np.ndarray
+    seasonal: np.ndarray      # keyword matches for the month (SOLVER_MODE)
+    seasonal_seed: np.ndarray # matches any keyword of the month (METRICS_MODE)
+    stock: np.ndarray         # copies currently in stock
+    author: np.ndarray
+    author_order: np.ndarray
+    author_starts: np.ndarray
+    unit_costs: np.ndarray
+    preference: np.ndarray
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def affordable(self) -> np.ndarray:
+        return self.price <= AFFORDABLE_PRICE
+
+    @property
+    def good(self) -> np.ndarray:
+        """Affordable and highly rated."""
+        return self.affordable & (self.rating >= HIGH_RATING)
+
+    @property
+    def author_count(self) -> int:
+        return len(self.author_starts)
+
+    @classmethod
+    def build(cls, store, rows, month) -> "FeatureTable":
+        """Features of catalog rows for a restock of store in month (1-12)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        static = _static_features(store.inventory.catalog, rows, month)
+        quantities = store.stock_vector.quantities
+        stock = np.zeros(len(rows), dtype=np.int64)
+        held = rows < len(quantities)
+        stock[held] = quantities[rows[held]]
+        return cls(stock=stock, unit_costs=unit_costs(static['price'], static['rating'], static['seasonal'], stock),
+                   **static)
+
+
+_static_cache = weakref.WeakKeyDictionary()  # catalog -> OrderedDict of static features, LRU
+_static_lock = threading.Lock()
+
+
+def _static_features(catalog, rows, month) -> dict:
+    """The stock-independent FeatureTable fields, cached per catalog by candidate set."""
+    # Catalog rows never change once appended; its length covers new popular authors/genres
+    key = (month, len(catalog), hashlib.blake2b(rows.tobytes(), digest_size=16).digest())
+    with _static_lock:
+        cache = _static_cache.setdefault(catalog, OrderedDict())
+        static = cache.get(key)
+        if static is not None:
+            cache.move_to_end(key)
+            return static
+
+    price = catalog.price[rows]
+    rating = catalog.rating[rows]
+    seasonal = catalog.seasonal(SOLVER_MODE).month_counts(month)[rows].astype(np.int64)
+    seasonal_seed = catalog.seasonal(METRICS_MODE).month_matches(month)[rows]
+
+    author_codes = catalog.author_code[rows]
+    _, author = np.unique(author_codes, return_inverse=True)
+    author_order = np.argsort(author, kind="stable")
+    if len(rows):
+        author_starts = np.concatenate(([0], np.flatnonzero(np.diff(author[author_order])) + 1))
+    else:
+        author_starts = np.zeros(0, dtype=np.int64)
+
+    popular_author = np.isin(author_codes, catalog.author_code[:POPULAR_AUTHOR_ROWS])
+    popular_genre = np.isin(catalog.genre_code[rows],
+                            [code for code in map(catalog.genres.find, POPULAR_GENRES) if code >= 0])
+    preference = (0.33 * rating * 20 + 0.33 * 100 * (price <= AFFORDABLE_PRICE)
+                  + 0.05 * 100 * popular_author + 0.05 * 100 * popular_genre)
+
+    static = dict(rows=rows.copy(), price=price, rating=rating, seasonal=seasonal, seasonal_seed=seasonal_seed,
+                  author=author.astype(np.int64), author_order=author_order, author_starts=author_starts,
+                  preference=preference)
+    # Shared by every table built from this entry
+    for array in static.values():
+        array.setflags(write=False)
+    with _static_lock:
+        cache[key] = static
+        while len(cache) > FEATURE_CACHE_SIZE:
+            cache.popitem(last=False)
+    return static
+
+
+def cost_matrix(features: FeatureTable, quantities, capacity) -> np.ndarray:
+    """
+    Cost of every plan in a plans x candidates quantity matrix.
+
+    The same objective as alt_solver.RestockState.cost: linear unit costs,
+    an author diversity bonus and shortfall penalty, an underfill penalty,
+    and inf for plans over capacity.
+    """
+    quantities = np.atleast_2d(quantities)
+    linear = quantities @ features.unit_costs
+    total = quantities.sum(axis=1)
+    if features.author_count:
+        present = (quantities > 0)[:, features.author_order]
+        authors = np.logical_or.reduceat(present, features.author_starts, axis=1).sum(axis=1)
+    else:
+        authors = np.zeros(len(quantities), dtype=np.int64)
+    cost = linear - AUTHOR_BONUS * authors + AUTHOR_SHORTFALL * np.maximum(0, MIN_AUTHORS - authors)
+    cost = cost + np.where(total < capacity * UNDERFILL_RATIO, (capacity - total) * UNDERFILL_PENALTY, 0)
+    return np.where(total > capacity, np.inf, cost)
+
+
+def cost_vector(features: FeatureTable, quantities, capacity) -> float:
+    """Cost of one plan given as a quantity per candidate."""
+    return float(cost_matrix(features, quantities, capacity)[0])
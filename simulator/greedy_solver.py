@@ -0,0 +1,162 @@
+import heapq
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from features import (AUTHOR_BONUS, AUTHOR_SHORTFALL, MIN_AUTHORS, UNDERFILL_RATIO, FeatureTable,
+                      cost_vector)
+from inventory import Book
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class GreedyConfig:
+    """
+    Greedy restock settings.
+
+    A title takes at most max_quantity copies, and each further copy is
+    ranked at decay times the value of the one before (diminishing
+    returns), which spreads capacity over more titles.
+    """
+    max_quantity: int = 20
+    decay: float = 0.97
+
+
+@dataclass(frozen=True)
+class GreedyResult:
+    """A greedy plan (quantity per candidate), its cost and a lower bound on the optimum."""
+    quantities: np.ndarray
+    cost: float
+    bound: float
+
+    @property
+    def gap(self) -> float:
+        """Relative distance of cost from the bound (0 means provably optimal)."""
+        if self.cost == self.bound:
+            return 0.0
+        return (self.cost - self.bound) / max(abs(self.bound), 1.0)
+
+
+def cost_bound(features: FeatureTable, capacity, max_quantity) -> float:
+    """
+    Lower bound on the cost of any plan with at most max_quantity copies per title.
+
+    Relaxation: every title offers max_quantity units worth its negated
+    unit cost, and every author one extra unit worth its best title plus
+    AUTHOR_BONUS (standing in for the copy that brings the author in); a
+    plan's value is at most that of the capacity best units.
+    Penalties are dropped (they only add cost).
+    """
+    value = -features.unit_costs
+    if not len(value) or capacity <= 0:
+        return 0.0
+    best_by_author = np.maximum.reduceat(value[features.author_order], features.author_starts)
+    values = np.concatenate([value, best_by_author + AUTHOR_BONUS])
+    counts = np.concatenate([np.full(len(value), max_quantity), np.ones(len(best_by_author), dtype=np.int64)])
+    keep = values > 0
+    values, counts = values[keep], counts[keep]
+    if len(values) > capacity:  # every unit counts at least once, so the capacity best items suffice
+        top = np.argpartition(-values, capacity - 1)[:capacity]
+        values, counts = values[top], counts[top]
+    order = np.argsort(-values, kind="stable")
+    values, counts = values[order], counts[order]
+    taken = np.minimum(counts, np.maximum(0, capacity - (np.cumsum(counts) - counts)))
+    return -float(values @ taken)
+
+
+def _value_order(unit_costs, count) -> list:
+    """
+    Indexes of the count cheapest candidates (all of them when count >= len),
+    cheapest first, ties by index: always a prefix of the full stable
+    argsort, so greedy_plan can switch to the full order mid-walk.
+    """
+    if 0 < count < len(unit_costs):
+        kth = np.partition(unit_costs, count - 1)[count - 1]
+        below = np.flatnonzero(unit_costs < kth)
+        # Of the candidates tied at the cut, the lowest indexes come first in the full order
+        tied = np.flatnonzero(unit_costs == kth)[:count - len(below)]
+        top = np.concatenate([below, tied])
+        return top[np.lexsort((top, unit_costs[top]))].tolist()
+    return np.argsort(unit_costs, kind="stable").tolist()
+
+
+def greedy_plan(features: FeatureTable, capacity, config: Optional[GreedyConfig] = None) -> GreedyResult:
+    """
+    Fill capacity one copy at a time, always taking the copy with the
+    largest marginal gain (lazy greedy over a heap).
+
+    The gain of a copy is its negated unit cost (times decay per copy
+    already taken, when positive), plus the author bonus and shortfall
+    relief for a title whose author is not yet in the plan. Gains only
+    fall as the plan grows, so titles enter the heap in value order, only
+    once they could beat its top, and a popped title whose gain has
+    dropped is pushed back. Stops at capacity, or when nothing gains and the plan is
+    past the underfill threshold.
+    """
+    config = config or GreedyConfig()
+    n = len(features)
+    value = (-features.unit_costs).tolist()
+    authors = features.author.tolist()
+    order = _value_order(features.unit_costs, 2 * capacity)
+    quantities = [0] * n
+    present = set()
+    decay = config.decay
+    threshold = capacity * UNDERFILL_RATIO
+
+    def author_gain():
+        return AUTHOR_BONUS + (AUTHOR_SHORTFALL if len(present) < MIN_AUTHORS else 0)
+
+    def gain(i):
+        qty = quantities[i]
+        g = value[i] * decay ** qty if value[i] > 0 else value[i]
+        if qty == 0 and authors[i] not in present:
+            g += author_gain()
+        return g
+
+    heap = []
+    next_title = 0
+    total = 0
+    while total < capacity:
+        # Titles not yet in the heap gain at most value + author_gain(), so
+        # they only need to enter once that could beat the top of the heap
+        while next_title < n and (not heap or -heap[0][0] < value[order[next_title]] + author_gain()):
+            i = order[next_title]
+            heapq.heappush(heap, (-gain(i), i))
+            next_title += 1
+            if next_title == len(order) < n:
+                order = _value_order(features.unit_costs, n)
+        if not heap:
+            break
+        stale, i = heapq.heappop(heap)
+        g = gain(i)
+        if g < -stale:
+            heapq.heappush(heap, (-g, i))
+            continue
+        if g <= 0 and total >= threshold:
+            break
+        quantities[i] += 1
+        present.add(authors[i])
+        total += 1
+        if quantities[i] < config.max_quantity:
+            heapq.heappush(heap, (-gain(i), i))
+
+    plan = np.array(quantities, dtype=np.int64)
+    return GreedyResult(quantities=plan, cost=cost_vector(features, plan, capacity),
+                        bound=cost_bound(features, capacity, config.max_quantity))
+
+
+def greedy_solve(store, books: List['Book'], remaining_capacity: int, current_date: datetime,
+                 config: Optional[GreedyConfig] = None) -> Tuple[List[Tuple['Book', int]], GreedyResult]:
+    """Deterministic greedy restock; returns (book, quantity) decisions and the GreedyResult."""
+    started = time.perf_counter()
+    features = FeatureTable.build(store, [book.row for book in books], current_date.month)
+    result = greedy_plan(features, remaining_capacity, config)
+    log.info(f"Greedy solver: cost {result.cost:.1f}, bound {result.bound:.1f} "
+             f"(gap {result.gap:.1%}) in {time.perf_counter() - started:.3f}s")
+    decisions = [(books[i], int(result.quantities[i])) for i in np.flatnonzero(result.quantities).tolist()]
+    return decisions, result
@@ -1,72 +1,96 @@
+import logging
+import numpy as np
 import pandas as pd
-import random
+from dataclasses import dataclass, field
 
-class Book:
-    def __init__(self, title, authors, genre, price, isbn, publication_date=None, average_rating=0.0, num_pages=0):
-        self.title = title
-        self.authors = authors
-        self.genre = genre
-        self.price = price
-        self.isbn = isbn
-        self.publication_date = publication_date
-        self.average_rating = average_rating
-        self.num_pages = num_pages
+from catalog import Book, Catalog
+from catalog_cache import cached_catalog
 
-    def __repr__(self):
-        return f"Book(title={self.title}, isbn={self.isbn})"
+log = logging.getLogger(__name__)
+
+# Every column is read as text; numeric parsing happens column-wise so that
+# bad values can be counted instead of aborting the whole load.
+CATALOG_COLUMNS = {
+    'title': str,
+    'authors': str,
+    'genre': str,
+    'price': str,
+    'isbn': str,
+    'publication_date': str,
+    'average_rating': str,
+    'num_pages': str,
+}
+
+
+@dataclass
+class IngestReport:
+    """Outcome of a catalog load: accepted rows and rejected rows per reason."""
+    loaded: int = 0
+    rejected: dict = field(default_factory=dict)
+
+    @property
+    def total_rejected(self) -> int:
+        return sum(self.rejected.values())
 
 
 class Inventory:
-    def __init__(self):
-        self.books = []
+    def __init__(self, catalog=None):
+        self.catalog = catalog if catalog is not None else Catalog()
+
+    @property
+    def books(self):
+        """All catalog books, as a read-only sequence of Book views."""
+        return self.catalog.books
 
     def add_book(self, book):
-        self.books.append(book)
+        if book.catalog is self.catalog:
+            return
+        row = self.catalog.append(
+            book.title, book.authors, book.genre, book.price, book.isbn,
+            book.publication_date, book.average_rating, book.num_pages
+        )
+        # The book becomes the catalog's view for the new row
+        self.catalog.adopt(book, row)
 
-    def load_from_dataset(self, filepath):
+    def load_from_dataset(self, filepath, use_cache=False, cache_dir=None):
         """
         Load books from a CSV dataset.
+
+        Rows are validated column-wise; rejected rows are counted per reason
+        in the returned IngestReport. A missing file or missing columns raise.
+        With use_cache=True the validated catalog is kept in a binary snapshot
+        next to the CSV (or in cache_dir) and reused until the CSV changes.
         """
-        import pandas as pd
-        try:
-            df = pd.read_csv(filepath)
-            for _, row in df.iterrows():
-                # Clean price by removing '£' and converting to float
-                price_str = str(row['price']).replace('£', '')
-                
-                if not is_valid_isbn(str(row['isbn'])):
-                    #print(f"Skipping invalid ISBN: {row['isbn']}")
-                    continue
-
-                book = Book(
-                    title=row['title'],
-                    authors=row['authors'],
-                    genre=row['genre'],
-                    price=float(price_str),
-                    isbn=str(row['isbn']),
-                    publication_date=row['publication_date'],
-                    average_rating=float(row['average_rating']),
-                    num_pages=int(row['num_pages'])
-                )
-                self.add_book(book)
-        except Exception as e:
-            print(f"Error loading dataset: {e}")
+        if use_cache and len(self.catalog) == 0:
+            self.catalog, meta = cached_catalog(filepath, build_catalog, cache_dir)
+            report = IngestReport(loaded=meta["loaded"], rejected=dict(meta["rejected"]))
+        else:
+            columns, report = read_catalog_csv(filepath)
+            self.catalog.extend(**columns)
+        self.ingest_report = report
+        log.info(f"Loaded {report.loaded} books from {filepath}"
+                 + (f", rejected {report.rejected}" if report.rejected else ""))
+        return report
 
     def find_book_by_title(self, title):
         """
-        Find a book by title.
+        Find a book by title. Exact matches win over case/whitespace variants.
         """
-        for book in self.books:
-            if book.title == title:
-                return book
-        return None
+        rows = self.catalog.rows_for_title(title)
+        return self.catalog.book(rows[0]) if rows else None
+
+    def find_books_by_title(self, title):
+        """All books whose normalized title matches."""
+        return self.catalog.books_at(self.catalog.rows_for_title(title))
+
+    def find_books_by_author(self, authors):
+        """All books with exactly this authors value."""
+        return self.catalog.books_at(self.catalog.rows_for_author(authors))
 
     def find_by_isbn(self, isbn: str) -> Book:
         """Find book by ISBN in inventory"""
-        for book in self.books:
-            if book.isbn == isbn:
-                return book
-        return None
+        row = self.catalog.row_for_isbn(isbn)
+        return self.catalog.book(row) if row >= 0 else None
 
     def list_inventory(self):
         """
@@ -82,6 +106,102 @@ class Inventory:
             )
 
 
+def read_catalog_csv(filepath):
+    """Read and validate a catalog CSV, returning (columns, IngestReport)."""
+    df = pd.read_csv(filepath, usecols=list(CATALOG_COLUMNS), dtype=CATALOG_COLUMNS,
+                     keep_default_na=False, na_values=[""])
+    return clean_catalog_frame(df)
+
+
+def build_catalog(filepath):
+    """Read a catalog CSV into a new Catalog, returning (catalog, IngestReport)."""
+    columns, report = read_catalog_csv(filepath)
+    catalog = Catalog(capacity=report.loaded)
+    catalog.extend(**columns)
+    return catalog, report
+
+
+def clean_catalog_frame(df):
+    """
+    Validate and type a raw catalog frame.
+
+    Returns the catalog columns for the accepted rows (ready for
+    Catalog.extend) and an IngestReport. Each rejected row is counted once,
+    under the first check it fails.
+    """
+    title = df['title']
+    price = pd.to_numeric(df['price'].str.replace('£', '', regex=False).str.strip(), errors='coerce')
+    rating = pd.to_numeric(df['average_rating'], errors='coerce')
+    pages = pd.to_numeric(df['num_pages'], errors='coerce')
+
+    checks = [
+        ('missing_title', title.isna().to_numpy()),
+        ('missing_isbn', df['isbn'].isna().to_numpy()),
+        ('invalid_isbn', ~valid_isbn_mask(df['isbn'])),
+        ('invalid_price', price.isna().to_numpy()),
+        ('invalid_rating', rating.isna().to_numpy()),
+        ('invalid_num_pages', (pages.isna() | (pages % 1 != 0)).to_numpy()),
+    ]
+    keep = np.ones(len(df), dtype=bool)
+    report = IngestReport()
+    for reason, failed in checks:
+        failed = failed & keep
+        count = int(failed.sum())
+        if count:
+            report.rejected[reason] = count
+        keep &= ~failed
+    report.loaded = int(keep.sum())
+
+    # A missing publication date is None, as for Book and the catalog cache
+    publication_date = df['publication_date'].to_numpy(dtype=object, copy=True)
+    publication_date[df['publication_date'].isna().to_numpy()] = None
+
+    columns = {
+        'title': title.to_numpy(dtype=object)[keep],
+        'authors': df['authors'].fillna('').to_numpy(dtype=object)[keep],
+        'genre': df['genre'].fillna('Unknown').to_numpy(dtype=object)[keep],
+        'price': price.to_numpy(dtype=np.float64)[keep],
+        'isbn': df['isbn'].to_numpy(dtype=object)[keep],
+        'publication_date': publication_date[keep],
+        'average_rating': rating.to_numpy(dtype=np.float64)[keep],
+        'num_pages': pages.to_numpy(dtype=np.float64)[keep].astype(np.int32),
+    }
+    return columns, report
+
+
+def valid_isbn_mask(isbns) -> np.ndarray:
+    """
+    Vectorized is_valid_isbn: validate a whole column of ISBN-10/13 strings.
+    """
+    cleaned = (pd.Series(isbns, dtype=object).fillna('').astype(str)
+               .str.replace('-', '', regex=False).str.replace(' ', '', regex=False))
+    lengths = cleaned.str.len().to_numpy()
+    valid = np.zeros(len(cleaned), dtype=bool)
+
+    for length in (10, 13):
+        rows = np.flatnonzero(lengths == length)
+        if not len(rows):
+            continue
+        # Fixed-width unicode array viewed as code points, one row per ISBN
+        codes = np.array(cleaned.to_numpy()[rows], dtype=f'U{length}').view(np.uint32).reshape(-1, length)
+        digits = codes.astype(np.int64) - ord('0')
+        is_digit = (digits >= 0) & (digits <= 9)
+
+        if length == 13:
+            ok = is_digit.all(axis=1)
+            weights = np.tile([1, 3], 6)
+            total = (np.where(is_digit[:, :12], digits[:, :12], 0) * weights).sum(axis=1)
+            ok &= (10 - total % 10) % 10 == digits[:, 12]
+        else:
+            is_x = (codes[:, 9] == ord('X')) | (codes[:, 9] == ord('x'))
+            ok = is_digit[:, :9].all(axis=1) & (is_digit[:, 9] | is_x)
+            last = np.where(is_x, 10, digits[:, 9])
+            total = (np.where(is_digit[:, :9], digits[:, :9], 0) * np.arange(10, 1, -1)).sum(axis=1)
+            ok &= (total + last) % 11 == 0
+        valid[rows] = ok
+    return valid
+
+
 def is_valid_isbn(isbn):
     """
     Validate ISBN format. Accepts ISBN-10 and ISBN-13.
@@ -141,5 +261,5 @@ def is_valid_isbn(isbn):
 # Example usage
 if __name__ == "__main__":
     inventory = Inventory()
-    inventory.load_from_dataset("../data/catalog.csv")
+    inventory.load_from_dataset("../data/catalog.csv", use_cache=True)
     inventory.list_inventory()
@@ -1,31 +1,95 @@
 import os
 import random
+import numpy as np
 from datetime import datetime, timedelta
 from inventory import Inventory
 from store import Store
-from customer import Customer
+from customer import CustomerPopulation
+from demand import simulate_day
+from sales_log import SalesEventSink
 
-def log_sale(isbn, quantity, sale_date, log_filename):
-    with open(log_filename, "a") as log_file:
-        log_file.write(f"{sale_date.strftime('%Y-%m-%d')} - Sold ISBN: {isbn}, Quantity: {quantity}\n")
+# Average books sold per weekday (Monday = 0)
+AVG_DAILY_SALES = {0: 510, 1: 560, 2: 540, 3: 590, 4: 550, 5: 500, 6: 550}
 
-def log_revenue(day, daily_sold, daily_revenue, total_revenue, revenue_log_filename):
-    with open(revenue_log_filename, "a") as log_file:
-        log_file.write(f"Day {day}: Books Sold: {daily_sold}, Daily Revenue: £{daily_revenue:.2f}, Total Revenue: £{total_revenue:.2f}\n")
+def log_revenue(day, daily_sold, daily_revenue, total_revenue, revenue_log):
+    revenue_log.write(f"Day {day}: Books Sold: {daily_sold}, Daily Revenue: £{daily_revenue:.2f}, Total Revenue: £{total_revenue:.2f}\n")
 
-def simulate_sales(store, days, log_filename, revenue_log_filename, solver_type="basic"):
+def simulate_sales(store, days, log_filename, revenue_log_filename, solver_type="basic",
+                   demand_mode="sequential", seed=None, profile_mix=None,
+                   sales_log_format="text", background_logging=False,
+                   metrics_filename=None, verbose=True):
     """
     solver_type options:
     - "basic": use basic restock
     - "timefold": use timefold optimization
     - "alternative": use alternative solver (LAHC)
+    - "population": use the population (cross-entropy) solver
+    - "greedy": use the greedy solver (fast, reports an optimality bound)
+
+    demand_mode options:
+    - "sequential": serve customers one at a time
+    - "batched": draw and resolve each day's customers as NumPy arrays
+      (see demand.simulate_day)
+
+    seed seeds the day's generator (customer profiles, and the batched
+    demand); without it the seed comes from the random module.
+
+    profile_mix: a customer.ProfileMix with the daily preference shares
+
+    Sales go through a buffered sales_log.SalesEventSink: "text" (the
+    default) writes the classic per-sale lines, "binary" writes fixed-width
+    SALE_RECORD records (sales_log.export_text turns them into text), which
+    is much cheaper for long runs. background_logging moves the writes to a
+    writer thread.
+
+    log_filename / revenue_log_filename may be None to skip those logs.
+    Restock metrics go to metrics_filename, by default a timestamped file
+    next to the revenue log. verbose=False silences the daily printout.
+
+    Returns a summary dict: days, total_sold, total_revenue, daily_sold,
+    daily_revenue, daily_metrics (end-of-day Store.stock_metrics, before
+    any restock) and restock_metrics.
     """
+    catalog = store.inventory.catalog
+    sales_log = None
+    revenue_log = None
+    if revenue_log_filename is not None and metrics_filename is None:
+        metrics_filename = os.path.join(os.path.dirname(revenue_log_filename),
+                                        f"{int(datetime.now().timestamp())}_metrics.log")
+    try:
+        if log_filename is not None:
+            sales_log = SalesEventSink(log_filename, catalog, fmt=sales_log_format, background=background_logging)
+        if revenue_log_filename is not None:
+            revenue_log = open(revenue_log_filename, "a")
+        return _run_days(store, days, sales_log, revenue_log, metrics_filename, solver_type,
+                         demand_mode, seed, profile_mix, print if verbose else _silent)
+    finally:
+        if sales_log is not None:
+            sales_log.close()
+        if revenue_log is not None:
+            revenue_log.close()
+
+def _silent(*args):
+    pass
+
+def _run_days(store, days, sales_log, revenue_log, metrics_filename, solver_type,
+              demand_mode, seed, profile_mix, echo):
+    catalog = store.inventory.catalog
+    # Without a seed, draw it from the random module so random.seed() still
+    # makes the run reproducible (as for Store's generators)
+    rng = np.random.default_rng(seed if seed is not None else random.getrandbits(64))
     total_sold = 0
     total_revenue = 0.0
+    daily_sold_history = []
+    daily_revenue_history = []
+    daily_metrics = []
     current_date = datetime(2025, 1, 1)  # Set a fixed start date for simulation
 
-    avg_sbd = {0: 510, 1: 560, 2: 540, 3: 590, 4: 550, 5: 500, 6: 550}
+    avg_sbd = AVG_DAILY_SALES
     
+    # Catalog popularity statistics are computed once per run
+    population = CustomerPopulation(catalog, profile_mix)
+
     # Add metrics tracking
     restock_metrics = []
     
@@ -33,43 +97,56 @@ def simulate_sales(store, days, log_filename, revenue_log_filename, solver_type=
         day_of_week = current_date.weekday()
         ads = avg_sbd[day_of_week]
         
-        ds = int(random.gauss(ads, 20))
         daily_sold = 0
         daily_revenue = 0.0
-        print(f"Day {d} - {current_date.strftime('%Y-%m-%d')}")
+        echo(f"Day {d} - {current_date.strftime('%Y-%m-%d')}")
         
-        # Generate new customer profiles each day
-        customer_profiles = Customer.generate_customer_profiles(100, store)
-        
-        for _ in range(ds):
-            if store.stock:
-                customer = random.choice(customer_profiles)
-                book = customer.choose_book(store, current_date)
-                if book:
-                    quantity = 1
-                    sold_book = store.sell_book(book.title, quantity=quantity)
-                    if sold_book:
-                        log_sale(sold_book.isbn, quantity, current_date, log_filename)
-                        daily_sold += quantity
-                        daily_revenue += sold_book.price * quantity
-            else:
-                print("No more books available to sell.")
-                break
+        if demand_mode == "batched":
+            # The day's customer profiles, as compact arrays
+            type_codes, value_ids = population.generate(100, rng)
+            ds = max(0, int(rng.normal(ads, 20)))
+            rows, quantities = simulate_day(store, type_codes, value_ids, ds, current_date, rng,
+                                            population.mix.price_limit)
+            daily_sold = int(quantities.sum())
+            prices = catalog.price[rows]
+            daily_revenue = float((prices * quantities).sum())
+            if sales_log is not None:
+                sales_log.record(current_date, rows, quantities, prices)
+            if not store.stock:
+                echo("No more books available to sell.")
+        else:
+            # Generate new customer profiles each day
+            customer_profiles = population.customers(100, rng)
+            ds = int(random.gauss(ads, 20))
+            for _ in range(ds):
+                if store.stock:
+                    customer = random.choice(customer_profiles)
+                    book = customer.choose_book(store, current_date)
+                    if book:
+                        quantity = 1
+                        sold_book = store.sell_book(isbn=book.isbn, quantity=quantity)
+                        if sold_book:
+                            if sales_log is not None:
+                                sales_log.record_sale(current_date, sold_book.row, quantity, sold_book.price)
+                            daily_sold += quantity
+                            daily_revenue += sold_book.price * quantity
+                else:
+                    echo("No more books available to sell.")
+                    break
 
         total_sold += daily_sold
         total_revenue += daily_revenue
-        print(f"Total books sold today: {daily_sold}")
-        print(f"Total revenue today: £{daily_revenue:.2f}")
+        daily_sold_history.append(daily_sold)
+        daily_revenue_history.append(daily_revenue)
+        daily_metrics.append(store.stock_metrics(current_date))
+        echo(f"Total books sold today: {daily_sold}")
+        echo(f"Total revenue today: £{daily_revenue:.2f}")
         
-        log_revenue(d, daily_sold, daily_revenue, total_revenue, revenue_log_filename)
+        if revenue_log is not None:
+            log_revenue(d, daily_sold, daily_revenue, total_revenue, revenue_log)
         
         if d % 7 == 0:  # Restock every week
-            if solver_type == "alternative":
-                decisions, metrics = store.restock_alternative(current_date)
-            elif solver_type == "timefold":
-                decisions, metrics = store.restock_timefold_optimized(current_date)
-            else:
-                decisions, metrics = store.restock()
+            decisions, metrics = store.run_restock(solver_type, current_date)
             
             metrics['day'] = d
             restock_metrics.append(metrics)
@@ -79,24 +156,34 @@ def simulate_sales(store, days, log_filename, revenue_log_filename, solver_type=
     
     # Analysis at the end of simulation
     if restock_metrics:  # Now works for both basic and alternative
-        print(f"\n{solver_type.capitalize()} Solver Final Results:")
-        print("=======================================")
+        echo(f"\n{solver_type.capitalize()} Solver Final Results:")
+        echo("=======================================")
         
         # Only save raw metrics to file for later analysis
-        metrics_filename = os.path.join(log_folder, f"{int(datetime.now().timestamp())}_metrics.log")
-        with open(metrics_filename, 'w') as f:
-            for metric in restock_metrics:
-                f.write(f"Day {metric['day']}: {str(metric)}\n")
+        if metrics_filename is not None:
+            with open(metrics_filename, 'w') as f:
+                for metric in restock_metrics:
+                    f.write(f"Day {metric['day']}: {str(metric)}\n")
     
-    print(f"Total books sold over {days} days: {total_sold}")
-    print(f"Total revenue over {days} days: £{total_revenue:.2f}")
-    with open(revenue_log_filename, "a") as log_file:
-        log_file.write(f"Total books sold over {days} days: {total_sold}\n")
-        log_file.write(f"Total revenue over {days} days: £{total_revenue:.2f}\n")
+    echo(f"Total books sold over {days} days: {total_sold}")
+    echo(f"Total revenue over {days} days: £{total_revenue:.2f}")
+    if revenue_log is not None:
+        revenue_log.write(f"Total books sold over {days} days: {total_sold}\n")
+        revenue_log.write(f"Total revenue over {days} days: £{total_revenue:.2f}\n")
+
+    return {
+        'days': days,
+        'total_sold': total_sold,
+        'total_revenue': total_revenue,
+        'daily_sold': daily_sold_history,
+        'daily_revenue': daily_revenue_history,
+        'daily_metrics': daily_metrics,
+        'restock_metrics': restock_metrics,
+    }
 
 if __name__ == "__main__":
     inventory = Inventory()
-    inventory.load_from_dataset("../data/catalog.csv")
+    inventory.load_from_dataset("../data/catalog.csv", use_cache=True)
     store = Store(inventory, storage_capacity=3000)
     store.list_stock()
 
@@ -108,4 +195,5 @@ if __name__ == "__main__":
     # Run simulation with different solvers
     # simulate_sales(store, days=31, log_filename=log_filename, revenue_log_filename=revenue_log_filename, solver_type="basic")
     # simulate_sales(store, days=31, log_filename=log_filename, revenue_log_filename=revenue_log_filename, solver_type="timefold")
-    simulate_sales(store, days=31, log_filename=log_filename, revenue_log_filename=revenue_log_filename, solver_type="alternative")
\ No newline at end of file
+    simulate_sales(store, days=31, log_filename=log_filename, revenue_log_filename=revenue_log_filename, solver_type="alternative")
+    store.close()
@@ -0,0 +1,176 @@
+import argparse
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from inventory import Inventory
+from main import simulate_sales
+from seasonal import CUSTOMER_MODE, METRICS_MODE, SOLVER_MODE
+from store import Store
+
+log = logging.getLogger(__name__)
+
+# Two-sided 95% normal quantile for the confidence intervals
+Z_95 = 1.959963984540054
+
+# Per-restock metrics averaged into each replication's result
+RESTOCK_FIELDS = (
+    'restock_quantity',
+    'after_total',
+    'after_avg_rating',
+    'after_seasonal_matches',
+    'after_affordable_percentage',
+)
+
+# The catalog every worker simulates against. It is loaded once in the
+# parent and inherited through fork (copy-on-write, so the column arrays
+# are shared); without fork each worker loads the mmap'd catalog cache.
+_inventory = None
+
+
+@dataclass(frozen=True)
+class Replication:
+    solver_type: str
+    storage_capacity: int
+    replicate: int
+    seed: np.random.SeedSequence
+
+
+def _load_inventory(dataset):
+    inventory = Inventory()
+    inventory.load_from_dataset(dataset, use_cache=True)
+    catalog = inventory.catalog
+    # Build the lazily cached indexes up front so forked workers share them
+    for mode in (CUSTOMER_MODE, SOLVER_MODE, METRICS_MODE):
+        catalog.seasonal(mode)
+    return inventory
+
+
+def _init_worker(dataset, quiet):
+    global _inventory
+    if quiet:
+        logging.getLogger().setLevel(logging.WARNING)
+    if _inventory is None:
+        _inventory = _load_inventory(dataset)
+
+
+def run_replication(task, days, demand_mode="batched", log_dir=None):
+    """Run one simulate_sales replication in this process and summarise it."""
+    python_seed, numpy_seed = task.seed.spawn(2)
+    random.seed(int(python_seed.generate_state(1, np.uint64)[0]))
+    store = Store(_inventory, storage_capacity=task.storage_capacity)
+
+    log_filename = revenue_log_filename = None
+    if log_dir is not None:
+        stem = os.path.join(log_dir, f"{task.solver_type}_{task.storage_capacity}_{task.replicate}")
+        log_filename, revenue_log_filename = f"{stem}_sales.bin", f"{stem}_revenue.log"
+    summary = simulate_sales(store, days, log_filename, revenue_log_filename,
+                             solver_type=task.solver_type, demand_mode=demand_mode,
+                             seed=numpy_seed, sales_log_format="binary", verbose=False)
+
+    result = {
+        'solver_type': task.solver_type,
+        'storage_capacity': task.storage_capacity,
+        'replicate': task.replicate,
+        'total_sold': summary['total_sold'],
+        'total_revenue': summary['total_revenue'],
+    }
+    for field in RESTOCK_FIELDS:
+        values = [metric[field] for metric in summary['restock_metrics'] if field in metric]
+        result[f"mean_{field}"] = float(np.mean(values)) if values else math.nan
+    return result
+
+
+def _run_task(args):
+    return run_replication(*args)
+
+
+def replications(solver_types, capacities, count, seed=0):
+    """
+    Every (solver, capacity, replicate) task with its own seed stream.
+
+    Seeds are spawned from one SeedSequence in task order, so a run is
+    reproducible for a given seed and replicate i of every configuration
+    gets the same stream, i.e. the comparison uses common random numbers.
+    """
+    streams = np.random.SeedSequence(seed).spawn(count)
+    return [Replication(solver_type, capacity, i, streams[i])
+            for solver_type, capacity, i in itertools.product(solver_types, capacities, range(count))]
+
+
+def run_monte_carlo(dataset, solver_types=("basic",), capacities=(3000,), count=10, days=31,
+                    seed=0, demand_mode="batched", processes=None, log_dir=None, quiet=True):
+    """
+    Run count replications of every solver type and capacity across a
+    process pool and return one result dict per replication (see
+    summarize for the confidence intervals).
+    """
+    global _inventory
+    tasks = replications(solver_types, capacities, count, seed)
+    if log_dir is not None:
+        os.makedirs(log_dir, exist_ok=True)
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        _inventory = _load_inventory(dataset)
+    else:
+        context = multiprocessing.get_context("spawn")
+
+    log.info(f"Running {len(tasks)} replications on {processes or os.cpu_count()} processes")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context,
+                             initializer=_init_worker, initargs=(dataset, quiet)) as pool:
+        work = ((task, days, demand_mode, log_dir) for task in tasks)
+        return list(pool.map(_run_task, work))
+
+
+def confidence_interval(values, z=Z_95):
+    """Mean, sample standard deviation and normal-approximation CI of values."""
+    values = np.asarray([v for v in values if not math.isnan(v)], dtype=float)
+    n = len(values)
+    if n == 0:
+        return {'n': 0, 'mean': math.nan, 'std': math.nan, 'ci_low': math.nan, 'ci_high': math.nan}
+    mean = float(values.mean())
+    std = float(values.std(ddof=1)) if n > 1 else 0.0
+    half_width = z * std / math.sqrt(n)
+    return {'n': n, 'mean': mean, 'std': std, 'ci_low': mean - half_width, 'ci_high': mean + half_width}
+
+
+def summarize(results):
+    """Per (solver_type, storage_capacity): a confidence interval for every metric."""
+    groups = {}
+    for result in results:
+        groups.setdefault((result['solver_type'], result['storage_capacity']), []).append(result)
+
+    metrics = ['total_sold', 'total_revenue'] + [f"mean_{field}" for field in RESTOCK_FIELDS]
+    return {
+        key: {metric: confidence_interval([r[metric] for r in group]) for metric in metrics}
+        for key, group in groups.items()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo comparison of restock policies")
+    parser.add_argument("--dataset", default="../data/catalog.csv")
+    parser.add_argument("--solvers", nargs="+", default=["basic", "alternative"])
+    parser.add_argument("--capacities", nargs="+", type=int, default=[3000])
+    parser.add_argument("--replications", type=int, default=20)
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--log-dir", default=None)
+    args = parser.parse_args()
+
+    results = run_monte_carlo(args.dataset, args.solvers, args.capacities, args.replications,
+                              args.days, args.seed, processes=args.processes, log_dir=args.log_dir)
+    for (solver_type, capacity), metrics in summarize(results).items():
+        print(f"\n{solver_type} (capacity {capacity})")
+        for metric, ci in metrics.items():
+            print(f"  {metric}: {ci['mean']:.2f} ± {ci['mean'] - ci['ci_low']:.2f} "
+                  f"(std {ci['std']:.2f}, n={ci['n']})")
@@ -0,0 +1,64 @@
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+
+def candidate_signature(rows) -> str:
+    """Order-independent digest of a candidate row set."""
+    rows = np.sort(np.asarray(rows, dtype=np.int64))
+    return hashlib.blake2b(rows.tobytes(), digest_size=16).hexdigest()
+
+
+def remap_plan(plan: dict, rows) -> dict:
+    """
+    Carry a plan (catalog row -> quantity) over to a candidate list.
+
+    Returns candidate index -> quantity for the rows that are still
+    candidates; the rest of the plan is dropped.
+    """
+    if not plan:
+        return {}
+    index = {row: i for i, row in enumerate(np.asarray(rows).tolist())}
+    return {index[row]: qty for row, qty in plan.items() if row in index and qty > 0}
+
+
+class PlanCache:
+    """
+    Recent restock plans, keyed by (month, capacity, candidate signature).
+
+    Plans map catalog row -> quantity and are treated as immutable. Holds
+    at most maxsize entries, evicting the least recently used.
+    """
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._plans = OrderedDict()
+
+    @staticmethod
+    def key(month, capacity, rows) -> tuple:
+        return month, capacity, candidate_signature(rows)
+
+    def get(self, key) -> Optional[dict]:
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+        return plan
+
+    def put(self, key, plan: dict):
+        self._plans[key] = plan
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.maxsize:
+            self._plans.popitem(last=False)
+
+    def copy(self) -> "PlanCache":
+        cache = PlanCache(self.maxsize)
+        cache._plans = self._plans.copy()
+        return cache
+
+    def __len__(self):
+        return len(self._plans)
+
+    def __contains__(self, key):
+        return key in self._plans
@@ -0,0 +1,115 @@
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from alt_solver import build_problem, initial_plan
+from plan_cache import remap_plan
+from features import cost_matrix
+from inventory import Book
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PopulationConfig:
+    """
+    Cross-entropy search settings.
+
+    Every generation samples population plans, keeps the elite_fraction
+    cheapest and moves the sampling distribution smoothing of the way
+    towards them. Stops after generations, or earlier when time_budget
+    seconds have passed or the best plan has not improved for patience
+    generations.
+    """
+    population: int = 128
+    elite_fraction: float = 0.1
+    generations: int = 80
+    smoothing: float = 0.7
+    max_quantity: int = 20
+    time_budget: Optional[float] = None
+    patience: Optional[int] = 20
+
+
+def sample_plans(rng, include_p, mean_qty, count, max_quantity, capacity) -> np.ndarray:
+    """
+    Draw count plans (a plans x candidates quantity matrix).
+
+    Candidate i is included with probability include_p[i] and gets a
+    Poisson quantity around mean_qty[i] (at least 1, at most
+    max_quantity). Plans over capacity are scaled down to fit.
+    """
+    n = len(include_p)
+    # Work on the (sparse) included entries only: draw, cap and scale them,
+    # then scatter into the matrix
+    plan_index, candidate = np.nonzero(rng.random((count, n), dtype=np.float32) < include_p)
+    quantities = np.minimum(rng.poisson(np.maximum(mean_qty[candidate] - 1, 0)) + 1, max_quantity)
+    total = np.bincount(plan_index, weights=quantities, minlength=count)
+    scale = np.minimum(1.0, capacity / np.maximum(total, 1))
+    plans = np.zeros((count, n), dtype=np.int32)
+    plans[plan_index, candidate] = np.floor(quantities * scale[plan_index])
+    return plans
+
+
+def population_solve(store, books: List['Book'], remaining_capacity: int, current_date: datetime,
+                     config: Optional[PopulationConfig] = None, warm_start: Optional[dict] = None) -> List[Tuple['Book', int]]:
+    """
+    Cross-entropy restock solver scoring whole populations of plans at once.
+
+    The sampling distribution (an inclusion probability and a mean quantity
+    per candidate) starts around the alt_solver greedy plan, which also
+    joins the first generation. Each generation is scored in one
+    features.cost_matrix call; the best plan seen is returned as
+    (book, quantity) decisions. Draws from store.rng. warm_start (an
+    earlier plan, catalog row -> quantity) is folded into the greedy plan.
+    """
+    started = time.perf_counter()
+    config = config or PopulationConfig()
+    rng = store.rng
+    problem = build_problem(store, books, remaining_capacity, current_date)
+    features = problem.features
+    n = len(features)
+    if n == 0 or remaining_capacity <= 0:
+        return []
+
+    seed = np.zeros(n, dtype=np.int64)
+    start = remap_plan(warm_start, features.rows) if warm_start else None
+    for i, qty in initial_plan(problem, store.random, start).items():
+        seed[i] = qty
+    # Start around the greedy plan, leaving every candidate some chance
+    base_p = min(0.5, remaining_capacity / (config.max_quantity * n))
+    include_p = np.where(seed > 0, 0.9, base_p)
+    mean_qty = np.where(seed > 0, seed, config.max_quantity / 2).astype(np.float64)
+
+    elites = max(1, int(config.population * config.elite_fraction))
+    best_plan = seed
+    best_cost = float(cost_matrix(features, seed, remaining_capacity)[0])
+    generations = 0
+    improved_at = 0
+    while generations < config.generations:
+        if config.time_budget is not None and time.perf_counter() - started >= config.time_budget:
+            break
+        if config.patience is not None and generations - improved_at >= config.patience:
+            break
+        generations += 1
+        plans = sample_plans(rng, include_p, mean_qty, config.population, config.max_quantity, remaining_capacity)
+        plans[0] = best_plan  # elitism: the best plan so far stays in the population
+        costs = cost_matrix(features, plans, remaining_capacity)
+        elite = plans[np.argpartition(costs, elites - 1)[:elites]]
+        winner = int(np.argmin(costs))
+        if costs[winner] < best_cost:
+            best_plan, best_cost = plans[winner].copy(), float(costs[winner])
+            improved_at = generations
+
+        chosen = elite > 0
+        chosen_count = chosen.sum(axis=0)
+        include_p = (1 - config.smoothing) * include_p + config.smoothing * chosen_count / elites
+        elite_mean = np.divide(elite.sum(axis=0), chosen_count, out=mean_qty.copy(), where=chosen_count > 0)
+        mean_qty = (1 - config.smoothing) * mean_qty + config.smoothing * elite_mean
+
+    log.info(f"Population solver: cost {best_cost:.1f} after {generations} generations "
+             f"in {time.perf_counter() - started:.2f}s")
+    return [(books[i], int(best_plan[i])) for i in np.flatnonzero(best_plan).tolist()]
@@ -0,0 +1,177 @@
+import heapq
+import random
+
+from seasonal import CUSTOMER_MODE
+
+# Thresholds customers use when choosing by rating / price
+HIGH_RATING = 4.5
+CHEAP_PRICE = 8.0
+
+
+class SamplingPool:
+    """Set of catalog row ids with O(1) add, remove and uniform random sampling."""
+
+    def __init__(self):
+        self._rows = []
+        self._pos = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, row):
+        return row in self._pos
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def add(self, row):
+        if row not in self._pos:
+            self._pos[row] = len(self._rows)
+            self._rows.append(row)
+
+    def remove(self, row):
+        pos = self._pos.pop(row, None)
+        if pos is None:
+            return
+        last = self._rows.pop()
+        if pos < len(self._rows):
+            # Move the last row into the freed slot
+            self._rows[pos] = last
+            self._pos[last] = pos
+
+    def sample(self, rng=random):
+        return self._rows[rng.randrange(len(self._rows))]
+
+
+class PricePool(SamplingPool):
+    """SamplingPool that also answers cheapest-row queries in O(log n)."""
+
+    def __init__(self, catalog):
+        super().__init__()
+        self._catalog = catalog
+        self._heap = []
+
+    def add(self, row):
+        if row not in self._pos:
+            super().add(row)
+            heapq.heappush(self._heap, (float(self._catalog.price[row]), row))
+
+    def remove(self, row):
+        super().remove(row)
+        # Heap entries are dropped lazily; rebuild when mostly stale
+        if len(self._heap) > 2 * len(self._rows) + 16:
+            prices = self._catalog.price
+            self._heap = [(float(prices[r]), r) for r in self._rows]
+            heapq.heapify(self._heap)
+
+    def cheapest(self, limit=None):
+        """Cheapest row, or None when the pool is empty or it costs more than limit."""
+        heap = self._heap
+        while heap:
+            price, row = heap[0]
+            if row in self._pos:
+                return row if limit is None or price <= limit else None
+            heapq.heappop(heap)
+        return None
+
+
+class PreferencePools:
+    """
+    Candidate pools for each customer preference, kept in sync with stock.
+
+    Store calls add/remove when a title enters or leaves stock, so a customer
+    decision is a pool lookup instead of a scan over every stocked book.
+    Seasonal pools are kept for all twelve months using the catalog's
+    precomputed CUSTOMER_MODE month mask. The price pools hold every stocked
+    title, so price-driven customers can apply their own limit via cheapest().
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.by_author = {}
+        self.by_genre = {}
+        self.seasonal_by_genre = {}
+        self.high_rated = SamplingPool()
+        self.seasonal_high_rated = [SamplingPool() for _ in range(12)]
+        self.by_price = PricePool(catalog)
+        self.seasonal_by_price = [PricePool(catalog) for _ in range(12)]
+        self.good = SamplingPool()  # cheap and high rated
+        self.seasonal_good = [SamplingPool() for _ in range(12)]
+        self._author_matches = {}
+
+    def _months(self, row):
+        mask = int(self.catalog.seasonal(CUSTOMER_MODE).mask[row])
+        return [month for month in range(12) if mask >> month & 1]
+
+    def _features(self, row):
+        rating = self.catalog.rating[row]
+        price = self.catalog.price[row]
+        return rating >= HIGH_RATING, price <= CHEAP_PRICE
+
+    def add(self, row):
+        author = int(self.catalog.author_code[row])
+        genre = int(self.catalog.genre_code[row])
+        high_rated, cheap = self._features(row)
+        self.by_author.setdefault(author, SamplingPool()).add(row)
+        self.by_genre.setdefault(genre, SamplingPool()).add(row)
+        if high_rated:
+            self.high_rated.add(row)
+        self.by_price.add(row)
+        if high_rated and cheap:
+            self.good.add(row)
+        for month in self._months(row):
+            self.seasonal_by_genre.setdefault((month, genre), SamplingPool()).add(row)
+            if high_rated:
+                self.seasonal_high_rated[month].add(row)
+            self.seasonal_by_price[month].add(row)
+            if high_rated and cheap:
+                self.seasonal_good[month].add(row)
+
+    def remove(self, row):
+        author = int(self.catalog.author_code[row])
+        genre = int(self.catalog.genre_code[row])
+        for pools, key in ((self.by_author, author), (self.by_genre, genre)):
+            pool = pools.get(key)
+            if pool is not None:
+                pool.remove(row)
+                if not pool:
+                    del pools[key]
+        self.high_rated.remove(row)
+        self.by_price.remove(row)
+        self.good.remove(row)
+        for month in self._months(row):
+            pool = self.seasonal_by_genre.get((month, genre))
+            if pool is not None:
+                pool.remove(row)
+                if not pool:
+                    del self.seasonal_by_genre[(month, genre)]
+            self.seasonal_high_rated[month].remove(row)
+            self.seasonal_by_price[month].remove(row)
+            self.seasonal_good[month].remove(row)
+
+    def author_pools(self, name) -> list:
+        """Non-empty pools of every author whose name contains name (substring, as before)."""
+        known_authors, codes = self._author_matches.get(name, (-1, None))
+        if known_authors != len(self.catalog.authors):
+            codes = [code for code, authors in enumerate(self.catalog.authors) if name in authors]
+            self._author_matches[name] = (len(self.catalog.authors), codes)
+        return [self.by_author[code] for code in codes if code in self.by_author]
+
+    def genre_pool(self, genre, month=None):
+        """Pool for a genre, or its seasonal subset when month (1-12) is given."""
+        code = self.catalog.genres.find(genre)
+        if month is None:
+            return self.by_genre.get(code)
+        return self.seasonal_by_genre.get((month - 1, code))
+
+
+def sample_pools(pools, rng=random):
+    """Uniform sample over the union of disjoint pools."""
+    total = sum(len(pool) for pool in pools)
+    if not total:
+        return None
+    pick = rng.randrange(total)
+    for pool in pools:
+        if pick < len(pool):
+            return pool._rows[pick]
+        pick -= len(pool)
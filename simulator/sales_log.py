@@ -0,0 +1,150 @@
+import queue
+import threading
+from datetime import date, datetime
+
+import numpy as np
+
+# One fixed-width record per sale event: date (proleptic ordinal), catalog
+# row id, quantity and unit price. Files are raw little-endian records, so
+# np.fromfile(path, dtype=SALE_RECORD) reads them back.
+SALE_RECORD = np.dtype([
+    ("day", "<u4"),
+    ("row", "<u4"),
+    ("quantity", "<u2"),
+    ("price", "<f4"),
+])
+
+
+def _ordinal(day) -> int:
+    return day.toordinal() if isinstance(day, (date, datetime)) else int(day)
+
+
+def _format_text(records, isbns) -> str:
+    dates = {}
+    lines = []
+    for day, row, quantity in zip(records["day"].tolist(), records["row"].tolist(), records["quantity"].tolist()):
+        label = dates.get(day)
+        if label is None:
+            label = dates[day] = date.fromordinal(day).strftime('%Y-%m-%d')
+        lines.append(f"{label} - Sold ISBN: {isbns[row]}, Quantity: {quantity}\n")
+    return "".join(lines)
+
+
+class SalesEventSink:
+    """
+    Buffered sales event log.
+
+    Events are collected in a preallocated record array and written in
+    batches of buffer_size records, through a single open file handle.
+    With background=True the writes happen on a writer thread so the
+    simulation does not wait on disk.
+
+    fmt="binary" writes SALE_RECORD records; fmt="text" writes the classic
+    "YYYY-MM-DD - Sold ISBN: ..., Quantity: n" lines (needs the catalog).
+    Use as a context manager, or call close() to flush the tail.
+    """
+
+    def __init__(self, path, catalog=None, fmt="binary", buffer_size=65536, background=False):
+        if fmt not in ("binary", "text"):
+            raise ValueError(f"Unknown sales log format: {fmt}")
+        if fmt == "text" and catalog is None:
+            raise ValueError("The text format needs the catalog to resolve ISBNs")
+        self.path = path
+        self.catalog = catalog
+        self.fmt = fmt
+        self._buffer = np.empty(buffer_size, dtype=SALE_RECORD)
+        self._size = 0
+        self._file = open(path, "ab" if fmt == "binary" else "a")
+        self._queue = None
+        self._writer = None
+        self._error = None
+        if background:
+            self._queue = queue.Queue(maxsize=8)
+            self._writer = threading.Thread(target=self._drain, name="sales-log-writer", daemon=True)
+            self._writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record_sale(self, day, row, quantity, price):
+        """Buffer a single sale."""
+        if self._size == len(self._buffer):
+            self.flush()
+        record = self._buffer[self._size]
+        record["day"] = _ordinal(day)
+        record["row"] = row
+        record["quantity"] = quantity
+        record["price"] = price
+        self._size += 1
+
+    def record(self, day, rows, quantities, prices):
+        """Buffer a batch of sales on one day given as parallel arrays."""
+        rows = np.asarray(rows)
+        start = 0
+        while start < len(rows):
+            if self._size == len(self._buffer):
+                self.flush()
+            stop = min(len(rows), start + len(self._buffer) - self._size)
+            chunk = self._buffer[self._size:self._size + stop - start]
+            chunk["day"] = _ordinal(day)
+            chunk["row"] = rows[start:stop]
+            chunk["quantity"] = np.asarray(quantities)[start:stop]
+            chunk["price"] = np.asarray(prices)[start:stop]
+            self._size += stop - start
+            start = stop
+
+    def flush(self):
+        """Hand the buffered records to the writer (or write them now)."""
+        if not self._size:
+            return
+        records = self._buffer[:self._size].copy()
+        self._size = 0
+        if self._queue is not None:
+            if self._error is not None:
+                raise self._error
+            self._queue.put(records)
+        else:
+            self._write(records)
+
+    def _write(self, records):
+        if self.fmt == "binary":
+            records.tofile(self._file)
+        else:
+            self._file.write(_format_text(records, self.catalog.isbn))
+        self._file.flush()
+
+    def _drain(self):
+        while True:
+            records = self._queue.get()
+            if records is None:
+                return
+            try:
+                self._write(records)
+            except Exception as e:
+                self._error = e
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+        self._file.close()
+        if self._error is not None:
+            raise self._error
+
+
+def read_sales(path) -> np.ndarray:
+    """Read a binary sales log into a SALE_RECORD array."""
+    return np.fromfile(path, dtype=SALE_RECORD)
+
+
+def export_text(path, text_path, catalog):
+    """Convert a binary sales log into the classic text format."""
+    records = read_sales(path)
+    with open(text_path, "w") as f:
+        f.write(_format_text(records, catalog.isbn))
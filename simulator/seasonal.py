@@ -0,0 +1,243 @@
+import re
+import numpy as np
+from dataclasses import dataclass
+
+SEASONAL_KEYWORDS = {
+    1: [
+        "Habits", "Motivation", "Resolutions", "Change", "Clear", "Sincero", "Kiyosaki",
+        "Mindset", "Goals", "Minimalism", "Atomic", "Power", "Purpose", "Clarity",
+        "Growth", "Robbins", "Success", "Wealth", "Focus", "Planning", "Determination",
+        "Energy", "New", "Start", "Beginnings", "Discipline", "Achievement", "Strategy",
+        "Vision", "Optimism", "Renewal", "Career", "Dreams", "Balance", "Reinvention",
+        "Resolve", "Practice", "Choices", "Wellness", "Health", "Challenge", "Routine",
+        "Self", "Discovery", "Inner", "Strength", "Clarity", "Progress", "Foundations",
+        "Building", "Empower", "Reboot", "Goals", "Clear"
+    ],
+    2: [
+        "Love", "Romance", "Sparks", "Austen", "Brontë", "Hearts", "Cupid", "Pride",
+        "Prejudice", "Outlander", "Passion", "Valentine", "Affection", "Jane", "Darcy",
+        "Wedding", "Relationships", "Sweet", "Nicholas", "Tenderness", "Crush", "Roses",
+        "Letters", "Poetry", "Emotions", "Yearning", "Longing", "Forever", "Destiny",
+        "Devotion", "Admire", "Cherish", "Couples", "Amour", "Connection", "Sentiments",
+        "Romance", "Roses", "Charm", "Charming", "Elegant", "Couples", "Darling",
+        "Kisses", "Flirt", "Attraction", "Sweetheart", "Candlelight", "Darling",
+        "Wistful", "Endearing", "Magnetic", "Swoon"
+    ],
+    3: [
+        "Spring", "Growth", "Green", "Empowerment", "Feminism", "Angelou", "Blossoms",
+        "Change", "Equality", "Renewal", "Women", "Sheryl", "Wollstonecraft", "Nature",
+        "Forest", "Awakening", "Maya", "Dreams", "Rights", "Courage", "Strength",
+        "Resilience", "Spirit", "Voice", "March", "Embrace", "Blossoming", "Equality",
+        "Reform", "Advocacy", "Leaders", "Unity", "Visionary", "Inspire", "Bloom",
+        "Roots", "Canopy", "Branches", "Petals", "Eco", "Seeds", "Rivers", "Sunshine",
+        "Morning", "New", "Fields", "Meadows", "Hope", "Rejuvenate", "Sheryl", "Bright",
+        "History", "Compassion", "Leader", "Fragrance"
+    ],
+    4: [
+        "Nature", "Tolkien", "Hobbit", "Garden", "Easter", "Middle-Earth", "Flowers",
+        "Rivers", "Trees", "Adventures", "Renewal", "Mystical", "Green", "Outdoor",
+        "Magic", "Bloom", "Spring", "Lore", "Wanderlust", "Fantasy", "Serenity",
+        "Wildlife", "Planting", "Wander", "Frodo", "Shire", "Trails", "Mountains",
+        "Quiet", "Peace", "Village", "Plant", "Blossom", "Rain", "Budding", "Hiking",
+        "Renewal", "Outdoor", "Woods", "Earth", "Sunshine", "Growth", "Gardens",
+        "Simplicity", "Nurture", "Landscapes", "Awaken", "Leaves", "Tolkien", "Fauna",
+        "Flora", "Cycles", "Meadow", "Fields"
+    ],
+    5: [
+        "Mother", "Family", "Gifting", "Home", "Domestic", "Cookbooks", "Recipes",
+        "Love", "Parenting", "Barbara", "Sisters", "Nurture", "Alcott", "Little",
+        "Women", "Warmth", "Care", "Comfort", "Kingsolver", "Traditions", "Memories",
+        "Heartfelt", "Generations", "Household", "Gathering", "Kindness", "Loyalty",
+        "Support", "Affection", "Mom", "Floral", "Motherhood", "Matriarch", "Love",
+        "Heritage", "Feminine", "Daughter", "Son", "Close", "Heirloom", "Memories",
+        "Tales", "Portrait", "Serenity", "Heartwarming", "Kitchen", "Dinner",
+        "Gathering", "Togetherness", "Bonds", "Warm", "Cooks", "Handwritten"
+    ],
+    6: [
+        "Pride", "Love", "Wilde", "LGBTQ+", "Freedom", "Equality", "Rainbow", "Summer",
+        "Romance", "Colorful", "Alice", "Heartstopper", "Bright", "Levithan", "Inclusion",
+        "Adventures", "Stories", "Joy", "Sunlight", "Bonds", "Allies", "Festivals", "Prideful",
+        "Bold", "Empower", "Celebration", "Courage", "Stories", "Awareness", "Creativity",
+        "Literature", "Identity", "Acceptance", "Friendship", "Discovery", "Humanity", "Brave",
+        "Storytelling", "Vibrant", "Bonds", "Authentic", "Expression", "Diversity", "Voice",
+        "Society", "Progress", "Liberation", "Sparkle", "Unique", "Spectrum", "Parade", "Euphoria"
+    ],
+    7: [
+        "Adventure", "King", "Thrillers", "Patterson", "Heat", "Island", "Sand", "Beach",
+        "Murder", "Crime", "Suspense", "Fire", "Danger", "Sun", "Mystery", "Clues", "Waves",
+        "Stephen", "Chase", "James", "Journey", "Summer", "Coast", "Detectives", "Dunes",
+        "Secrets", "Hidden", "Sea", "Oceans", "Heatwave", "Plot", "Intrigue", "Cryptic", "Twists",
+        "Breakout", "Sunset", "Island", "Quest", "Lagoon", "Obsession", "Mirage", "Ambush",
+        "Spy", "Intensity", "Tides", "Chills", "Fog", "Puzzles"
+    ],
+    8: [
+        "Education", "School", "Potter", "Rowling", "Magic", "Fantasy", "Students", "Library",
+        "Knowledge", "Spells", "Wands", "Hogwarts", "Children", "Youth", "Backpacks", "Lessons",
+        "Wisdom", "Reading", "Discover", "Secrets", "Textbooks", "Fiction", "Enigma", "Study",
+        "Triumph", "Dormitories", "Wizards", "Teachers", "Quidditch", "Potions", "Maps", "Tales",
+        "Fantastic", "Learning", "Pages", "Adventure", "Scholars", "Ladders", "Genius", "Inspiration",
+        "Stories", "Discovery", "Dreams", "Imagination", "History", "Writing", "Fantasy"
+    ],
+    9: [
+        "Classics", "Literature", "Orwell", "Fitzgerald", "Steinbeck", "College", "Reading",
+        "Study", "Gatsby", "Essays", "Culture", "Mice", "Hemingway", "Victorian", "Seminar",
+        "Discourse", "Renaissance", "Fiction", "Chapter", "Verse", "Legacy", "Knowledge",
+        "Classrooms", "Wisdom", "Libraries", "Timeless", "Heritage", "Canon", "Poetry", 
+        "Structure", "Reflection", "Analysis", "Prose", "Stories", "Timeless", "Study", "Booklist"
+    ],
+    10: [
+        "Halloween", "Horror", "Monsters", "Dracula", "Ghosts", "King", "Poe", "Shadows",
+        "Nightmares", "Darkness", "Frights", "Spooky", "Haunted", "Creepy", "Shelley",
+        "Witches", "Magic", "Thrills", "Vampires", "Fog", "Evil", "Paranormal", "Candles",
+        "Graveyard", "Midnight", "Sorcery", "Chills", "Howling", "Frights", "Screams",
+        "Mysterious", "Curse", "Phantom", "Cryptic", "Haze", "Terror", "Gothic", "Eerie"
+    ],
+    11: [
+        "Family", "Thanksgiving", "Harvest", "Dinner", "Gratitude", "Traditions", "Stories", 
+        "Feast", "Home", "Warmth", "Togetherness", "Closeness", "Gathering", "Kinship",
+        "Bonds", "Seasonal", "Table", "Nostalgia", "Cooking", "Kindness", "Support",
+        "Giving", "Celebration", "Unity", "Heartfelt", "Generations", "Heritage", "Recipes"
+    ],
+    12: [
+        "Christmas", "Magic", "Rowling", "Potter", "Cozy", "Snow", "Gifts", "Dickens", 
+        "Family", "Traditions", "Holiday", "Lights", "Wands", "Hearth", "Joy", "Yule",
+        "Cheer", "Santa", "Nostalgia", "Cookies", "Fireplace", "Candles", "Festive",
+        "Frost", "Lanterns", "Classic", "Snowfall", "Ornaments", "Carols", "Tree", 
+        "Merry", "Sleigh", "North", "Heartwarming", "December", "Magic"
+    ]
+}
+
+@dataclass(frozen=True)
+class SeasonalMode:
+    """
+    How a book's text is matched against the seasonal keywords.
+
+    case_sensitive: match keywords as written (customers) or after
+        lower-casing both sides (solvers, metrics, Timefold).
+    include_genre: match against "title authors genre" instead of
+        "title authors".
+    """
+    case_sensitive: bool = False
+    include_genre: bool = False
+
+
+# The modes each consumer has always used
+CUSTOMER_MODE = SeasonalMode(case_sensitive=True, include_genre=False)
+SOLVER_MODE = SeasonalMode(case_sensitive=False, include_genre=False)
+METRICS_MODE = SeasonalMode(case_sensitive=False, include_genre=True)
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern substring matcher.
+
+    The patterns are compiled into a single trie-shaped regex that is tried
+    at every position of the text (a lookahead, so overlapping matches are
+    found). At each position it reports the longest pattern that starts
+    there; every shorter pattern that also starts there is a prefix of it,
+    so the prefix closure recovers the full set of matched patterns.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = sorted(set(patterns))
+        self.ids = {pattern: i for i, pattern in enumerate(self.patterns)}
+        self._regex = re.compile(f"(?=({_trie_regex(self.patterns)}))") if self.patterns else None
+        self._closure = {}
+
+    def _prefixes(self, longest):
+        ids = self._closure.get(longest)
+        if ids is None:
+            ids = [self.ids[longest[:end]] for end in range(1, len(longest) + 1)
+                   if longest[:end] in self.ids]
+            self._closure[longest] = ids
+        return ids
+
+    def match_ids(self, text) -> set:
+        """Ids of all patterns occurring in text."""
+        found = set()
+        if self._regex is None:
+            return found
+        for longest in self._regex.findall(text):
+            found.update(self._prefixes(longest))
+        return found
+
+
+def _trie_regex(patterns):
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node):
+        # Longer continuations first so the regex prefers the longest match
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            body = f"(?:{body})?"
+        return body
+
+    return render(trie)
+
+
+class SeasonalIndex:
+    """
+    Per-book seasonal keyword matches for one SeasonalMode.
+
+    mask[row] has bit (month - 1) set when the book matches any keyword of
+    that month. counts[row, month - 1] is the number of that month's keyword
+    entries found in the book text (list duplicates count, as they did in
+    the per-call keyword loops).
+    """
+
+    def __init__(self, mask, counts, mode):
+        self.mask = mask
+        self.counts = counts
+        self.mode = mode
+
+    def matches(self, row, month) -> bool:
+        return bool(self.mask[row] >> (month - 1) & 1)
+
+    def count(self, row, month) -> int:
+        return int(self.counts[row, month - 1])
+
+    def month_matches(self, month):
+        """Boolean array over all rows: matches any keyword of month."""
+        return (self.mask >> (month - 1) & 1).astype(bool)
+
+    def month_counts(self, month):
+        return self.counts[:, month - 1]
+
+    @classmethod
+    def build(cls, texts, mode, keywords=SEASONAL_KEYWORDS):
+        """Match every text once against all months' keywords."""
+        def key(keyword):
+            return keyword if mode.case_sensitive else keyword.lower()
+
+        matcher = KeywordMatcher(key(k) for words in keywords.values() for k in words)
+        # Month multiplicity of each pattern, e.g. "Goals" is listed twice for January
+        per_month = np.zeros((len(matcher.patterns), 12), dtype=np.uint16)
+        for month, words in keywords.items():
+            for keyword in words:
+                per_month[matcher.ids[key(keyword)], month - 1] += 1
+
+        book_rows, pattern_ids = [], []
+        for row, text in enumerate(texts):
+            ids = matcher.match_ids(text if mode.case_sensitive else text.lower())
+            book_rows.extend([row] * len(ids))
+            pattern_ids.extend(ids)
+
+        counts = np.zeros((len(texts), 12), dtype=np.uint16)
+        if pattern_ids:
+            np.add.at(counts, np.asarray(book_rows), per_month[np.asarray(pattern_ids)])
+        bits = (counts > 0).astype(np.uint16) << np.arange(12, dtype=np.uint16)
+        mask = np.bitwise_or.reduce(bits, axis=1) if len(texts) else np.zeros(0, dtype=np.uint16)
+        return cls(mask.astype(np.uint16), counts, mode)
+
+
+def book_text(title, authors, genre=None) -> str:
+    """The text seasonal keywords are matched against."""
+    return f"{title} {authors}" if genre is None else f"{title} {authors} {genre}"
@@ -0,0 +1,90 @@
+import numpy as np
+
+from preference_pools import CHEAP_PRICE
+from seasonal import METRICS_MODE
+
+_MONTH_BITS = 1 << np.arange(12)
+
+
+class StockAggregates:
+    """
+    Running totals over the stock, for constant-time stock metrics.
+
+    Store calls add/remove on every stock change. Units and the rating and
+    affordability sums are weighted by quantity; seasonal_titles counts the
+    distinct in-stock titles matching each month's keywords (METRICS_MODE).
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.total = 0
+        self.rating_sum = 0.0
+        self.affordable = 0
+        self.titles = 0
+        self.seasonal_titles = np.zeros(12, dtype=np.int64)
+
+    def _months(self, row):
+        return (int(self.catalog.seasonal(METRICS_MODE).mask[row]) & _MONTH_BITS) != 0
+
+    def add(self, row, quantity, new_title):
+        self.total += quantity
+        self.rating_sum += float(self.catalog.rating[row]) * quantity
+        if self.catalog.price[row] <= CHEAP_PRICE:
+            self.affordable += quantity
+        if new_title:
+            self.titles += 1
+            self.seasonal_titles += self._months(row)
+
+    def remove(self, row, quantity, title_left):
+        self.total -= quantity
+        self.rating_sum -= float(self.catalog.rating[row]) * quantity
+        if self.catalog.price[row] <= CHEAP_PRICE:
+            self.affordable -= quantity
+        if title_left:
+            self.titles -= 1
+            self.seasonal_titles -= self._months(row)
+        if not self.total:
+            self.rating_sum = 0.0  # drop accumulated rounding error
+
+    def _month_counts(self, rows):
+        masks = self.catalog.seasonal(METRICS_MODE).mask[rows].astype(np.int64)
+        return ((masks[:, None] & _MONTH_BITS) != 0).sum(axis=0)
+
+    def add_many(self, rows, quantities, entered):
+        """Bulk add: parallel rows/quantities, plus the rows that entered stock."""
+        self.total += int(quantities.sum())
+        self.rating_sum += float((self.catalog.rating[rows] * quantities).sum())
+        self.affordable += int(quantities[self.catalog.price[rows] <= CHEAP_PRICE].sum())
+        self.titles += len(entered)
+        self.seasonal_titles += self._month_counts(entered)
+
+    def remove_many(self, rows, quantities, left):
+        """Bulk remove: parallel rows/quantities, plus the rows that ran out."""
+        self.total -= int(quantities.sum())
+        self.rating_sum -= float((self.catalog.rating[rows] * quantities).sum())
+        self.affordable -= int(quantities[self.catalog.price[rows] <= CHEAP_PRICE].sum())
+        self.titles -= len(left)
+        self.seasonal_titles -= self._month_counts(left)
+        if not self.total:
+            self.rating_sum = 0.0
+
+    def clear(self):
+        self.total = 0
+        self.rating_sum = 0.0
+        self.affordable = 0
+        self.titles = 0
+        self.seasonal_titles[:] = 0
+
+    def snapshot(self, month):
+        """Stock metrics for a month (1-12), as _collect_metrics reports them."""
+        return stock_metrics(self.total, self.rating_sum, self.affordable, int(self.seasonal_titles[month - 1]))
+
+
+def stock_metrics(total, rating_sum, affordable, seasonal_titles):
+    return {
+        'total': total,
+        'avg_rating': rating_sum / total if total > 0 else 0,
+        'seasonal_matches': seasonal_titles,
+        'affordable_books': affordable,
+        'affordable_percentage': (affordable / total * 100) if total > 0 else 0,
+    }
@@ -0,0 +1,71 @@
+from catalog import normalize_title
+
+
+class StockIndex:
+    """
+    Lookup indexes over the books currently in stock.
+
+    Buckets are insertion-ordered dicts used as sets, so lookups return books
+    in the order they entered stock (the order a scan of Store.stock used).
+    The store calls add/remove whenever a book enters or leaves stock.
+    """
+
+    def __init__(self):
+        self.by_isbn = {}
+        self.by_title = {}
+        self.by_author = {}
+
+    @staticmethod
+    def _put(index, key, book):
+        bucket = index.get(key)
+        if bucket is None:
+            index[key] = bucket = {}
+        bucket[book] = None
+
+    @staticmethod
+    def _drop(index, key, book):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(book, None)
+            if not bucket:
+                del index[key]
+
+    def add(self, book):
+        self._put(self.by_isbn, book.isbn, book)
+        self._put(self.by_title, normalize_title(book.title), book)
+        self._put(self.by_author, book.authors, book)
+
+    def remove(self, book):
+        self._drop(self.by_isbn, book.isbn, book)
+        self._drop(self.by_title, normalize_title(book.title), book)
+        self._drop(self.by_author, book.authors, book)
+
+    def clear(self):
+        self.by_isbn.clear()
+        self.by_title.clear()
+        self.by_author.clear()
+
+    def find_isbn(self, isbn):
+        """First in-stock book with this ISBN, or None."""
+        bucket = self.by_isbn.get(isbn)
+        return next(iter(bucket)) if bucket else None
+
+    def find_title(self, title):
+        """First in-stock book with exactly this title, or None."""
+        for book in self.by_title.get(normalize_title(title), ()):
+            if book.title == title:
+                return book
+        return None
+
+    def find_title_normalized(self, title):
+        """
+        Like find_title, but ignoring case and runs of whitespace (see
+        normalize_title); an exact match is still preferred.
+        """
+        bucket = self.by_title.get(normalize_title(title))
+        if not bucket:
+            return None
+        return self.find_title(title) or next(iter(bucket))
+
+    def books_by_author(self, authors) -> list:
+        return list(self.by_author.get(authors, ()))
@@ -0,0 +1,179 @@
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from catalog import Book
+
+
+class StockVector:
+    """
+    Copies in stock per catalog row, as a dense integer array.
+
+    The sorted ids of in-stock rows are kept up to date as titles enter and
+    leave stock (never rescanned from the array), and are replaced rather
+    than modified, so callers may hold on to them. snapshot() is
+    copy-on-write: the copy shares the array until either side is modified.
+    """
+
+    def __init__(self, size=0):
+        self._qty = np.zeros(size, dtype=np.int32)
+        self._owned = True
+        self._rows = np.zeros(0, dtype=np.int64)
+        self.total = 0
+        self.titles = 0
+
+    def __len__(self):
+        return self.titles
+
+    def __getitem__(self, row) -> int:
+        return int(self._qty[row]) if row < len(self._qty) else 0
+
+    @property
+    def quantities(self) -> np.ndarray:
+        """Read-only quantity array indexed by row (rows past its end have none)."""
+        view = self._qty.view()
+        view.flags.writeable = False
+        return view
+
+    def rows(self) -> np.ndarray:
+        """Sorted row ids with stock."""
+        return self._rows
+
+    def snapshot(self) -> "StockVector":
+        copy = StockVector.__new__(StockVector)
+        copy._qty = self._qty
+        copy._rows = self._rows
+        copy.total = self.total
+        copy.titles = self.titles
+        copy._owned = self._owned = False
+        return copy
+
+    def _writable(self, size):
+        """Array safe to modify in place, grown to hold size rows."""
+        if not self._owned or size > len(self._qty):
+            grown = np.zeros(max(size, len(self._qty)), dtype=np.int32)
+            grown[:len(self._qty)] = self._qty
+            self._qty = grown
+            self._owned = True
+        return self._qty
+
+    def _enter(self, rows):
+        """Merge sorted, not yet present rows into the in-stock row ids."""
+        self._rows = np.insert(self._rows, np.searchsorted(self._rows, rows), rows)
+
+    def _leave(self, rows):
+        """Drop sorted, present rows from the in-stock row ids."""
+        self._rows = np.delete(self._rows, np.searchsorted(self._rows, rows))
+
+    def add_one(self, row, quantity) -> bool:
+        """Add copies of one row; True when the row was out of stock before."""
+        qty = self._writable(row + 1)
+        new_title = qty[row] == 0
+        qty[row] += quantity
+        self.total += quantity
+        self.titles += new_title
+        if new_title:
+            self._enter(row)
+        return bool(new_title)
+
+    def remove_one(self, row, quantity) -> bool:
+        """Remove copies of one row (caller checks availability); True when it ran out."""
+        qty = self._writable(row + 1)
+        qty[row] -= quantity
+        self.total -= quantity
+        left = qty[row] == 0
+        self.titles -= left
+        if left:
+            self._leave(row)
+        return bool(left)
+
+    def add(self, rows, quantities) -> np.ndarray:
+        """Add copies for parallel arrays (rows may repeat); returns the rows new to stock."""
+        rows = np.asarray(rows, dtype=np.int64)
+        quantities = np.asarray(quantities, dtype=np.int64)
+        if not len(rows):
+            return rows
+        qty = self._writable(int(rows.max()) + 1)
+        unique = np.unique(rows)
+        was_empty = qty[unique] == 0
+        np.add.at(qty, rows, quantities)
+        entered = unique[was_empty & (qty[unique] > 0)]
+        self.total += int(quantities.sum())
+        self.titles += len(entered)
+        if len(entered):
+            self._enter(entered)
+        return entered
+
+    def subtract(self, rows, quantities) -> np.ndarray:
+        """Remove copies for parallel arrays (checked against stock); returns the rows that ran out."""
+        rows = np.asarray(rows, dtype=np.int64)
+        quantities = np.asarray(quantities, dtype=np.int64)
+        if not len(rows):
+            return rows
+        qty = self._writable(int(rows.max()) + 1)
+        np.subtract.at(qty, rows, quantities)
+        unique = np.unique(rows)
+        left = unique[qty[unique] == 0]
+        self.total -= int(quantities.sum())
+        self.titles -= len(left)
+        if len(left):
+            self._leave(left)
+        return left
+
+
+class StockView(MutableMapping):
+    """
+    Dict-like view of a store's stock keyed by Book, for existing callers.
+
+    Reads come straight from the stock vector; writes go through the
+    store's _add_stock/_remove_stock so indexes and aggregates stay in
+    sync. Iteration is in catalog row order.
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self._catalog = store.inventory.catalog
+
+    def _row(self, book):
+        if isinstance(book, Book) and book.catalog is self._catalog:
+            return book.row
+        return None
+
+    def __getitem__(self, book):
+        row = self._row(book)
+        quantity = self._store.stock_vector[row] if row is not None else 0
+        if not quantity:
+            raise KeyError(book)
+        return quantity
+
+    def get(self, book, default=None):
+        row = self._row(book)
+        quantity = self._store.stock_vector[row] if row is not None else 0
+        return quantity if quantity else default
+
+    def __contains__(self, book):
+        row = self._row(book)
+        return row is not None and self._store.stock_vector[row] > 0
+
+    def __setitem__(self, book, quantity):
+        current = self.get(book, 0)
+        if quantity > current:
+            self._store._add_stock(book, quantity - current)
+        elif quantity < current:
+            self._store._remove_stock(book, current - quantity)
+
+    def __delitem__(self, book):
+        self._store._remove_stock(book, self[book])
+
+    def __iter__(self):
+        return iter(self._catalog.books_at(self._store.stock_vector.rows().tolist()))
+
+    def __len__(self):
+        return len(self._store.stock_vector)
+
+    def __bool__(self):
+        return self._store.stock_vector.total > 0
+
+    def values(self):
+        vector = self._store.stock_vector
+        return vector.quantities[vector.rows()].tolist()
@@ -1,26 +1,116 @@
+import copy
 import random
 import logging
+import numpy as np
 from inventory import Inventory, Book
-from customer import Customer
 from typing import List, Tuple
 import time
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from datetime import datetime
-from alt_solver import alt_solve
+from alt_solver import Termination, alt_solve, alt_solve_multistart, search_pool
+from greedy_solver import GreedyConfig, greedy_solve
+from plan_cache import PlanCache
+from population_solver import PopulationConfig, population_solve
+from stock_index import StockIndex
+from preference_pools import PreferencePools
+from seasonal import METRICS_MODE
+from stock_aggregates import StockAggregates, stock_metrics
+from candidates import CandidateMix, select_candidates
+from stock_vector import StockVector, StockView
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
+# Longest a Timefold restock waits for its solve, and per long-poll request (seconds)
+SOLVE_TIMEOUT = 600
+LONG_POLL_SECONDS = 30
+
 class Store:
     def __init__(self, inventory, storage_capacity):
         self.inventory = inventory
         self.storage_capacity = storage_capacity
-        self.stock = {}
+        self.stock_vector = StockVector(len(inventory.catalog))
+        self.stock = StockView(self)  # dict-like view keyed by Book
+        self._stock_index = StockIndex()
+        self._preference_pools = PreferencePools(inventory.catalog)
+        self.aggregates = StockAggregates(inventory.catalog)
+        self.candidate_mix = CandidateMix()
+        # Seconds restock_alternative may spend solving (None: fixed iterations)
+        self.alternative_time_budget = None
+        # Parallel LAHC searches per alternative restock (1: single search in-process)
+        self.alternative_starts = 1
+        self._search_pool = None  # worker processes of multi-start restocks, started on first use
+        self.population_config = PopulationConfig()
+        self.greedy_config = GreedyConfig()
+        # Solvers start from the previous restock plan (or a cached plan for
+        # the same month, capacity and candidates) instead of from scratch
+        self.warm_start = True
+        self.plan_cache = PlanCache()
+        self.last_plan = {}  # catalog row -> quantity of the latest solved restock
         self.initiate_stock()
+        # Store-owned generators, seeded from the global random module so
+        # random.seed() still makes a whole run reproducible. Restocking
+        # draws from these, so a fork() replays the same decisions.
+        self.random = random.Random(random.getrandbits(64))
+        self.rng = np.random.default_rng(random.getrandbits(64))
         self.session = self._setup_http_session()
 
+    @property
+    def stock_index(self):
+        if self._stock_index is None:
+            self._stock_index = StockIndex()
+            for book in self.stock:
+                self._stock_index.add(book)
+        return self._stock_index
+
+    @property
+    def preference_pools(self):
+        if self._preference_pools is None:
+            self._preference_pools = PreferencePools(self.inventory.catalog)
+            for row in self.stock_vector.rows().tolist():
+                self._preference_pools.add(row)
+        return self._preference_pools
+
+    def fork(self) -> "Store":
+        """
+        Independent copy of the store for what-if evaluation.
+
+        Stock is a copy-on-write snapshot, aggregates and RNG states are
+        copied, and the catalog and candidate mix are shared. The fork gets
+        its own HTTP session (sessions are not thread-safe). Stock indexes
+        and preference pools are rebuilt on first use.
+        """
+        store = Store.__new__(Store)
+        store.inventory = self.inventory
+        store.storage_capacity = self.storage_capacity
+        store.stock_vector = self.stock_vector.snapshot()
+        store.stock = StockView(store)
+        store._stock_index = None
+        store._preference_pools = None
+        store.aggregates = copy.deepcopy(self.aggregates, {id(self.inventory.catalog): self.inventory.catalog})
+        store.candidate_mix = self.candidate_mix
+        store.alternative_time_budget = self.alternative_time_budget
+        store.alternative_starts = self.alternative_starts
+        store._search_pool = None
+        store.population_config = self.population_config
+        store.greedy_config = self.greedy_config
+        store.warm_start = self.warm_start
+        store.plan_cache = self.plan_cache.copy()
+        store.last_plan = self.last_plan
+        store.random = random.Random()
+        store.random.setstate(self.random.getstate())
+        store.rng = copy.deepcopy(self.rng)
+        store.session = self._setup_http_session()
+        return store
+
+    def close(self):
+        """Shut down the store's solver worker processes, if any were started."""
+        if self._search_pool is not None:
+            self._search_pool.shutdown()
+            self._search_pool = None
+
     def _setup_http_session(self):
         session = requests.Session()
         retries = Retry(
@@ -37,7 +127,7 @@ class Store:
             book = random.choice(self.inventory.books)
             if book not in self.stock:
                 quantity = random.randint(1, self.storage_capacity - current_total)
-                self.stock[book] = quantity
+                self._add_stock(book, quantity)
                 current_total += quantity
                 log.debug(f"Initiated stock for {book.title} (ISBN: {book.isbn}). Now have {self.stock[book]} copies.")
             else:
@@ -47,134 +137,178 @@ class Store:
         for book, quantity in self.stock.items():
             log.debug(f"{book.title} (ISBN: {book.isbn}): {quantity} copies")
 
-    def sell_book(self, title, quantity=1):
-        for book in self.stock:
-            if book.title == title:
-                if self.stock[book] >= quantity:
-                    self.stock[book] -= quantity
-                    log.debug(f"Sold {quantity} copies of {title} (ISBN: {book.isbn}).")
-                    if self.stock[book] == 0:
-                        del self.stock[book]
-                    return book
-                else:
-                    log.debug(f"Not enough copies of {title} (ISBN: {book.isbn}) to sell. Available: {self.stock[book]}")
-                    return None
-        log.debug(f"{title} is not in stock.")
-        return None
+    def _add_stock(self, book, quantity):
+        """Add copies of a book, keeping the stock indexes in sync."""
+        if quantity <= 0:
+            return
+        new_title = self.stock_vector.add_one(book.row, quantity)
+        self.aggregates.add(book.row, quantity, new_title=new_title)
+        if new_title:
+            if self._stock_index is not None:
+                self._stock_index.add(book)
+            if self._preference_pools is not None:
+                self._preference_pools.add(book.row)
+
+    def _remove_stock(self, book, quantity):
+        """Remove copies of a book (caller checks availability), keeping the indexes in sync."""
+        title_left = self.stock_vector.remove_one(book.row, quantity)
+        self.aggregates.remove(book.row, quantity, title_left=title_left)
+        if title_left:
+            if self._stock_index is not None:
+                self._stock_index.remove(book)
+            if self._preference_pools is not None:
+                self._preference_pools.remove(book.row)
+
+    def stock_of(self, row) -> int:
+        """Copies in stock of a catalog row."""
+        return self.stock_vector[row]
+
+    def apply_restock(self, rows, quantities):
+        """Add copies for parallel arrays of row ids and quantities in one vector update."""
+        rows = np.asarray(rows, dtype=np.int64)
+        quantities = np.asarray(quantities, dtype=np.int64)
+        keep = quantities > 0
+        rows, quantities = rows[keep], quantities[keep]
+        entered = self.stock_vector.add(rows, quantities)
+        self.aggregates.add_many(rows, quantities, entered)
+        book = self.inventory.catalog.book
+        for row in entered.tolist():
+            if self._stock_index is not None:
+                self._stock_index.add(book(row))
+            if self._preference_pools is not None:
+                self._preference_pools.add(row)
+
+    def apply_sales(self, rows, quantities):
+        """Remove sold copies for parallel arrays of row ids and quantities (already checked against stock)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        quantities = np.asarray(quantities, dtype=np.int64)
+        keep = quantities > 0
+        rows, quantities = rows[keep], quantities[keep]
+        left = self.stock_vector.subtract(rows, quantities)
+        self.aggregates.remove_many(rows, quantities, left)
+        book = self.inventory.catalog.book
+        for row in left.tolist():
+            if self._stock_index is not None:
+                self._stock_index.remove(book(row))
+            if self._preference_pools is not None:
+                self._preference_pools.remove(row)
+
+    def find_in_stock(self, title=None, isbn=None):
+        """Find an in-stock book by ISBN or title."""
+        if isbn is not None:
+            return self.stock_index.find_isbn(isbn)
+        return self.stock_index.find_title(title)
+
+    def sell_book(self, title=None, quantity=1, isbn=None):
+        """Sell copies of a book identified by title or ISBN. Returns the book, or None."""
+        book = self.find_in_stock(title=title, isbn=isbn)
+        label = title if isbn is None else f"ISBN {isbn}"
+        if book is None:
+            log.debug(f"{label} is not in stock.")
+            return None
+        if self.stock[book] < quantity:
+            log.debug(f"Not enough copies of {book.title} (ISBN: {book.isbn}) to sell. Available: {self.stock[book]}")
+            return None
+        self._remove_stock(book, quantity)
+        log.debug(f"Sold {quantity} copies of {book.title} (ISBN: {book.isbn}).")
+        return book
+
+    def stock_metrics(self, current_date):
+        """Current stock metrics (total, avg_rating, seasonal_matches, affordable_*), in constant time."""
+        return self.aggregates.snapshot(current_date.month)
 
     def _collect_metrics(self, current_date, decisions=None, prefix=""):
         """Helper function to collect metrics about stock state."""
-        month = current_date.month
-        seasonal_keywords = Customer.seasonal_keywords.get(month, [])
-        
-        def calculate_stock_metrics():
-            """Calculate metrics for current stock state"""
-            total = sum(self.stock.values())
-            rating_sum = sum(float(book.average_rating or 0) * qty for book, qty in self.stock.items())
-            avg_rating = rating_sum / total if total > 0 else 0
-            seasonal = sum(1 for book in self.stock.keys() 
-                         if any(k.lower() in f"{book.title} {book.authors} {book.genre}".lower() 
-                              for k in seasonal_keywords))
-            affordable_books = sum(qty for book, qty in self.stock.items() if book.price <= 8.0)  # Changed from 9.0 to 8.0
-            affordable_percentage = (affordable_books / total * 100) if total > 0 else 0
-            
-            return {
-                'total': total,
-                'avg_rating': avg_rating,
-                'seasonal_matches': seasonal,
-                'affordable_books': affordable_books,
-                'affordable_percentage': affordable_percentage
-            }
-
-        # If we have decisions, these are "after" metrics
+        current = self.stock_metrics(current_date)
+
+        # If we have decisions, these are "after" metrics and the "before"
+        # state is the current one minus what the decisions added
         if decisions:
-            after_total = sum(self.stock.values())
-            after_affordable = sum(qty for book, qty in self.stock.items() if book.price <= 8.0)
-            
-            metrics = {
-                'after_total': after_total,
-                'after_avg_rating': (sum(float(book.average_rating or 0) * qty 
-                                   for book, qty in self.stock.items()) / 
-                                   after_total if after_total else 0),
-                'after_seasonal_matches': sum(1 for book in self.stock.keys() 
-                                         if any(k.lower() in f"{book.title} {book.authors} {book.genre}".lower() 
-                                              for k in seasonal_keywords)),
-                'after_affordable_books': after_affordable,
-                'after_affordable_percentage': (after_affordable / after_total * 100) if after_total > 0 else 0,
-                'restock_quantity': sum(qty for _, qty in decisions),
-                'unique_books_added': len(set(book for book, _ in decisions))
-            }
-            
-            # Calculate before values
-            before_total = metrics['after_total'] - metrics['restock_quantity']
-            before_affordable = metrics['after_affordable_books'] - sum(qty for book, qty in decisions if book.price <= 8.0)
-            
-            metrics.update({
-                'before_total': before_total,
-                'before_avg_rating': metrics['after_avg_rating'],  # Approximate
-                'before_seasonal_matches': metrics['after_seasonal_matches'] - sum(1 for book, _ in decisions 
-                                                                               if any(k.lower() in f"{book.title} {book.authors} {book.genre}".lower() 
-                                                                                    for k in seasonal_keywords)),
-                'before_affordable_books': before_affordable,
-                'before_affordable_percentage': (before_affordable / before_total * 100) if before_total > 0 else 0
-            })
+            catalog = self.inventory.catalog
+            seasonal_index = catalog.seasonal(METRICS_MODE)
+            added = {}
+            for book, qty in decisions:
+                added[book.row] = added.get(book.row, 0) + qty
+            restock_quantity = sum(added.values())
+            # A title was new to stock if all of its copies came from this restock
+            new_seasonal = sum(1 for row, qty in added.items()
+                               if self.stock_of(row) == qty and seasonal_index.matches(row, current_date.month))
+            before = stock_metrics(
+                current['total'] - restock_quantity,
+                self.aggregates.rating_sum - sum(float(catalog.rating[row]) * qty for row, qty in added.items()),
+                current['affordable_books'] - sum(qty for row, qty in added.items() if catalog.price[row] <= 8.0),
+                current['seasonal_matches'] - new_seasonal,
+            )
+            unique_books_added = len(added)
         else:
             # If no decisions, just get current state
-            current_metrics = calculate_stock_metrics()
-            metrics = {
-                'before_total': current_metrics['total'],
-                'before_avg_rating': current_metrics['avg_rating'],
-                'before_seasonal_matches': current_metrics['seasonal_matches'],
-                'before_affordable_books': current_metrics['affordable_books'],
-                'before_affordable_percentage': current_metrics['affordable_percentage'],
-                'after_total': current_metrics['total'],
-                'after_avg_rating': current_metrics['avg_rating'],
-                'after_seasonal_matches': current_metrics['seasonal_matches'],
-                'after_affordable_books': current_metrics['affordable_books'],
-                'after_affordable_percentage': current_metrics['affordable_percentage'],
-                'restock_quantity': 0,
-                'unique_books_added': 0
-            }
+            before = current
+            restock_quantity = 0
+            unique_books_added = 0
 
+        metrics = {f'after_{key}': value for key, value in current.items()}
+        metrics['restock_quantity'] = restock_quantity
+        metrics['unique_books_added'] = unique_books_added
+        metrics.update({f'before_{key}': value for key, value in before.items()})
         return metrics  # Just return metrics without printing
 
+    def restock_candidates(self, remaining_capacity) -> np.ndarray:
+        """Shuffled candidate catalog rows for a restock: top rated (with noise) plus a random share."""
+        return select_candidates(self.inventory.catalog, remaining_capacity, self.rng, self.candidate_mix)
+
+    def _prior_plan(self, month, capacity, rows):
+        """
+        (cache key, warm start) for a restock over candidate rows.
+
+        The warm start is the cached plan for the same month, capacity and
+        candidates, else the latest plan (None with warm_start off).
+        """
+        key = PlanCache.key(month, capacity, rows)
+        if not self.warm_start:
+            return key, None
+        return key, self.plan_cache.get(key) or self.last_plan or None
+
+    def _remember_plan(self, key, decisions):
+        plan = {book.row: quantity for book, quantity in decisions}
+        self.last_plan = plan
+        self.plan_cache.put(key, plan)
+
+    def run_restock(self, solver_type, current_date):
+        """
+        Restock with the named policy ("basic", "alternative", "population",
+        "greedy" or "timefold"); returns (decisions, metrics).
+        """
+        if solver_type == "alternative":
+            return self.restock_alternative(current_date)
+        elif solver_type == "population":
+            return self.restock_population(current_date)
+        elif solver_type == "greedy":
+            return self.restock_greedy(current_date)
+        elif solver_type == "timefold":
+            return self.restock_timefold_optimized(current_date)
+        return self.restock()
+
     def restock(self):
         """Basic restocking with metrics collection."""
         # Collect metrics before restocking
         before_metrics = self._collect_metrics(datetime.now())
         
-        current_total = sum(self.stock.values())
+        current_total = self.aggregates.total
         remaining_capacity = self.storage_capacity - current_total
         decisions = []
         
         # Create a diverse selection of books (same as other methods)
-        # Take some high-rated books with random noise in rating
-        top_rated = sorted(
-            self.inventory.books,
-            key=lambda x: float(x.average_rating if x.average_rating else 0) + random.uniform(-0.2, 0.2)
-        )[:1000]  # Keep exactly 1000 top books
-        
-        # Take random books from remaining
-        remaining_books = [b for b in self.inventory.books if b not in top_rated]
-        random_selection = random.sample(remaining_books, 
-                                      min(2000+remaining_capacity, len(remaining_books)))
-        
-        # Combine and shuffle the selection
-        candidate_books = random.sample(top_rated + random_selection, 
-                                    len(top_rated) + len(random_selection))
+        candidate_books = self.inventory.catalog.books_at(self.restock_candidates(remaining_capacity))
         
         log.info(f"Selected {len(candidate_books)} books for basic restocking")
         
         # Perform basic restocking from selected books
         while current_total < self.storage_capacity:
-            book = random.choice(candidate_books)
-            quantity = random.randint(1, 5)
+            book = self.random.choice(candidate_books)
+            quantity = self.random.randint(1, 5)
             if current_total + quantity > self.storage_capacity:
                 quantity = self.storage_capacity - current_total
-            if book in self.stock:
-                self.stock[book] += quantity
-            else:
-                self.stock[book] = quantity
+            self._add_stock(book, quantity)
             current_total += quantity
             decisions.append((book, quantity))
             log.debug(f"Restocked {quantity} copies of {book.title} (ISBN: {book.isbn})")
@@ -190,26 +324,15 @@ class Store:
         before_metrics = self._collect_metrics(current_date)
         
         try:
-            current_total = sum(self.stock.values())
+            current_total = self.aggregates.total
             remaining_capacity = self.storage_capacity - current_total
             log.info(f"Remaining storage capacity: {remaining_capacity}")
             
             # Create a diverse selection of books
-            # Take some high-rated books with random noise in rating
-            top_rated = sorted(
-                self.inventory.books,
-                key=lambda x: (float(x.average_rating) if x.average_rating else 0) + random.uniform(-0.2, 0.2),
-                reverse=True
-            )[:1000]  # Keep exactly 1000 top books
-            
-            # Take exactly 2000 random books from remaining
-            remaining_books = [b for b in self.inventory.books if b not in top_rated]
-            random_selection = random.sample(remaining_books, 
-                                          min(2000+remaining_capacity, len(remaining_books)))  # Fixed at 2000
-            
-            # Combine and shuffle
-            sorted_books = random.sample(top_rated + random_selection, 
-                                       len(top_rated) + len(random_selection))
+            candidate_rows = self.restock_candidates(remaining_capacity)
+            sorted_books = self.inventory.catalog.books_at(candidate_rows)
+            plan_key, prior_plan = self._prior_plan(current_date.month, remaining_capacity, candidate_rows)
+            prior_plan = prior_plan or {}
             
             log.info(f"Selected {len(sorted_books)} books")
             
@@ -224,7 +347,7 @@ class Store:
                     "avg_daily_sales": 2.5,
                     "rating": book.average_rating,
                     "genre": book.genre,  # Add genre to the data sent to solver
-                    "restock_quantity": 0,
+                    "restock_quantity": prior_plan.get(book.row, 0),  # warm start
                     "remaining_capacity": remaining_capacity,
                     "current_date": current_date.isoformat()  # Add current date to each book entry
                 }
@@ -235,94 +358,61 @@ class Store:
             log.info(f"Sending {len(current_stock)} books to solver")
             log.debug(f"First 5 books being sent: {current_stock[:5]}")
             
-            response = requests.post(
-                "http://localhost:8080/optimize-restock",
-                json=current_stock,
-                timeout=120
-            )
-            response.raise_for_status()
-            job_id = response.json()
+            job_id = self._submit_solve(current_stock)
             log.info(f"Got job_id: {job_id}")
 
-            # Poll for solution
-            max_retries = 300  # Reduced retries but increased sleep
-            attempt = 1
-            
-            while attempt <= max_retries:
-                status = requests.get(
-                    f"http://localhost:8080/solutions/{job_id}/status",
-                    timeout=10
-                ).json()
-                
-                log.debug(f"Attempt {attempt}: Status = {status['status']} Score = {status.get('score', 'N/A')}")
-                
-                if status["status"] in ["SOLVED"]:
-                    solution_response = requests.get(
-                        f"http://localhost:8080/solutions/{job_id}",
-                        timeout=10
-                    )
-                    
-                    if solution_response.status_code == 200:
-                        try:
-                            solution_data = solution_response.json()
-                            log.debug(f"Solution data: {solution_data}")
-                            
-                            # Handle nested 'decisions' structure
-                            if isinstance(solution_data, dict) and 'decisions' in solution_data:
-                                decisions = []
-                                total_restock = 0
-                                log.info(f"Raw solution decisions: {solution_data['decisions'][:5]}")  # Show first 5
-                                for item in solution_data['decisions']:
-                                    isbn = item.get('isbn')
-                                    restock_qty = item.get('restockQuantity', 0)
-                                    if isbn:  # Log all decisions, not just positive ones
-                                        log.debug(f"Decision for ISBN {isbn}: {restock_qty}")
-                                    if isbn and restock_qty > 0:
-                                        book = next((b for b in sorted_books if b.isbn == isbn), None)
-                                        if book:
-                                            decisions.append((book, restock_qty))
-                                            total_restock += restock_qty
-                                            
-                                log.info(f"Total books to restock: {total_restock}")
-                                log.info(f"Number of different books to restock: {len(decisions)}")
-                                if decisions:
-                                    log.info("First 5 restocking decisions:")
-                                    for book, qty in decisions[:5]:
-                                        log.info(f"  - {book.title}: {qty} copies")
-                                
-                                # After getting decisions, apply them to stock
-                                if decisions:
-                                    for book, quantity in decisions:
-                                        if book in self.stock:
-                                            self.stock[book] += quantity
-                                        else:
-                                            self.stock[book] = quantity
-                                        log.debug(f"Restocked {book.title}: added {quantity} (new total: {self.stock[book]})")
-                                    
-                                    total_after = sum(self.stock.values())
-                                    log.info(f"Books after restocking: {total_after}")
-                                    
-                                # After getting decisions and applying them, collect and compare metrics
-                                after_metrics = self._collect_metrics(current_date, decisions, prefix="Timefold ")
-                                self._print_metrics_comparison(before_metrics, after_metrics, "Timefold ")
-                                return decisions, after_metrics
-                            else:
-                                log.warning(f"Unexpected solution format: {solution_data}")
-                                fallback_decisions = self._basic_restock()
-                                after_metrics = self._collect_metrics(current_date, fallback_decisions, prefix="Timefold Fallback ")
-                                self._print_metrics_comparison(before_metrics, after_metrics, "Timefold Fallback ")
-                                return fallback_decisions, after_metrics
-                        except ValueError as e:
-                            log.warning(f"Failed to parse solution: {e}")
-                            fallback_decisions = self._basic_restock()
-                            after_metrics = self._collect_metrics(current_date, fallback_decisions, prefix="Timefold Fallback ")
-                            self._print_metrics_comparison(before_metrics, after_metrics, "Timefold Fallback ")
-                            return fallback_decisions, after_metrics
-                
-                attempt += 1
-                time.sleep(2)
-            
-            log.warning("Optimization timed out - falling back to basic optimization")
+            # Long-poll: the service answers once the solve is done
+            solution_data = self._wait_for_solution(job_id)
+            if solution_data is not None:
+                # Handle nested 'decisions' structure
+                if isinstance(solution_data, dict) and 'decisions' in solution_data:
+                    decisions = []
+                    total_restock = 0
+                    books_by_isbn = {}
+                    for b in sorted_books:
+                        books_by_isbn.setdefault(b.isbn, b)
+                    log.info(f"Raw solution decisions: {solution_data['decisions'][:5]}")  # Show first 5
+                    for item in solution_data['decisions']:
+                        isbn = item.get('isbn')
+                        restock_qty = item.get('restockQuantity', 0)
+                        if isbn:  # Log all decisions, not just positive ones
+                            log.debug(f"Decision for ISBN {isbn}: {restock_qty}")
+                        if isbn and restock_qty > 0:
+                            book = books_by_isbn.get(isbn)
+                            if book:
+                                decisions.append((book, restock_qty))
+                                total_restock += restock_qty
+
+                    log.info(f"Total books to restock: {total_restock}")
+                    log.info(f"Number of different books to restock: {len(decisions)}")
+                    if decisions:
+                        log.info("First 5 restocking decisions:")
+                        for book, qty in decisions[:5]:
+                            log.info(f"  - {book.title}: {qty} copies")
+
+                    # After getting decisions, apply them to stock
+                    if decisions:
+                        self.apply_restock([book.row for book, _ in decisions],
+                                           [quantity for _, quantity in decisions])
+                        for book, quantity in decisions:
+                            log.debug(f"Restocked {book.title}: added {quantity} (new total: {self.stock[book]})")
+
+                        total_after = self.aggregates.total
+                        log.info(f"Books after restocking: {total_after}")
+
+                    self._remember_plan(plan_key, decisions)
+                    # After getting decisions and applying them, collect and compare metrics
+                    after_metrics = self._collect_metrics(current_date, decisions, prefix="Timefold ")
+                    self._print_metrics_comparison(before_metrics, after_metrics, "Timefold ")
+                    return decisions, after_metrics
+                else:
+                    log.warning(f"Unexpected solution format: {solution_data}")
+                    fallback_decisions = self._basic_restock()
+                    after_metrics = self._collect_metrics(current_date, fallback_decisions, prefix="Timefold Fallback ")
+                    self._print_metrics_comparison(before_metrics, after_metrics, "Timefold Fallback ")
+                    return fallback_decisions, after_metrics
+
+            log.warning("Optimization timed out or was cancelled - falling back to basic optimization")
             fallback_decisions = self._basic_restock()
             after_metrics = self._collect_metrics(current_date, fallback_decisions, prefix="Timefold Fallback ")
             self._print_metrics_comparison(before_metrics, after_metrics, "Timefold Fallback ")
@@ -335,6 +425,57 @@ class Store:
             self._print_metrics_comparison(before_metrics, after_metrics, "Timefold Fallback ")
             return fallback_decisions, after_metrics
 
+    def _submit_solve(self, current_stock):
+        """
+        Post a restock problem to the solver service and return its job id.
+        While the service's solve queue is full (429) the post is retried
+        after the Retry-After it suggests, for up to SOLVE_TIMEOUT.
+        """
+        deadline = time.monotonic() + SOLVE_TIMEOUT
+        while True:
+            response = requests.post(
+                "http://localhost:8080/optimize-restock",
+                json=current_stock,
+                timeout=120
+            )
+            if response.status_code != 429:
+                response.raise_for_status()
+                return response.json()
+            retry_after = float(response.headers.get("Retry-After", 1))
+            if time.monotonic() + retry_after >= deadline:
+                response.raise_for_status()
+            log.info(f"Solver queue is full, retrying in {retry_after:.0f}s")
+            time.sleep(retry_after)
+
+    def _wait_for_solution(self, job_id):
+        """
+        Long-poll the solver service until the job is solved; returns the
+        solution JSON, or None when the job was cancelled or
+        SOLVE_TIMEOUT runs out. A failed job raises RuntimeError.
+        """
+        deadline = time.monotonic() + SOLVE_TIMEOUT
+        while time.monotonic() < deadline:
+            wait = min(LONG_POLL_SECONDS, max(deadline - time.monotonic(), 0))
+            response = self.session.get(
+                f"http://localhost:8080/solutions/{job_id}",
+                params={"wait": wait},
+                timeout=wait + 10
+            )
+            response.raise_for_status()
+            solution = response.json()
+            status = solution.get("status")
+            if status is None:
+                # A service without long-poll support ignores wait and answers with the unsolved problem
+                raise RuntimeError("Solver service does not report a solution status; it needs ?wait= support")
+            log.debug(f"Job {job_id}: {status}")
+            if status == "SOLVED":
+                return solution
+            if status == "CANCELLED":
+                return None
+            if status == "FAILED":
+                raise RuntimeError(f"Solver job {job_id} failed")
+        return None
+
     def _basic_restock(self) -> List[Tuple[Book, int]]:
         """Fallback method for basic restocking"""
         decisions = []
@@ -344,56 +485,104 @@ class Store:
                 restock_amount = 10 - current_stock
                 decisions.append((book, restock_amount))
                 # Apply the restock immediately
-                if book in self.stock:
-                    self.stock[book] += restock_amount
-                else:
-                    self.stock[book] = restock_amount
+                self._add_stock(book, restock_amount)
         return decisions
 
-    def restock_alternative(self, current_date):
-        """Use alt_solver to optimize restocking without Timefold."""
+    def restock_alternative(self, current_date, time_budget=None, termination=None, on_best=None, starts=None):
+        """
+        Use alt_solver to optimize restocking without Timefold.
+
+        time_budget (seconds, default self.alternative_time_budget) runs the
+        solver against the clock instead of for a fixed number of
+        iterations; termination gives full control (see alt_solver.Termination).
+        starts (default self.alternative_starts) above 1 runs that many
+        searches in the store's worker processes (kept until close()) and
+        keeps the best; on_best is only used by the single search.
+        """
         # Collect metrics before restocking
         before_metrics = self._collect_metrics(current_date)
         
-        current_total = sum(self.stock.values())
+        current_total = self.aggregates.total
         remaining_capacity = self.storage_capacity - current_total
         
-        # Collect initial metrics
-        initial_metrics = self._collect_metrics(current_date)
-        log.info(f"Books before alternative restocking: {initial_metrics['before_total']}")
+        log.info(f"Books before alternative restocking: {before_metrics['before_total']}")
         
         # Create a diverse selection of books (similar to timefold_optimized)
-        # Take some high-rated books with random noise in rating
-        top_rated = sorted(
-            self.inventory.books,
-            key=lambda x: float(x.average_rating if x.average_rating else 0) + random.uniform(-0.2, 0.2)
-        )[:1000]  # Keep exactly 1000 top books
-        
-        # Take random books from remaining
-        remaining_books = [b for b in self.inventory.books if b not in top_rated]
-        random_selection = random.sample(remaining_books, 
-                                      min(2000+remaining_capacity, len(remaining_books)))
-        
-        # Combine and shuffle the selection
-        candidate_books = random.sample(top_rated + random_selection, 
-                                    len(top_rated) + len(random_selection))
+        candidate_rows = self.restock_candidates(remaining_capacity)
+        candidate_books = self.inventory.catalog.books_at(candidate_rows)
+        plan_key, prior_plan = self._prior_plan(current_date.month, remaining_capacity, candidate_rows)
         
         log.info(f"Selected {len(candidate_books)} books for optimization")
         
-        decisions = alt_solve(self, candidate_books, remaining_capacity, current_date)
+        if termination is None:
+            time_budget = time_budget if time_budget is not None else self.alternative_time_budget
+            if time_budget is not None:
+                termination = Termination.time_budget(time_budget)
+        starts = starts if starts is not None else self.alternative_starts
+        if starts > 1:
+            if self._search_pool is None:
+                self._search_pool = search_pool(starts)
+            decisions = alt_solve_multistart(self, candidate_books, remaining_capacity, current_date,
+                                             starts=starts, termination=termination, warm_start=prior_plan,
+                                             executor=self._search_pool)
+        else:
+            decisions = alt_solve(self, candidate_books, remaining_capacity, current_date,
+                                  termination=termination, on_best=on_best, warm_start=prior_plan)
+        self._remember_plan(plan_key, decisions)
         
         # Apply decisions to actual stock
-        for book, quantity in decisions:
-            if book in self.stock:
-                self.stock[book] += quantity
-            else:
-                self.stock[book] = quantity
+        self.apply_restock([book.row for book, _ in decisions], [quantity for _, quantity in decisions])
         
         # After decisions are made and applied, collect and compare metrics
         after_metrics = self._collect_metrics(current_date, decisions, prefix="Alternative ")
         self._print_metrics_comparison(before_metrics, after_metrics, "Alternative ")
         return decisions, after_metrics
 
+    def restock_population(self, current_date, config=None):
+        """Use population_solver (cross-entropy, default self.population_config) to restock."""
+        before_metrics = self._collect_metrics(current_date)
+        remaining_capacity = self.storage_capacity - self.aggregates.total
+        log.info(f"Books before population restocking: {before_metrics['before_total']}")
+
+        candidate_rows = self.restock_candidates(remaining_capacity)
+        candidate_books = self.inventory.catalog.books_at(candidate_rows)
+        plan_key, prior_plan = self._prior_plan(current_date.month, remaining_capacity, candidate_rows)
+        log.info(f"Selected {len(candidate_books)} books for optimization")
+
+        decisions = population_solve(self, candidate_books, remaining_capacity, current_date,
+                                     config or self.population_config, warm_start=prior_plan)
+        self._remember_plan(plan_key, decisions)
+        self.apply_restock([book.row for book, _ in decisions], [quantity for _, quantity in decisions])
+
+        after_metrics = self._collect_metrics(current_date, decisions, prefix="Population ")
+        self._print_metrics_comparison(before_metrics, after_metrics, "Population ")
+        return decisions, after_metrics
+
+    def restock_greedy(self, current_date, config=None):
+        """
+        Use greedy_solver (default self.greedy_config) to restock.
+
+        The metrics also carry the plan's cost, the solver's lower bound on
+        the optimal cost and the relative gap between them.
+        """
+        before_metrics = self._collect_metrics(current_date)
+        remaining_capacity = self.storage_capacity - self.aggregates.total
+        log.info(f"Books before greedy restocking: {before_metrics['before_total']}")
+
+        candidate_rows = self.restock_candidates(remaining_capacity)
+        candidate_books = self.inventory.catalog.books_at(candidate_rows)
+        # Deterministic and fast, so it needs no warm start; its plan still
+        # seeds whatever solver runs next
+        decisions, result = greedy_solve(self, candidate_books, remaining_capacity, current_date,
+                                         config or self.greedy_config)
+        self._remember_plan(PlanCache.key(current_date.month, remaining_capacity, candidate_rows), decisions)
+        self.apply_restock([book.row for book, _ in decisions], [quantity for _, quantity in decisions])
+
+        after_metrics = self._collect_metrics(current_date, decisions, prefix="Greedy ")
+        after_metrics.update(plan_cost=result.cost, cost_bound=result.bound, optimality_gap=result.gap)
+        self._print_metrics_comparison(before_metrics, after_metrics, "Greedy ")
+        return decisions, after_metrics
+
     def _print_metrics_comparison(self, before_metrics, after_metrics, prefix=""):
         """Helper method to print metrics comparison."""
         log.info(f"\n{prefix}Restock Metrics:")
@@ -406,7 +595,7 @@ class Store:
 # Example usage
 if __name__ == "__main__":
     inventory = Inventory()
-    inventory.load_from_dataset("data/catalog.csv")
+    inventory.load_from_dataset("data/catalog.csv", use_cache=True)
     store = Store(inventory, storage_capacity=5)
     store.list_stock()
 
@@ -414,7 +603,7 @@ if __name__ == "__main__":
     for _ in range(10):
         if store.stock:
             book = random.choice(list(store.stock.keys()))
-            store.sell_book(book.title, quantity=random.randint(1,2))
+            store.sell_book(isbn=book.isbn, quantity=random.randint(1,2))
         else:
             log.debug("No more books available to sell.")
             break
@@ -0,0 +1,82 @@
+import json
+import os
+
+import numpy as np
+
+from catalog_cache import CACHE_DIR_NAME, cached_catalog
+from conftest import write_catalog_csv
+from inventory import build_catalog
+
+
+class CountingBuild:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, path):
+        self.calls += 1
+        return build_catalog(path)
+
+
+def manifest_path(tmp_path):
+    (path,) = (tmp_path / CACHE_DIR_NAME).glob("*.json")
+    return path
+
+
+def assert_same_catalog(left, right):
+    assert len(left) == len(right)
+    for name in ("title", "isbn", "publication_date", "author_code", "genre_code", "price", "rating", "pages"):
+        assert getattr(left, name).tolist() == getattr(right, name).tolist(), name
+    assert list(left.authors) == list(right.authors) and list(left.genres) == list(right.genres)
+
+
+def test_snapshot_is_reused_until_the_csv_changes(tmp_path):
+    csv = write_catalog_csv(tmp_path / "catalog.csv")
+    build = CountingBuild()
+    first, meta = cached_catalog(csv, build)
+    second, cached_meta = cached_catalog(csv, build)
+    assert build.calls == 1
+    assert cached_meta["loaded"] == meta["loaded"] == 200
+    assert_same_catalog(first, second)
+
+    # Touched but unchanged: the hash matches, and the manifest learns the new mtime
+    stat = os.stat(csv)
+    os.utime(csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    cached_catalog(csv, build)
+    assert build.calls == 1
+    assert json.loads(manifest_path(tmp_path).read_text())["source"]["mtime_ns"] == stat.st_mtime_ns + 10**9
+
+    # Same size, different content
+    csv.write_text(csv.read_text().replace("Author 1,", "Author 2,", 1))
+    changed, _ = cached_catalog(csv, build)
+    assert build.calls == 2
+    assert_same_catalog(changed, build_catalog(csv)[0])
+    assert len(list((tmp_path / CACHE_DIR_NAME).iterdir())) == 2  # new manifest target, old snapshot removed
+
+
+def test_corrupt_or_missing_manifest_rebuilds(tmp_path):
+    csv = write_catalog_csv(tmp_path / "catalog.csv")
+    build = CountingBuild()
+    cached_catalog(csv, build)
+    manifest_path(tmp_path).write_text("{not json")
+    catalog, _ = cached_catalog(csv, build)
+    assert build.calls == 2 and len(catalog) == 200
+
+    manifest_path(tmp_path).unlink()
+    cached_catalog(csv, build)
+    assert build.calls == 3
+    cached_catalog(csv, build)
+    assert build.calls == 3
+
+
+def test_round_trip_matches_the_csv_including_missing_dates(tmp_path):
+    csv = write_catalog_csv(tmp_path / "catalog.csv")
+    lines = csv.read_text().splitlines()
+    lines[3] = lines[3].replace(",1/1/2000,", ",,")
+    csv.write_text("\n".join(lines) + "\n")
+
+    uncached, _ = build_catalog(csv)
+    cached_catalog(csv, build_catalog)
+    cached, _ = cached_catalog(csv, build_catalog)
+    assert uncached.publication_date[2] is None and cached.publication_date[2] is None
+    assert_same_catalog(uncached, cached)
+    assert isinstance(cached.price, np.memmap)
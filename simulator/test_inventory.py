@@ -0,0 +1,79 @@
+import gc
+import random
+
+import pandas as pd
+
+from catalog import Book
+from conftest import isbn13, make_inventory
+from inventory import CATALOG_COLUMNS, clean_catalog_frame, is_valid_isbn, valid_isbn_mask
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=list(CATALOG_COLUMNS)).astype(object)
+
+
+def test_clean_catalog_frame_counts_each_reject_once():
+    rng = random.Random(5)
+    good = [isbn13(rng) for _ in range(3)]
+    df = frame([
+        ["Kept", "A", "Fiction", "£5.00", good[0], "1/1/2000", "4.1", "200"],
+        ["Duplicate kept", "A", None, "£6.50", good[0], None, "4.2", "120"],
+        ["Bad isbn", "B", "Fiction", "£5.00", "9780000000000", "1/1/2000", "4.0", "100"],
+        ["No isbn", "B", "Fiction", "£5.00", None, "1/1/2000", "4.0", "100"],
+        [None, "C", "Fiction", "£5.00", good[1], "1/1/2000", "4.0", "100"],
+        ["Bad price", "C", "Fiction", "five", good[1], "1/1/2000", "4.0", "100"],
+        # Fails the price and the rating check; counted under price only
+        ["Bad both", "C", "Fiction", "", good[2], "1/1/2000", "n/a", "100"],
+        ["Bad rating", "C", "Fiction", "£5.00", good[2], "1/1/2000", "n/a", "100"],
+        ["Half page", None, "Fiction", " £7.25 ", "0-306-40615-2", "1/1/2000", "3.9", "10.5"],
+        ["Isbn-10", None, "Mystery", " £7.25 ", "0-306-40615-2", "1/1/2000", "3.9", "90"],
+    ])
+    columns, report = clean_catalog_frame(df)
+
+    assert report.rejected == {
+        'missing_title': 1, 'missing_isbn': 1, 'invalid_isbn': 1,
+        'invalid_price': 2, 'invalid_rating': 1, 'invalid_num_pages': 1,
+    }
+    assert report.loaded == 3 and report.total_rejected == 7
+    # Duplicate ISBNs are not rejected, as before
+    assert columns['title'].tolist() == ["Kept", "Duplicate kept", "Isbn-10"]
+    assert columns['isbn'].tolist() == [good[0], good[0], "0-306-40615-2"]
+    assert columns['price'].tolist() == [5.0, 6.5, 7.25]
+    assert columns['average_rating'].tolist() == [4.1, 4.2, 3.9]
+    assert columns['num_pages'].tolist() == [200, 120, 90]
+    assert columns['authors'].tolist() == ["A", "A", ""]
+    assert columns['genre'].tolist() == ["Fiction", "Unknown", "Mystery"]
+    assert columns['publication_date'].tolist() == ["1/1/2000", None, "1/1/2000"]
+
+
+def test_valid_isbn_mask_matches_is_valid_isbn():
+    rng = random.Random(9)
+    isbns = [None, "", "X", "0-306-40615-2", "0306406152", "080442957X", "080442957x",
+             "97803064061571", "978-0-306-40615-7", "978 0 306 40615 7", "١٢٣٤٥٦٧٨٩٠", "²306406152"]
+    isbns += [isbn13(rng) for _ in range(200)]
+    # Near misses: random strings over ISBN characters, around the valid lengths
+    for _ in range(3000):
+        isbns.append("".join(rng.choice("0123456789Xx- ") for _ in range(rng.randint(8, 16))))
+    # Valid ISBN-10s, some with an X check digit
+    for _ in range(500):
+        digits = [rng.randrange(10) for _ in range(9)]
+        check = -sum(d * (10 - i) for i, d in enumerate(digits)) % 11
+        isbns.append("".join(map(str, digits)) + ("X" if check == 10 else str(check)))
+
+    expected = [is_valid_isbn(isbn) for isbn in isbns]
+    assert valid_isbn_mask(isbns).tolist() == expected
+    assert sum(expected) > 700
+
+
+def test_book_views_live_only_while_referenced():
+    inventory = make_inventory(n=50)
+    catalog = inventory.catalog
+    held = catalog.book(3)
+    assert all(catalog.book(row) is book for row, book in enumerate(list(inventory.books)))
+    gc.collect()
+    assert list(catalog._views) == [3] and catalog.book(3) is held
+
+    book = Book("Standalone", "Someone", "Fiction", 9.5, "isbn-x", average_rating=4.0, num_pages=10)
+    inventory.add_book(book)
+    assert book.catalog is catalog and catalog.book(book.row) is book
+    assert (book.title, book.price) == ("Standalone", 9.5)
@@ -0,0 +1,55 @@
+import math
+
+import numpy as np
+import pytest
+
+from conftest import write_catalog_csv
+from montecarlo import RESTOCK_FIELDS, Z_95, confidence_interval, replications, run_monte_carlo, summarize
+
+
+def test_replications_reuse_seed_streams():
+    tasks = replications(("basic", "greedy"), (300, 600), 3, seed=5)
+    assert len(tasks) == 12
+    state = lambda task: task.seed.generate_state(4).tolist()
+    assert [state(t) for t in tasks] == [state(t) for t in replications(("basic", "greedy"), (300, 600), 3, seed=5)]
+    # Replicate i of every configuration shares one stream (common random numbers)
+    by_replicate = {}
+    for task in tasks:
+        by_replicate.setdefault(task.replicate, set()).add(tuple(state(task)))
+    assert all(len(streams) == 1 for streams in by_replicate.values())
+    assert len({next(iter(streams)) for streams in by_replicate.values()}) == 3
+    assert state(replications(("basic",), (300,), 1, seed=6)[0]) != state(tasks[0])
+
+
+def test_confidence_interval_known_values():
+    ci = confidence_interval([1.0, 2.0, 3.0, 4.0, math.nan])
+    std = math.sqrt(5 / 3)
+    assert ci['n'] == 4 and ci['mean'] == 2.5 and ci['std'] == pytest.approx(std)
+    assert ci['ci_low'] == pytest.approx(2.5 - Z_95 * std / 2)
+    assert ci['ci_high'] == pytest.approx(2.5 + Z_95 * std / 2)
+    assert confidence_interval([7.0]) == {'n': 1, 'mean': 7.0, 'std': 0.0, 'ci_low': 7.0, 'ci_high': 7.0}
+    assert math.isnan(confidence_interval([])['mean'])
+
+
+def test_summarize_groups_by_configuration():
+    results = [{'solver_type': solver, 'storage_capacity': 300, 'total_sold': sold, 'total_revenue': 10.0 * sold,
+                'mean_restock_quantity': 1.0, 'mean_after_total': 300.0, 'mean_after_avg_rating': 4.0,
+                'mean_after_seasonal_matches': math.nan, 'mean_after_affordable_percentage': 50.0}
+               for solver, sold in (("basic", 10), ("basic", 20), ("greedy", 30))]
+    summary = summarize(results)
+    assert set(summary) == {("basic", 300), ("greedy", 300)}
+    assert summary[("basic", 300)]['total_sold']['mean'] == 15
+    assert summary[("basic", 300)]['total_revenue']['n'] == 2
+    assert summary[("greedy", 300)]['total_sold']['std'] == 0.0
+    assert summary[("basic", 300)]['mean_after_seasonal_matches']['n'] == 0
+
+
+def test_run_monte_carlo_is_reproducible(tmp_path):
+    dataset = write_catalog_csv(tmp_path / "catalog.csv")
+    runs = [run_monte_carlo(str(dataset), ("basic",), (300,), count=2, days=8, seed=1, processes=1)
+            for _ in range(2)]
+    assert len(runs[0]) == 2 and [r['replicate'] for r in runs[0]] == [0, 1]
+    # Eight days include the weekly restock, so every metric is a number
+    assert all(np.isfinite([r['total_revenue']] + [r[f"mean_{field}"] for field in RESTOCK_FIELDS]).all()
+               for r in runs[0])
+    assert runs[0] == runs[1]
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from sales_log import SalesEventSink, export_text, read_sales
+from conftest import make_inventory
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_binary_round_trip_across_flushes(tmp_path, background):
+    catalog = make_inventory(50).catalog
+    path = tmp_path / "sales.bin"
+    day = datetime(2025, 1, 1)
+    rows = np.arange(0, 50, 3)
+    with SalesEventSink(path, buffer_size=4, background=background) as sink:
+        sink.record(day, rows, np.ones(len(rows), dtype=np.int64), catalog.price[rows])
+        sink.record_sale(day, 7, 2, catalog.price[7])
+
+    records = read_sales(path)
+    assert records["row"].tolist() == rows.tolist() + [7]
+    assert records["quantity"].tolist() == [1] * len(rows) + [2]
+    assert set(records["day"].tolist()) == {day.toordinal()}
+    assert np.allclose(records["price"], catalog.price[records["row"]])
+
+
+def test_text_export_matches_text_sink(tmp_path):
+    catalog = make_inventory(20).catalog
+    day = datetime(2025, 3, 9)
+    with SalesEventSink(tmp_path / "sales.bin") as binary, \
+            SalesEventSink(tmp_path / "sales.log", catalog, fmt="text", buffer_size=2) as text:
+        for sink in (binary, text):
+            sink.record(day, [3, 5, 11], [1, 4, 2], catalog.price[[3, 5, 11]])
+
+    export_text(tmp_path / "sales.bin", tmp_path / "export.log", catalog)
+    lines = (tmp_path / "export.log").read_text().splitlines()
+    assert lines == (tmp_path / "sales.log").read_text().splitlines()
+    assert lines[1] == f"2025-03-09 - Sold ISBN: {catalog.isbn[5]}, Quantity: 4"
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from catalog import Catalog
+from seasonal import (SEASONAL_KEYWORDS, CUSTOMER_MODE, METRICS_MODE, SOLVER_MODE,
+                      KeywordMatcher, SeasonalIndex, SeasonalMode, book_text)
+
+
+def naive_count(text, month, mode):
+    if not mode.case_sensitive:
+        return sum(1 for k in SEASONAL_KEYWORDS[month] if k.lower() in text.lower())
+    return sum(1 for k in SEASONAL_KEYWORDS[month] if k in text)
+
+
+@pytest.fixture
+def catalog():
+    catalog = Catalog()
+    catalog.append("The Christmas Carol", "Charles Dickens", "Classics", 7.5, "1")
+    catalog.append("harry potter", "j.k. rowling", "Fantasy", 9.0, "2")
+    catalog.append("Blossoming Meadows", "Ann Smith", "Nature", 6.0, "3")
+    catalog.append("Quiet Numbers", "Bob Jones", "Mystery", 12.0, "4")
+    catalog.append("Plain Title", "Nobody", "Romance", 5.0, "5")
+    return catalog
+
+
+def test_matcher_finds_overlapping_and_nested_patterns():
+    matcher = KeywordMatcher(["Blossom", "Blossoms", "Blossoming", "Som"])
+    found = {matcher.patterns[i] for i in matcher.match_ids("Blossoming")}
+    assert found == {"Blossom", "Blossoming"}
+    found = {matcher.patterns[i] for i in matcher.match_ids("Blossoms Somewhere")}
+    assert found == {"Blossom", "Blossoms", "Som"}
+
+
+def test_case_sensitive_mode_ignores_lowercase_text(catalog):
+    index = catalog.seasonal(CUSTOMER_MODE)
+    assert not index.matches(1, 12)  # "harry potter" vs "Potter"
+    assert catalog.seasonal(SOLVER_MODE).matches(1, 12)
+
+
+def test_genre_is_only_matched_when_included(catalog):
+    # "Romance" is a February keyword and only appears as the genre of row 4
+    assert not catalog.seasonal(SOLVER_MODE).matches(4, 2)
+    assert catalog.seasonal(METRICS_MODE).matches(4, 2)
+
+
+def test_counts_include_duplicate_keyword_entries():
+    # "Magic" is listed twice for December
+    index = SeasonalIndex.build(["Magic"], SOLVER_MODE)
+    assert index.count(0, 12) == SEASONAL_KEYWORDS[12].count("Magic") == 2
+    assert index.mask[0] == sum(1 << (m - 1) for m, words in SEASONAL_KEYWORDS.items() if "Magic" in words)
+
+
+@pytest.mark.parametrize("mode", [CUSTOMER_MODE, SOLVER_MODE, METRICS_MODE,
+                                  SeasonalMode(case_sensitive=True, include_genre=True)])
+def test_index_agrees_with_keyword_loop(catalog, mode):
+    index = catalog.seasonal(mode)
+    for row in range(len(catalog)):
+        genre = catalog.genres[catalog.genre_code[row]] if mode.include_genre else None
+        text = book_text(catalog.title[row], catalog.authors[catalog.author_code[row]], genre)
+        for month in range(1, 13):
+            assert index.count(row, month) == naive_count(text, month, mode)
+            assert index.matches(row, month) == (naive_count(text, month, mode) > 0)
+    assert np.array_equal(index.month_matches(12), index.month_counts(12) > 0)
+
+
+def test_index_is_rebuilt_after_catalog_grows(catalog):
+    assert len(catalog.seasonal().mask) == len(catalog)
+    catalog.append("Snow Day", "Someone", "Fiction", 5.0, "6")
+    assert catalog.seasonal().matches(len(catalog) - 1, 12)
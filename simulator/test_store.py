@@ -0,0 +1,444 @@
+import random
+from datetime import datetime
+from unittest import mock
+
+import pytest
+
+import numpy as np
+
+from alt_solver import (RestockState, Termination, alt_solve_multistart, build_problem, initial_plan, new_state,
+                        search_pool)
+from candidates import CandidateMix, select_candidates
+from conftest import churn, make_inventory
+from features import FeatureTable, cost_matrix, cost_vector, unit_cost
+from greedy_solver import GreedyConfig, _value_order, cost_bound, greedy_plan
+from main import simulate_sales
+from plan_cache import PlanCache, remap_plan
+from population_solver import PopulationConfig, population_solve
+from preference_pools import CHEAP_PRICE, HIGH_RATING
+from seasonal import CUSTOMER_MODE, METRICS_MODE
+from stock_vector import StockVector
+from store import Store
+
+
+def test_pools_match_stock_after_sales_and_restocks(store):
+    churn(store)
+    pools = store.preference_pools
+    catalog = store.inventory.catalog
+    seasonal = catalog.seasonal(CUSTOMER_MODE)
+    rows = {book.row for book in store.stock}
+
+    def expected(predicate):
+        return {row for row in rows if predicate(row)}
+
+    high = lambda r: catalog.rating[r] >= HIGH_RATING
+    cheap = lambda r: catalog.price[r] <= CHEAP_PRICE
+    assert set(pools.high_rated) == expected(high)
+    assert set(pools.by_price) == rows
+    assert set(pools.good) == expected(lambda r: high(r) and cheap(r))
+    for month in range(1, 13):
+        in_month = lambda r: seasonal.matches(r, month)
+        assert set(pools.seasonal_by_price[month - 1]) == expected(in_month)
+        cheapest = pools.seasonal_by_price[month - 1].cheapest(CHEAP_PRICE)
+        candidates = expected(lambda r: cheap(r) and in_month(r))
+        if candidates:
+            assert catalog.price[cheapest] == min(catalog.price[r] for r in candidates)
+        else:
+            assert cheapest is None
+        for genre in catalog.genres:
+            pool = pools.genre_pool(genre, month)
+            assert set(pool or ()) == expected(
+                lambda r: in_month(r) and catalog.genres[catalog.genre_code[r]] == genre)
+
+
+def brute_metrics(store, month):
+    seasonal = store.inventory.catalog.seasonal(METRICS_MODE)
+    total = sum(store.stock.values())
+    affordable = sum(qty for book, qty in store.stock.items() if book.price <= 8.0)
+    return {
+        'total': total,
+        'avg_rating': sum(book.average_rating * qty for book, qty in store.stock.items()) / total,
+        'seasonal_matches': sum(1 for book in store.stock if seasonal.matches(book.row, month)),
+        'affordable_books': affordable,
+        'affordable_percentage': affordable / total * 100,
+    }
+
+
+def test_aggregates_match_stock(store):
+    churn(store)
+    for month in range(1, 13):
+        assert store.stock_metrics(datetime(2025, month, 1)) == pytest.approx(brute_metrics(store, month))
+
+
+def test_restock_metrics_report_exact_before_state(store):
+    churn(store)
+    for book in list(store.stock)[::2]:
+        store.sell_book(isbn=book.isbn, quantity=store.stock[book])
+    before = brute_metrics(store, datetime.now().month)
+    _, metrics = store.restock()
+    assert {key: metrics[f'before_{key}'] for key in before} == pytest.approx(before)
+    assert metrics['after_total'] == store.storage_capacity
+
+
+def test_indexes_follow_stock(store):
+    churn(store)
+    assert set(store.stock_index.by_isbn) == {book.isbn for book in store.stock}
+    book = next(iter(store.stock))
+    assert store.find_in_stock(title=book.title) is book
+    store.sell_book(isbn=book.isbn, quantity=store.stock[book])
+    assert store.find_in_stock(isbn=book.isbn) is None
+    assert book.row not in store.preference_pools.by_author.get(int(book.catalog.author_code[book.row]), ())
+
+
+def test_sell_by_title_needs_the_exact_title(store):
+    churn(store)
+    book = next(iter(store.stock))
+    loose = "  " + book.title.upper().replace(" ", "   ")
+    assert store.find_in_stock(title=loose) is None
+    assert store.sell_book(title=loose) is None
+    assert store.stock_index.find_title_normalized(loose) is book
+    assert store.sell_book(title=book.title) is book
+
+
+def test_customer_choices_come_from_stock(store):
+    from customer import Customer
+    churn(store)
+    random.seed(5)
+    date = datetime(2025, 12, 3)
+    for customer in Customer.generate_customer_profiles(100, store):
+        book = customer.choose_book(store, date)
+        assert book is None or book in store.stock
+
+
+def test_price_limit_changes_price_driven_choices(store):
+    from customer import CustomerPopulation, PREFERENCE_TYPES, ProfileMix
+    from demand import PRICE, resolve_choices
+
+    churn(store)
+    catalog = store.inventory.catalog
+    prices = sorted(book.price for book in store.stock)
+    date = datetime(2025, 12, 3)
+    price_code = PREFERENCE_TYPES.index("price")
+    for limit in (prices[0] - 0.01, prices[0], prices[len(prices) // 2], prices[-1]):
+        population = CustomerPopulation(catalog, ProfileMix(price_limit=limit))
+        customer = population.customer(price_code, -1)
+        assert customer.preference_value == limit
+        random.seed(1)
+        choices = {customer.choose_book(store, date) for _ in range(50)}
+        assert all(book is None or book.price <= limit for book in choices)
+        batched = resolve_choices(store, np.full(50, PRICE, dtype=np.int8), np.full(50, -1),
+                                  date.month, np.random.default_rng(1), price_limit=limit)
+        assert all(row < 0 or catalog.price[row] <= limit for row in batched.tolist())
+        if limit < prices[0]:
+            assert choices == {None} and (batched < 0).all()
+        if limit == prices[-1]:
+            # Everything in stock is affordable, so someone always buys
+            assert (batched >= 0).any()
+
+
+def test_batched_day_never_oversells(store):
+    import numpy as np
+    from customer import Customer
+    from demand import encode_profiles, simulate_day
+
+    before = {book.row: qty for book, qty in store.stock.items()}
+    # Few, popular preferences so many customers compete for the same titles
+    profiles = [Customer("price", 8.0)] * 5 + [Customer("rating", None)] * 5
+    rows, quantities = simulate_day(store, *encode_profiles(profiles, store.inventory.catalog), 2000,
+                                    datetime(2025, 12, 1), np.random.default_rng(0))
+    assert len(set(rows.tolist())) == len(rows)
+    for row, quantity in zip(rows.tolist(), quantities.tolist()):
+        assert 0 < quantity <= before[row]
+        assert store.stock_of(row) == before[row] - quantity
+    assert sum(before.values()) - sum(store.stock.values()) == quantities.sum()
+
+
+def test_candidates_take_the_top_rated_and_a_disjoint_random_share():
+    catalog = make_inventory().catalog
+    mix = CandidateMix(top_rated=50, random_extra=100, rating_noise=0.0)
+    rows = select_candidates(catalog, 20, np.random.default_rng(1), mix, exclude=[0, 1, 2])
+    assert len(rows) == len(set(rows.tolist())) == 170
+    assert not {0, 1, 2} & set(rows.tolist())
+    ranked = sorted(range(3, len(catalog)), key=lambda r: -catalog.rating[r])
+    cutoff = catalog.rating[ranked[49]]
+    assert sum(catalog.rating[rows] > cutoff) >= sum(catalog.rating[ranked] > cutoff)
+
+
+def test_stock_vector_bulk_updates_and_snapshots():
+    vector = StockVector(5)
+    assert vector.add([1, 3, 1, 7], [2, 1, 3, 4]).tolist() == [1, 3, 7]
+    snapshot = vector.snapshot()
+    assert vector.subtract([1, 3], [5, 1]).tolist() == [1, 3]
+    assert vector.rows().tolist() == [7] and (vector.total, vector.titles) == (4, 1)
+    assert snapshot.rows().tolist() == [1, 3, 7] and snapshot[1] == 5 and snapshot.total == 10
+    snapshot.add_one(0, 1)
+    snapshot.remove_one(3, 1)
+    assert snapshot.rows().tolist() == [0, 1, 7] and vector.rows().tolist() == [7]
+
+
+def test_stock_vector_rows_follow_stock(store):
+    churn(store, steps=600)
+    vector = store.stock_vector
+    assert vector.rows().tolist() == np.flatnonzero(vector.quantities).tolist()
+    assert len(vector.rows()) == vector.titles
+
+
+def test_stock_view_writes_keep_store_in_sync(store):
+    book = next(iter(store.stock))
+    outside = next(b for b in store.inventory.books if b not in store.stock)
+    store.stock[book] = 0
+    store.stock[outside] = 4
+    assert book not in store.stock and store.stock[outside] == 4
+    assert store.find_in_stock(isbn=outside.isbn) is outside
+    assert store.find_in_stock(isbn=book.isbn) is None
+    assert store.stock_metrics(datetime(2025, 1, 1)) == pytest.approx(brute_metrics(store, 1))
+    assert sum(store.stock.values()) == store.stock_vector.total
+
+
+def test_fork_is_isolated_and_replays_the_same_restock(store):
+    churn(store)
+    before = dict(store.stock)
+    first, second = store.fork(), store.fork()
+    decisions_a, _ = first.restock()
+    decisions_b, _ = second.restock()
+    assert [(b.row, q) for b, q in decisions_a] == [(b.row, q) for b, q in decisions_b]
+    assert dict(store.stock) == before and first.stock_vector.total == store.storage_capacity
+    assert set(first.preference_pools.high_rated) == {
+        book.row for book in first.stock if book.average_rating >= HIGH_RATING}
+
+
+def test_restock_state_cost_matches_a_full_recount():
+    rng = random.Random(4)
+    unit_costs = [rng.uniform(-150, 80) for _ in range(60)]
+    authors = [f"Author {rng.randrange(25)}" for _ in range(60)]
+    state = RestockState(unit_costs, authors, capacity=300)
+    for _ in range(2000):
+        index = rng.randrange(60)
+        old = state.set_quantity(index, rng.choice([0, 0, rng.randint(1, 20)]))
+        if rng.random() < 0.3:
+            state.set_quantity(index, old)  # undo
+        plan = state.plan()
+        total = sum(plan.values())
+        distinct = len({authors[i] for i in plan})
+        expected = (sum(unit_costs[i] * q for i, q in plan.items()) - 50 * distinct
+                    + 200 * max(0, 20 - distinct) + ((300 - total) * 10 if total < 240 else 0))
+        assert state.cost() == (float('inf') if total > 300 else pytest.approx(expected))
+
+
+def test_alternative_restock_streams_an_improving_trajectory(store):
+    churn(store)
+    trajectory = []
+    store.restock_alternative(datetime(2025, 12, 1), on_best=lambda i, t, cost, plan: trajectory.append((i, cost)),
+                              termination=Termination(max_iterations=3000, unimproved_iterations=500))
+    costs = [cost for _, cost in trajectory]
+    assert costs == sorted(costs, reverse=True) and len(set(costs)) == len(costs)
+    assert trajectory[-1][0] <= 3000
+    assert store.stock_vector.total <= store.storage_capacity
+
+
+def test_multistart_is_reproducible_and_no_worse_than_its_start(store):
+    churn(store)
+    date = datetime(2025, 12, 1)
+    remaining = store.storage_capacity - store.stock_vector.total
+    books = store.inventory.catalog.books_at(store.restock_candidates(remaining))
+    problem = build_problem(store, books, remaining, date)
+    start = new_state(problem)
+    for i, qty in initial_plan(problem, random.Random(0)).items():
+        start.set_quantity(i, qty)
+
+    runs = []
+    for branch in (store.fork(), store.fork()):
+        decisions = alt_solve_multistart(branch, books, remaining, date, starts=3, rounds=2,
+                                         termination=Termination(max_iterations=400), processes=2)
+        runs.append([(book.row, qty) for book, qty in decisions])
+    with search_pool(2) as pool:
+        decisions = alt_solve_multistart(store.fork(), books, remaining, date, starts=3, rounds=2,
+                                         termination=Termination(max_iterations=400), executor=pool)
+    runs.append([(book.row, qty) for book, qty in decisions])
+    assert runs[0] == runs[1] == runs[2]
+
+    state = new_state(problem)
+    index = {book.row: i for i, book in enumerate(books)}
+    for row, qty in runs[0]:
+        state.set_quantity(index[row], qty)
+    assert state.total <= remaining
+    assert state.cost() <= start.cost()
+
+
+def test_feature_tables_share_catalog_features_but_not_stock(store):
+    churn(store)
+    rows = store.restock_candidates(200)
+    fork = store.fork()
+    book = fork.inventory.catalog.book(rows[0])
+    fork._add_stock(book, 40)
+    features, forked = FeatureTable.build(store, rows, 12), FeatureTable.build(fork, rows, 12)
+    assert forked.price is features.price and forked.preference is features.preference
+    assert forked.stock[0] == features.stock[0] + 40
+    assert forked.unit_costs[0] == unit_cost(book.price, book.average_rating, int(features.seasonal[0]),
+                                             fork.stock_of(book.row))
+    assert FeatureTable.build(store, rows, 11).seasonal is not features.seasonal
+
+
+def test_vectorized_cost_matches_the_incremental_state(store):
+    churn(store)
+    rows = store.restock_candidates(200)
+    features = FeatureTable.build(store, rows, 12)
+    assert features.unit_costs.tolist() == [
+        unit_cost(book.price, book.average_rating, int(features.seasonal[i]), store.stock_of(book.row))
+        for i, book in enumerate(store.inventory.catalog.books_at(rows))]
+
+    rng = np.random.default_rng(5)
+    plans = rng.integers(0, 4, size=(50, len(rows))) * (rng.random((50, len(rows))) < 0.05)
+    costs = cost_matrix(features, plans, capacity=300)
+    for plan, cost in zip(plans, costs):
+        state = RestockState(features.unit_costs.tolist(), features.author.tolist(), 300)
+        for index in np.flatnonzero(plan):
+            state.set_quantity(int(index), int(plan[index]))
+        assert cost == pytest.approx(state.cost())
+        assert cost_vector(features, plan, 300) == pytest.approx(cost)
+
+
+def test_population_solver_fits_capacity_and_beats_its_greedy_seed(store):
+    churn(store)
+    date = datetime(2025, 12, 1)
+    remaining = store.storage_capacity - store.stock_vector.total
+    books = store.inventory.catalog.books_at(store.restock_candidates(remaining))
+    problem = build_problem(store, books, remaining, date)
+    seed = np.zeros(len(books), dtype=np.int64)
+    for i, qty in initial_plan(problem, store.fork().random).items():
+        seed[i] = qty
+
+    config = PopulationConfig(population=64, generations=20)
+    runs = [population_solve(branch, books, remaining, date, config) for branch in (store.fork(), store.fork())]
+    assert [(book.row, qty) for book, qty in runs[0]] == [(book.row, qty) for book, qty in runs[1]]
+    plan = np.zeros(len(books), dtype=np.int64)
+    index = {book.row: i for i, book in enumerate(books)}
+    for book, qty in runs[0]:
+        plan[index[book.row]] = qty
+    assert plan.sum() <= remaining
+    assert cost_vector(problem.features, plan, remaining) <= cost_vector(problem.features, seed, remaining)
+
+
+def test_greedy_plan_is_bounded_by_its_relaxation(store):
+    churn(store)
+    rows = store.restock_candidates(300)
+    features = FeatureTable.build(store, rows, 12)
+    for capacity in (0, 15, 300, 5000):
+        for config in (GreedyConfig(), GreedyConfig(decay=1.0, max_quantity=5)):
+            result = greedy_plan(features, capacity, config)
+            assert result.quantities.sum() <= capacity
+            assert result.quantities.max(initial=0) <= config.max_quantity
+            assert result.cost == pytest.approx(cost_vector(features, result.quantities, capacity))
+            assert result.bound <= result.cost
+            # Random plans within the per-title cap never beat the bound either
+            rng = np.random.default_rng(capacity)
+            plans = rng.integers(0, config.max_quantity + 1, size=(200, len(rows))) * (rng.random((200, len(rows))) < 0.1)
+            assert (cost_matrix(features, plans, capacity) >= result.bound).all()
+    assert greedy_plan(features, 300, GreedyConfig(decay=1.0)).gap < 0.05
+
+
+def test_greedy_value_order_is_a_prefix_of_the_full_order():
+    rng = np.random.default_rng(4)
+    for _ in range(300):
+        n = int(rng.integers(1, 60))
+        costs = rng.integers(-5, 5, size=n).astype(np.float64)  # many ties
+        full = np.argsort(costs, kind="stable").tolist()
+        count = int(rng.integers(1, n + 2))
+        assert _value_order(costs, count) == full[:count]
+
+
+def test_plan_cache_evicts_least_recently_used_and_remaps_plans():
+    cache = PlanCache(maxsize=2)
+    first, second, third = (PlanCache.key(12, 100, rows) for rows in ([3, 1, 2], [4, 5], [6]))
+    assert first == PlanCache.key(12, 100, [1, 2, 3])
+    cache.put(first, {1: 5})
+    cache.put(second, {4: 2})
+    assert cache.get(first) == {1: 5}
+    cache.put(third, {6: 1})
+    assert second not in cache and first in cache and third in cache
+    assert remap_plan({1: 5, 9: 3, 2: 0}, [7, 1, 2]) == {1: 5}
+
+
+def test_alternative_restock_warm_starts_from_the_last_plan(store):
+    churn(store)
+    date = datetime(2025, 12, 1)
+    store.restock_alternative(date)
+    assert store.last_plan and len(store.plan_cache) == 1
+    prior = dict(store.last_plan)
+    for row in list(prior)[: len(prior) // 2]:
+        store.apply_sales([row], [store.stock_of(row)])
+
+    remaining = store.storage_capacity - store.stock_vector.total
+    rows = store.fork().restock_candidates(remaining)
+    starts = []
+    store.restock_alternative(date, on_best=lambda i, t, cost, plan: starts.append(plan) if i == 0 else None,
+                              termination=Termination(max_iterations=0))
+    # The prior plan is carried over for rows that are still candidates, until capacity runs out
+    candidates = set(rows.tolist())
+    expected, total = {}, 0
+    for row, qty in prior.items():
+        qty = min(qty, remaining - total)
+        if qty <= 0:
+            break
+        if row in candidates:
+            expected[row] = qty
+            total += qty
+    start = {book.row: qty for book, qty in starts[0]}
+    assert expected and all(start[row] == qty for row, qty in expected.items())
+    assert sum(qty for _, qty in starts[0]) <= remaining
+
+
+
+def test_compare_policies_matches_across_executors_and_leaves_store_alone(store):
+    from whatif import compare_policies
+    churn(store)
+    date = datetime(2025, 12, 1)
+
+    def state():
+        return (dict(store.stock), store.stock_metrics(date), store.random.getstate(),
+                store.rng.bit_generator.state, len(store.plan_cache))
+
+    before = state()
+    runs = [compare_policies(store, date, policies=("basic", "greedy", "alternative"), demand_days=3,
+                             executor=executor)
+            for executor in (None, "thread", "process")]
+    assert state() == before
+    assert [result['solver_type'] for result in runs[0]] and runs[1] == runs[0] and runs[2] == runs[0]
+
+
+def test_multistart_restocks_reuse_the_store_pool(store):
+    store.alternative_starts = 2
+    date = datetime(2025, 12, 1)
+    churn(store)
+    store.restock_alternative(date, termination=Termination(max_iterations=100))
+    pool = store._search_pool
+    assert pool is not None and store.fork()._search_pool is None
+    churn(store, seed=12)
+    store.restock_alternative(date, termination=Termination(max_iterations=100))
+    assert store._search_pool is pool
+    store.close()
+    assert store._search_pool is None
+
+
+@pytest.mark.parametrize("demand_mode", ["sequential", "batched"])
+def test_random_seed_makes_unseeded_runs_reproducible(demand_mode):
+    runs = []
+    for _ in range(2):
+        random.seed(42)
+        store = Store(make_inventory(), storage_capacity=600)
+        summary = simulate_sales(store, 8, None, None, solver_type="greedy", demand_mode=demand_mode, verbose=False)
+        store.close()
+        runs.append((summary['total_sold'], summary['total_revenue'], summary['daily_sold']))
+    assert runs[0] == runs[1]
+
+
+def test_timefold_restock_falls_back_as_soon_as_the_job_fails(store):
+    churn(store)
+    failed = mock.Mock(status_code=200)
+    failed.json.return_value = {"status": "FAILED", "decisions": []}
+    with mock.patch.object(store, "_submit_solve", return_value="job"), \
+            mock.patch.object(store.session, "get", return_value=failed) as get:
+        decisions, metrics = store.restock_timefold_optimized(datetime(2025, 3, 1))
+    assert get.call_count == 1
+    assert all(store.stock_of(book.row) >= 3 for book in store.inventory.books)
+    assert metrics['after_total'] == store.aggregates.total
@@ -0,0 +1,116 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+from customer import CustomerPopulation
+from demand import simulate_day
+from main import AVG_DAILY_SALES
+from seasonal import CUSTOMER_MODE, METRICS_MODE, SOLVER_MODE
+
+log = logging.getLogger(__name__)
+
+# Forks of the store being evaluated, set in each worker process by _init_worker
+_branches = None
+
+
+def simulate_demand(store, days, start_date, population=None):
+    """
+    Run days of batched demand on a store, drawing from store.rng.
+
+    Returns (units sold, revenue, per-day (units, revenue) list).
+    """
+    catalog = store.inventory.catalog
+    population = population or CustomerPopulation(catalog)
+    rng = store.rng
+    total_sold = 0
+    total_revenue = 0.0
+    daily = []
+    current_date = start_date
+    for _ in range(days):
+        type_codes, value_ids = population.generate(100, rng)
+        ds = max(0, int(rng.normal(AVG_DAILY_SALES[current_date.weekday()], 20)))
+        rows, quantities = simulate_day(store, type_codes, value_ids, ds, current_date, rng,
+                                        population.mix.price_limit)
+        sold = int(quantities.sum())
+        revenue = float((catalog.price[rows] * quantities).sum())
+        total_sold += sold
+        total_revenue += revenue
+        daily.append((sold, revenue))
+        current_date += timedelta(days=1)
+    return total_sold, total_revenue, daily
+
+
+def evaluate_policy(store, solver_type, current_date, demand_days=7, profile_mix=None):
+    """Restock a fork of store with one policy, then simulate demand_days on it."""
+    return _run_policy(store.fork(), solver_type, current_date, demand_days, profile_mix)
+
+
+def _run_policy(branch, solver_type, current_date, demand_days, profile_mix):
+    """evaluate_policy on an existing fork, which it modifies (and closes)."""
+    try:
+        decisions, metrics = branch.run_restock(solver_type, current_date)
+    finally:
+        branch.close()
+    population = CustomerPopulation(branch.inventory.catalog, profile_mix)
+    sold, revenue, daily = simulate_demand(branch, demand_days, current_date + timedelta(days=1), population)
+    return {
+        'solver_type': solver_type,
+        'decisions': [(book.row, quantity) for book, quantity in decisions],
+        'restock_metrics': metrics,
+        'units_sold': sold,
+        'revenue': revenue,
+        'daily': daily,
+        'final_metrics': branch.stock_metrics(current_date + timedelta(days=demand_days)),
+    }
+
+
+def _init_worker(branches):
+    # Runs in the worker; with the fork start method initargs are inherited, not pickled
+    global _branches
+    _branches = branches
+
+
+def _evaluate_forked(index, args):
+    return _run_policy(_branches[index], *args)
+
+
+def compare_policies(store, current_date, policies=("basic", "alternative"), demand_days=7,
+                     executor="thread", max_workers=None, profile_mix=None):
+    """
+    Evaluate restock policies side by side from the same store state.
+
+    Every policy runs on its own fork, so all of them see the same stock
+    and the same RNG state (common random numbers) and store is left
+    untouched. executor is "thread", "process" (fork start method only) or
+    None to run them one after another. Returns one result per policy,
+    best revenue first.
+
+    The forks are all made up front in the calling thread (forking touches
+    the source store), so workers only ever touch their own fork.
+    """
+    if executor not in (None, "thread", "process"):
+        raise ValueError(f"Unknown executor: {executor}")
+    catalog = store.inventory.catalog
+    # Build the catalog's lazy caches once, before threads or forks share them
+    for mode in (CUSTOMER_MODE, SOLVER_MODE, METRICS_MODE):
+        catalog.seasonal(mode)
+
+    work = [(solver_type, current_date, demand_days, profile_mix) for solver_type in policies]
+    branches = [store.fork() for _ in work]
+    if executor is None:
+        results = [_run_policy(branch, *args) for branch, args in zip(branches, work)]
+    elif executor == "thread":
+        with ThreadPoolExecutor(max_workers=max_workers or len(work)) as pool:
+            results = list(pool.map(lambda branch, args: _run_policy(branch, *args), branches, work))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers or len(work),
+                                 mp_context=multiprocessing.get_context("fork"),
+                                 initializer=_init_worker, initargs=(branches,)) as pool:
+            results = list(pool.map(_evaluate_forked, range(len(work)), work))
+
+    results.sort(key=lambda result: result['revenue'], reverse=True)
+    for result in results:
+        log.info(f"{result['solver_type']}: {result['units_sold']} books, £{result['revenue']:.2f} "
+                 f"over {demand_days} days")
+    return results
@@ -1,9 +1,17 @@
+import os
+
 import uvicorn
 
 from .rest_api import app
 
 
 def main():
+    # More than one worker needs JOB_STORE_PATH so every worker sees every job
+    workers = int(os.environ.get("WORKERS", 1))
+    if workers > 1:
+        uvicorn.run("bookstore_simulator:app", port=8080, workers=workers,
+                    log_config="logging.conf", use_colors=True)
+        return
     config = uvicorn.Config("bookstore_simulator:app",
                             port=8080,
                             log_config="logging.conf",
@@ -3,7 +3,6 @@ from timefold.solver.score import constraint_provider, ConstraintFactory, HardSo
 from timefold.solver.score import ConstraintCollectors
 from .domain import RestockingDecision, Book
 from datetime import datetime
-from .utils import get_seasonal_keywords
 
 log = logging.getLogger(__name__)
 
@@ -60,10 +59,7 @@ def prefer_seasonal_books(constraint_factory: ConstraintFactory):
             .join(Book,
                   Joiners.equal(lambda decision: decision.isbn,
                               lambda book: book.isbn))
-            .filter(lambda decision, book: 
-                    any(keyword.lower() in str(book.title).lower() or 
-                        keyword.lower() in str(book.author).lower()
-                        for keyword in get_seasonal_keywords(book.current_date.month)))
+            .filter(lambda decision, book: book.seasonal_match_count > 0)
             .reward(HardSoftScore.of(0, 50))  # Increased seasonal importance
             .as_constraint("Seasonal preference"))
 
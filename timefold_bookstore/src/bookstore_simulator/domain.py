@@ -18,6 +18,8 @@ class Book(JsonDomainBase):
     remaining_capacity: int = 0
     current_date: datetime 
     genre: str = "Unknown"
+    seasonal_match_count: int = 0  # Filled in by the service for current_date's month
+    restock_quantity: int = 0  # Quantity from an earlier plan, used as the starting value
 
 
 @planning_entity
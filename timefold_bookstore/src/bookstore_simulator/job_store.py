@@ -0,0 +1,368 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from enum import Enum
+from typing import Callable
+
+from pydantic import BaseModel
+
+from .domain import RestockingSolution
+
+log = logging.getLogger(__name__)
+
+# How often a wait re-reads a record that only the disk tier holds (seconds)
+DISK_POLL_SECONDS = 0.5
+# Shortest interval between disk writes of a solving job's new best solutions (seconds)
+DISK_WRITE_SECONDS = 1.0
+
+
+class SolutionStatus(str, Enum):
+    QUEUED = "QUEUED"
+    SOLVING = "SOLVING"
+    SOLVED = "SOLVED"
+    CANCELLED = "CANCELLED"
+    FAILED = "FAILED"  # the solve raised; the job keeps its last solution
+
+    @property
+    def finished(self) -> bool:
+        return self in (SolutionStatus.SOLVED, SolutionStatus.CANCELLED, SolutionStatus.FAILED)
+
+
+class SolutionState(BaseModel):
+    solution: RestockingSolution
+    status: SolutionStatus = SolutionStatus.SOLVING
+
+
+def job_summary(state: SolutionState) -> dict:
+    """A job's status and score: the part of job_record that changes while it solves."""
+    score = state.solution.score if state.solution else None
+    return {"status": state.status.value, "score": str(score) if score else None}
+
+
+def job_record(state: SolutionState) -> dict:
+    """What status and result lookups return for a job; plain JSON, so any worker can serve it."""
+    return {
+        **job_summary(state),
+        "decisions": [
+            {"isbn": d.isbn, "restockQuantity": d.restock_quantity}
+            for d in (state.solution.decisions if state.solution else [])
+        ],
+    }
+
+
+class MemoryJobStore:
+    """
+    In-process job states, bounded by count (LRU) and age (TTL).
+
+    Only finished jobs are evicted: a job that is queued or solving keeps
+    its entry (its solver thread updates it) even past max_jobs.
+    """
+
+    def __init__(self, max_jobs: int = 1000, ttl: float = 3600.0):
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self._states: OrderedDict[str, SolutionState] = OrderedDict()
+        self._finished_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> SolutionState | None:
+        with self._lock:
+            self._evict()
+            state = self._states.get(job_id)
+            if state is not None:
+                self._states.move_to_end(job_id)
+            return state
+
+    def put(self, job_id: str, state: SolutionState):
+        with self._lock:
+            self._states[job_id] = state
+            self._states.move_to_end(job_id)
+            if state.status.finished:
+                self._finished_at.setdefault(job_id, time.monotonic())
+            self._evict()
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._states.pop(job_id, None)
+            self._finished_at.pop(job_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+            self._finished_at.clear()
+
+    def __contains__(self, job_id: str) -> bool:
+        return self.get(job_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _evict(self):
+        now = time.monotonic()
+        for job_id, finished_at in list(self._finished_at.items()):
+            if now - finished_at >= self.ttl:
+                del self._states[job_id], self._finished_at[job_id]
+        excess = len(self._states) - self.max_jobs
+        if excess > 0:
+            # Least recently used first; unfinished jobs are skipped
+            for job_id in [job_id for job_id in self._states if job_id in self._finished_at][:excess]:
+                del self._states[job_id], self._finished_at[job_id]
+
+
+class SqliteJobStore:
+    """
+    Job records (see job_record) in a local SQLite file, shared by every
+    worker process on the box. Finished records older than ttl are pruned.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600.0):
+        self.path = path
+        self.ttl = ttl
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS jobs ("
+                       "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, record TEXT NOT NULL, updated REAL NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps this safe across threads;
+        # the inner with commits (or rolls back), it does not close
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def get(self, job_id: str) -> dict | None:
+        with self._connect() as db:
+            row = db.execute("SELECT record FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def summary(self, job_id: str) -> dict | None:
+        with self._connect() as db:
+            row = db.execute("SELECT status, json_extract(record, '$.score') FROM jobs WHERE job_id = ?",
+                             (job_id,)).fetchone()
+        return {"status": row[0], "score": row[1]} if row else None
+
+    def put(self, job_id: str, record: dict):
+        now = time.time()
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO jobs (job_id, status, record, updated) VALUES (?, ?, ?, ?)",
+                       (job_id, record["status"], json.dumps(record), now))
+            db.execute("DELETE FROM jobs WHERE status IN (?, ?, ?) AND updated < ?",
+                       (SolutionStatus.SOLVED.value, SolutionStatus.CANCELLED.value, SolutionStatus.FAILED.value,
+                        now - self.ttl))
+
+    def delete(self, job_id: str):
+        with self._connect() as db:
+            db.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def clear(self):
+        with self._connect() as db:
+            db.execute("DELETE FROM jobs")
+
+
+class _JobWait:
+    """
+    Readers waiting on one job; version is bumped by every change, so a
+    wait cannot miss one. Async readers register an asyncio.Event with
+    its loop instead, set from whichever thread made the change.
+    """
+
+    def __init__(self):
+        self.updated = threading.Condition()
+        self.version = 0
+        self.waiters = 0
+        self.events: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    def changed(self):
+        with self.updated:
+            self.version += 1
+            self.updated.notify_all()
+            events = list(self.events)
+        for loop, event in events:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # the loop has closed
+                pass
+
+
+class JobStore:
+    """
+    Solve jobs of the REST service.
+
+    The memory tier holds the live SolutionState of jobs solved by this
+    process. The optional disk tier (SQLite) gets each job's record
+    written through on every status change, and a solving job's new best
+    solutions at most every DISK_WRITE_SECONDS, so status and result
+    lookups work from any worker and finished results outlive the memory
+    tier.
+
+    wait() (and wait_async() on an event loop) lets readers block until a
+    job changes instead of polling.
+    """
+
+    def __init__(self, memory: MemoryJobStore | None = None, disk: SqliteJobStore | None = None):
+        self.memory = memory or MemoryJobStore()
+        self.disk = disk
+        self._waits: dict[str, _JobWait] = {}  # jobs someone is waiting on
+        self._waits_lock = threading.Lock()
+        self._disk_writes: dict[str, tuple[SolutionStatus, float]] = {}  # unfinished jobs: last write
+        self._disk_lock = threading.Lock()
+
+    def put(self, job_id: str, state: SolutionState):
+        self.memory.put(job_id, state)
+        if self.disk is not None and self._disk_due(job_id, state.status):
+            self.disk.put(job_id, job_record(state))
+        self._changed(job_id)
+
+    def _disk_due(self, job_id: str, status: SolutionStatus) -> bool:
+        """Whether a put goes to the disk tier; only same-status updates are throttled."""
+        now = time.monotonic()
+        with self._disk_lock:
+            last = self._disk_writes.get(job_id)
+            if last is not None and last[0] == status and now - last[1] < DISK_WRITE_SECONDS:
+                return False
+            if status.finished:
+                self._disk_writes.pop(job_id, None)
+            else:
+                self._disk_writes[job_id] = (status, now)
+            return True
+
+    def wait(self, job_id: str, timeout: float, ready: Callable[[dict], bool]) -> dict | None:
+        """
+        The job's record as soon as ready(summary) holds, or as it stands
+        after timeout seconds; None for an unknown job. ready sees the
+        job's status and score (see job_summary), so a wake does not build
+        the whole record. Updates this process makes to the job wake the
+        wait; a record only the disk tier holds (a job of another worker)
+        is re-read every DISK_POLL_SECONDS.
+        """
+        deadline = time.monotonic() + timeout
+        waiting = self._enter_wait(job_id)
+        try:
+            while True:
+                with waiting.updated:
+                    version = waiting.version
+                summary = self.summary(job_id)
+                remaining = deadline - time.monotonic()
+                if summary is None or remaining <= 0 or ready(summary):
+                    return self.record(job_id)
+                if self.memory.get(job_id) is None:
+                    remaining = min(remaining, DISK_POLL_SECONDS)
+                with waiting.updated:
+                    if waiting.version == version:
+                        waiting.updated.wait(remaining)
+        finally:
+            self._leave_wait(job_id, waiting)
+
+    async def wait_async(self, job_id: str, timeout: float, ready: Callable[[dict], bool]) -> dict | None:
+        """
+        wait() for the event loop: the wait holds no thread, so any number
+        of long-polls can be open at once. Only disk tier reads go to a
+        thread.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        event = asyncio.Event()
+        waiting = self._enter_wait(job_id)
+        with waiting.updated:
+            waiting.events.add((loop, event))
+        try:
+            while True:
+                event.clear()  # before reading, so a change made meanwhile still wakes us
+                held = self.memory.get(job_id) is not None
+                summary = self.summary(job_id) if held else await asyncio.to_thread(self.summary, job_id)
+                remaining = deadline - loop.time()
+                if summary is None or remaining <= 0 or ready(summary):
+                    return self.record(job_id) if held else await asyncio.to_thread(self.record, job_id)
+                if not held:
+                    remaining = min(remaining, DISK_POLL_SECONDS)
+                try:
+                    await asyncio.wait_for(event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with waiting.updated:
+                waiting.events.discard((loop, event))
+            self._leave_wait(job_id, waiting)
+
+    def _enter_wait(self, job_id: str) -> _JobWait:
+        with self._waits_lock:
+            waiting = self._waits.setdefault(job_id, _JobWait())
+            waiting.waiters += 1
+            return waiting
+
+    def _leave_wait(self, job_id: str, waiting: _JobWait):
+        with self._waits_lock:
+            waiting.waiters -= 1
+            if not waiting.waiters:
+                del self._waits[job_id]
+
+    def state(self, job_id: str) -> SolutionState | None:
+        """The live state of a job solved by this process, if still held."""
+        return self.memory.get(job_id)
+
+    def record(self, job_id: str) -> dict | None:
+        """The job's record from whichever tier has it, or None for an unknown job."""
+        state = self.memory.get(job_id)
+        if state is not None:
+            return job_record(state)
+        return self.disk.get(job_id) if self.disk is not None else None
+
+    def summary(self, job_id: str) -> dict | None:
+        """The job's status and score from whichever tier has it, or None for an unknown job."""
+        state = self.memory.get(job_id)
+        if state is not None:
+            return job_summary(state)
+        return self.disk.summary(job_id) if self.disk is not None else None
+
+    def delete(self, job_id: str):
+        self.memory.delete(job_id)
+        with self._disk_lock:
+            self._disk_writes.pop(job_id, None)
+        if self.disk is not None:
+            self.disk.delete(job_id)
+        self._changed(job_id)
+
+    def clear(self):
+        self.memory.clear()
+        with self._disk_lock:
+            self._disk_writes.clear()
+        if self.disk is not None:
+            self.disk.clear()
+        with self._waits_lock:
+            waits = list(self._waits.values())
+        for waiting in waits:
+            waiting.changed()
+
+    def _changed(self, job_id: str):
+        # Only readers of this job wake up
+        with self._waits_lock:
+            waiting = self._waits.get(job_id)
+        if waiting is not None:
+            waiting.changed()
+
+    def __contains__(self, job_id: str) -> bool:
+        return self.record(job_id) is not None
+
+
+def create_job_store() -> JobStore:
+    """
+    JobStore configured from the environment: JOB_STORE_MAX_JOBS and
+    JOB_STORE_TTL (seconds) bound the memory tier, and JOB_STORE_PATH
+    enables the SQLite tier (needed to run more than one worker).
+    """
+    memory = MemoryJobStore(max_jobs=int(os.environ.get("JOB_STORE_MAX_JOBS", 1000)),
+                            ttl=float(os.environ.get("JOB_STORE_TTL", 3600)))
+    path = os.environ.get("JOB_STORE_PATH")
+    if path:
+        log.info(f"Job records are shared through {path}")
+    return JobStore(memory, SqliteJobStore(path) if path else None)
@@ -1,76 +1,98 @@
+import asyncio
+import json
 import logging
 import threading
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.staticfiles import StaticFiles
 from uuid import uuid4
-from enum import Enum
-from pydantic import BaseModel, ValidationError
-from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from .domain import Book, RestockingDecision, RestockingSolution
-from .solver import solver_manager, custom_neighborhood_function
-from timefold.solver import SolverJob, SolverStatus
+from .job_store import SolutionState, SolutionStatus, create_job_store
+from .scheduler import QueueFull, create_scheduler
+from .solver import solver_manager, construct_initial_solution, termination_override
+from .utils import seasonal_match_count
+from timefold.solver.config import SolverConfigOverride
 
 logging.basicConfig(level=logging.DEBUG)
 log = logging.getLogger(__name__)
 
-class SolutionStatus(str, Enum):
-    SOLVING = "SOLVING"
-    SOLVED = "SOLVED"
+app = FastAPI(docs_url='/q/swagger-ui')
+# Bounded job store; set JOB_STORE_PATH to share it between worker processes
+solutions = create_job_store()
 
-class SolutionState(BaseModel):
-    solution: RestockingSolution
-    status: SolutionStatus = SolutionStatus.SOLVING
+def _fail_job(job_id: str, error: Exception):
+    """Finish a job whose solve raised, so its readers stop waiting."""
+    state = solutions.state(job_id)
+    if state is not None:
+        state.status = SolutionStatus.FAILED
+        solutions.put(job_id, state)
 
-app = FastAPI(docs_url='/q/swagger-ui')
-solutions: dict[str, SolutionState] = {}
+# Bounded concurrency and queueing for solves; cancellation stops a running solve early
+scheduler = create_scheduler(terminate=solver_manager.terminate_early, on_failure=_fail_job)
+# Longest a request may block on ?wait= (seconds)
+MAX_WAIT = 60.0
+# An event stream sends a comment this often while nothing changes (seconds)
+EVENT_KEEPALIVE = 15.0
+
+def _finished(record: dict) -> bool:
+    return SolutionStatus(record["status"]).finished
+
+def _progress(record: dict) -> tuple:
+    return record["status"], record["score"]
 
 def update_solution(problem_id: str, solution: RestockingSolution, is_final: bool = False):
     """Update solution and status when solver finishes or ends."""
-    global solutions
-    if problem_id in solutions:
-        log.info(f"Updating solution {problem_id} (final: {is_final})")
+    state = solutions.state(problem_id)
+    if state is not None:
+        log.debug(f"Updating solution {problem_id} (final: {is_final})")
         if solution is not None:
-            log.info(f"Solution score: {solution.score}")
-            solutions[problem_id].solution = solution
-            # If final or feasible, mark as SOLVED
-            if is_final or (solution.score and solution.score.hard_score >= 0):
-                solutions[problem_id].status = SolutionStatus.SOLVED
+            state.solution = solution
+            # Only the final solution completes the job; the solve keeps improving until then
+            if is_final:
+                state.status = SolutionStatus.SOLVED
                 log.info(f"Updated status to SOLVED for {problem_id} with score {solution.score}")
             else:
-                log.info(f"Intermediate solution: {solution.score}")
-
-def custom_solver_loop(job_id: str, initial_solution: RestockingSolution):
-    """Custom solver loop that applies the neighborhood function iteratively."""
-    log.info(f"Custom solver loop started for job {job_id}")
-    current_solution = initial_solution
-    best_solution = initial_solution
-    best_score = None
-
-    for iteration in range(10):  # Define a maximum number of iterations
-        custom_neighborhood_function(current_solution)
-        job = solver_manager.solve(job_id, current_solution)  # Returns a SolverJob
-        current_solution = job.get_final_best_solution()  # Fetch the current best solution
-
-        if best_score is None or current_solution.score > best_score:
-            best_solution = current_solution
-            best_score = current_solution.score
+                log.debug(f"Intermediate solution: {solution.score}")
+            solutions.put(problem_id, state)
 
-        if job.get_solver_status() == SolverStatus.NOT_SOLVING:
-            break
-
-    update_solution(job_id, best_solution, True)  # Pass is_final=True so status becomes SOLVED
-
-def background_solve(job_id: str, initial_solution: RestockingSolution):
-    """Runs the custom solver loop in a thread, returns the final solution, and updates status."""
+def background_solve(job_id: str, initial_solution: RestockingSolution, cancelled: threading.Event,
+                     config_override: SolverConfigOverride | None = None):
+    """
+    Solve a job once on a scheduler thread: the custom construction
+    heuristic seeds the solution, then a single Timefold solve (bounded by
+    its termination) improves it, streaming best solutions to the job store.
+    """
     log.info(f"Background solve started for job {job_id}")
-    custom_solver_loop(job_id, initial_solution)
+    state = solutions.state(job_id)
+    if state is not None:
+        state.status = SolutionStatus.SOLVING
+        solutions.put(job_id, state)
+
+    construct_initial_solution(initial_solution)
+    builder = (solver_manager.solve_builder()
+               .with_problem_id(job_id)
+               .with_problem(initial_solution)
+               .with_best_solution_consumer(lambda solution: update_solution(job_id, solution)))
+    if config_override is not None:
+        builder = builder.with_config_override(config_override)
+    job = builder.run()
+    if cancelled.is_set():  # cancelled before the solve was registered
+        solver_manager.terminate_early(job_id)
+    update_solution(job_id, job.get_final_best_solution(), True)  # Pass is_final=True so status becomes SOLVED
 
 @app.post("/optimize-restock")
-async def optimize_restock(inventory: list[dict]) -> str:
-    """Optimize restocking decisions"""
+async def optimize_restock(inventory: list[dict], priority: int = 0,
+                           spent_limit: float | None = None,
+                           unimproved_spent_limit: float | None = None) -> str:
+    """
+    Optimize restocking decisions; higher priority jobs leave the queue
+    first. spent_limit and unimproved_spent_limit (seconds) shorten the
+    solve's termination for this request.
+    """
     try:
         log.info(f"Starting optimization for {len(inventory)} items")
         current_inventory = []
@@ -84,20 +106,26 @@ async def optimize_restock(inventory: list[dict]) -> str:
             
         for item in inventory:
             try:
-                current_inventory.append(Book(**item))
+                book = Book(**item)
             except ValidationError as e:
                 return JSONResponse(
                     status_code=422,
                     content={"detail": e.errors()}
                 )
+            # Match seasonal keywords once per book instead of inside every constraint evaluation
+            book.seasonal_match_count = seasonal_match_count(book.title, book.author, book.current_date.month)
+            current_inventory.append(book)
         
+        # 0 leaves a book out, so every decision may skip its book
+        quantities = list(range(0, 3))
         decisions = [
             RestockingDecision(
                 isbn=book.isbn,
                 author=book.author, 
                 rating=book.rating,
                 current_date=current_date,  # Add current_date to each decision
-                restock_quantity=0,
+                # Warm start from the client's earlier plan, within the value range
+                restock_quantity=min(max(book.restock_quantity, min(quantities)), max(quantities)),
                 genre=book.genre
             ) 
             for book in current_inventory
@@ -105,61 +133,144 @@ async def optimize_restock(inventory: list[dict]) -> str:
         initial_solution = RestockingSolution(
             books=current_inventory,
             decisions=decisions,
-            quantities=list(range(1, 3)),
+            quantities=quantities,
             current_date=current_date  # Add current_date to solution
         )
         
         job_id = str(uuid4())
         log.info("Created job_id: %s", job_id)
         
-        solutions[job_id] = SolutionState(
+        solutions.put(job_id, SolutionState(
             solution=initial_solution,
-            status=SolutionStatus.SOLVING
-        )
-        
-        solving_thread = threading.Thread(target=background_solve, args=(job_id, initial_solution), daemon=True)
-        solving_thread.start()
+            status=SolutionStatus.QUEUED
+        ))
+        config_override = termination_override(spent_limit, unimproved_spent_limit)
+        try:
+            scheduler.submit(job_id,
+                             lambda cancelled: background_solve(job_id, initial_solution, cancelled,
+                                                                config_override),
+                             priority)
+        except QueueFull:
+            solutions.delete(job_id)
+            raise
         
-        log.info(f"Started solving job {job_id} in background thread")
+        log.info(f"Queued job {job_id} ({scheduler.running()} solving, {scheduler.queued()} waiting)")
         return job_id
         
+    except QueueFull as e:
+        log.warning(f"Rejected optimization: {e}")
+        return JSONResponse(
+            status_code=429,
+            content={"detail": str(e)},
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         log.error(f"Optimization failed", exc_info=e)
         raise HTTPException(status_code=503, detail=str(e))
 
 @app.get("/solutions/{job_id}")
-async def get_solution(job_id: str):
-    if job_id not in solutions:
+async def get_solution(job_id: str, wait: float = 0):
+    """
+    Decisions of the job's best solution. With wait (seconds, up to
+    MAX_WAIT) the request first blocks until the job is finished; status
+    tells whether it was.
+    """
+    record = await solutions.wait_async(job_id, min(max(wait, 0), MAX_WAIT), _finished)
+    if record is None:
         raise HTTPException(status_code=404, detail="Solution not found")
     
-    state = solutions[job_id]
     return {
-        "decisions": [
-            {
-                "isbn": d.isbn,
-                "restockQuantity": d.restock_quantity  # Changed from quantity to restockQuantity
-            } for d in state.solution.decisions
-        ]
+        "status": record["status"],
+        "decisions": record["decisions"]
     }
 
 @app.get("/solutions/{job_id}/status")
-async def get_solution_status(job_id: str):
-    """Get current solution status"""
-    if job_id not in solutions:
+async def get_solution_status(job_id: str, wait: float = 0):
+    """
+    Get current solution status. With wait (seconds, up to MAX_WAIT) the
+    request blocks until the status or score changes, or the job is finished.
+    """
+    seen = await asyncio.to_thread(solutions.summary, job_id)
+    if seen is None:
+        raise HTTPException(status_code=404, detail="Solution not found")
+    record = await solutions.wait_async(job_id, min(max(wait, 0), MAX_WAIT),
+                                        lambda record: _finished(record) or _progress(record) != _progress(seen))
+    if record is None:
         raise HTTPException(status_code=404, detail="Solution not found")
-    
-    state = solutions[job_id]
-    score = state.solution.score if state.solution else None
     
     response = {
-        "status": state.status,
-        "score": str(score) if score else None,
-        "isSolving": state.status == SolutionStatus.SOLVING
+        "status": record["status"],
+        "score": record["score"],
+        "isSolving": record["status"] in (SolutionStatus.QUEUED, SolutionStatus.SOLVING)
     }
     
-    log.info(f"Status request for {job_id}: {response}")
+    log.debug(f"Status request for {job_id}: {response}")
     return response
 
+async def solution_events(job_id: str):
+    """
+    Server-sent events for a job: "best_solution" (status and score) each
+    time the best solution changes, then one "solved", "cancelled" or "failed" event
+    with the full record. A job that disappears ends the stream with "gone".
+    """
+    seen = None
+    while True:
+        record = await solutions.wait_async(job_id, EVENT_KEEPALIVE,
+                                            lambda record: _finished(record) or _progress(record) != seen)
+        if record is None:
+            yield "event: gone\ndata: {}\n\n"
+            return
+        if _finished(record):
+            yield f"event: {record['status'].lower()}\ndata: {json.dumps(record)}\n\n"
+            return
+        if _progress(record) == seen:
+            yield ": keepalive\n\n"
+            continue
+        seen = _progress(record)
+        yield f"event: best_solution\ndata: {json.dumps({'status': record['status'], 'score': record['score']})}\n\n"
+
+@app.get("/solutions/{job_id}/events")
+async def stream_solution_events(job_id: str):
+    """Push best-solution and solved events for a job (text/event-stream)."""
+    if job_id not in solutions:
+        raise HTTPException(status_code=404, detail="Solution not found")
+    return StreamingResponse(solution_events(job_id), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.delete("/solutions/{job_id}")
+async def cancel_solution(job_id: str):
+    """
+    Stop a job: a queued job is dropped (CANCELLED), a running one is
+    terminated early and keeps its best solution so far (SOLVED). A
+    finished job is removed.
+
+    Only the worker that holds a job can stop it: with several workers, a
+    DELETE that lands on another one finds the job in the shared store but
+    not in its scheduler, and gets 409 Conflict; the job keeps running.
+    """
+    record = solutions.record(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Solution not found")
+
+    cancelled = scheduler.cancel(job_id)
+    if cancelled == "queued":
+        state = solutions.state(job_id)
+        state.status = SolutionStatus.CANCELLED
+        solutions.put(job_id, state)
+    elif cancelled is None:
+        # Re-read: the job may have finished since the first read
+        record = solutions.record(job_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Solution not found")
+        if not SolutionStatus(record["status"]).finished:
+            log.info(f"Job {job_id} is not held by this worker; not cancelled")
+            raise HTTPException(status_code=409,
+                                detail="Job is solving on another worker; it was not cancelled")
+        solutions.delete(job_id)
+        return Response(status_code=204)
+    log.info(f"Cancelled job {job_id} ({cancelled})")
+    return {"status": solutions.record(job_id)["status"]}
+
 @app.get("/hello-world")
 async def hello_world() -> str:
     return "hello-world"
@@ -0,0 +1,135 @@
+import heapq
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+# Assumed solve duration (seconds) for Retry-After until solves have been timed
+DEFAULT_SOLVE_SECONDS = 60.0
+
+
+class QueueFull(Exception):
+    """The solve queue is at capacity; retry_after is a wait estimate in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Solve queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class SolveJob:
+    def __init__(self, job_id: str, run: Callable[[threading.Event], None], priority: int):
+        self.job_id = job_id
+        self.run = run
+        self.priority = priority
+        self.cancelled = threading.Event()
+
+
+class SolveScheduler:
+    """
+    Runs solve jobs on a fixed number of worker threads.
+
+    At most max_concurrent solves run at once; up to max_queued more wait,
+    highest priority first (FIFO within a priority), and submit raises
+    QueueFull beyond that. A job's run callable receives its cancellation
+    event. cancel() drops a queued job, or sets the event of a running one
+    and calls terminate(job_id) so the solver stops early. A run that
+    raises is logged and reported to on_failure(job_id, error).
+    """
+
+    def __init__(self, max_concurrent: int = 2, max_queued: int = 16,
+                 terminate: Callable[[str], None] | None = None,
+                 on_failure: Callable[[str, Exception], None] | None = None):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.terminate = terminate
+        self.on_failure = on_failure
+        self._lock = threading.Condition()
+        self._queue = []  # (-priority, sequence, job)
+        self._sequence = itertools.count()
+        self._queued: dict[str, SolveJob] = {}
+        self._running: dict[str, SolveJob] = {}
+        self._durations = deque(maxlen=20)
+        self._workers = [threading.Thread(target=self._work, name=f"solver-{i}", daemon=True)
+                         for i in range(max_concurrent)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, job_id: str, run: Callable[[threading.Event], None], priority: int = 0):
+        with self._lock:
+            if len(self._queue) >= self.max_queued:
+                raise QueueFull(self._retry_after())
+            job = SolveJob(job_id, run, priority)
+            heapq.heappush(self._queue, (-priority, next(self._sequence), job))
+            self._queued[job_id] = job
+            self._lock.notify()
+            log.debug(f"Queued job {job_id} (priority {priority}, {len(self._queue)} waiting)")
+
+    def cancel(self, job_id: str) -> str | None:
+        """Cancel a job; returns "queued" or "running" for what it was, None if unknown."""
+        with self._lock:
+            job = self._queued.pop(job_id, None)
+            if job is not None:
+                job.cancelled.set()
+                self._queue = [entry for entry in self._queue if entry[2] is not job]
+                heapq.heapify(self._queue)
+                return "queued"
+            job = self._running.get(job_id)
+            if job is None:
+                return None
+            job.cancelled.set()
+        if self.terminate is not None:
+            self.terminate(job_id)
+        return "running"
+
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def running(self) -> int:
+        return len(self._running)
+
+    def _retry_after(self) -> int:
+        average = sum(self._durations) / len(self._durations) if self._durations else DEFAULT_SOLVE_SECONDS
+        # Queued jobs ahead drain max_concurrent at a time
+        waves = (len(self._queue) + 1) / self.max_concurrent
+        return max(1, math.ceil(average * waves))
+
+    def _work(self):
+        while True:
+            with self._lock:
+                while not self._queue:
+                    self._lock.wait()
+                _, _, job = heapq.heappop(self._queue)
+                del self._queued[job.job_id]
+                self._running[job.job_id] = job
+            started = time.monotonic()
+            try:
+                job.run(job.cancelled)
+            except Exception as e:
+                log.exception(f"Solve job {job.job_id} failed")
+                if self.on_failure is not None:
+                    try:
+                        self.on_failure(job.job_id, e)
+                    except Exception:
+                        log.exception(f"Could not record the failure of job {job.job_id}")
+            finally:
+                with self._lock:
+                    del self._running[job.job_id]
+                    self._durations.append(time.monotonic() - started)
+
+
+def create_scheduler(terminate: Callable[[str], None] | None = None,
+                     on_failure: Callable[[str, Exception], None] | None = None) -> SolveScheduler:
+    """
+    SolveScheduler sized by SOLVER_MAX_CONCURRENT (default 2) and
+    SOLVER_MAX_QUEUED (default 16). Each worker process has its own
+    scheduler, so the limits are per worker, not for the whole server.
+    """
+    return SolveScheduler(max_concurrent=int(os.environ.get("SOLVER_MAX_CONCURRENT", 2)),
+                          max_queued=int(os.environ.get("SOLVER_MAX_QUEUED", 16)),
+                          terminate=terminate, on_failure=on_failure)
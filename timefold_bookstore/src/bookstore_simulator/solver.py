@@ -1,10 +1,13 @@
 from timefold.solver import SolverManager, SolverFactory, SolutionManager
 from timefold.solver.config import (SolverConfig, ScoreDirectorFactoryConfig,
-                                   TerminationConfig, Duration)
+                                   TerminationConfig, Duration, SolverConfigOverride)
 
 from .domain import RestockingSolution, RestockingDecision
 from .constraints import define_constraints
-from .utils import get_seasonal_keywords  # Add this import
+
+# Termination limits in seconds; a request may ask for less, never more
+SPENT_LIMIT = 60
+UNIMPROVED_SPENT_LIMIT = 20
 
 solver_config = SolverConfig(
     solution_class=RestockingSolution,
@@ -13,40 +16,57 @@ solver_config = SolverConfig(
         constraint_provider_function=define_constraints
     ),
     termination_config=TerminationConfig(
-        spent_limit=Duration(seconds=60),  # Give it more time
-        unimproved_spent_limit=Duration(seconds=20)  # Stop if no improvement for 20 seconds
+        spent_limit=Duration(seconds=SPENT_LIMIT),  # Give it more time
+        unimproved_spent_limit=Duration(seconds=UNIMPROVED_SPENT_LIMIT)  # Stop if no improvement for 20 seconds
     )
 )
 
 solver_manager = SolverManager.create(SolverFactory.create(solver_config))
 solution_manager = SolutionManager.create(solver_manager)
 
-def custom_neighborhood_function(solution: RestockingSolution):
-    """Apply custom neighborhood changes to the solution"""
+def termination_override(spent_limit: float | None = None,
+                         unimproved_spent_limit: float | None = None) -> SolverConfigOverride | None:
+    """Per-request termination (seconds), clamped to the configured limits; None keeps the defaults."""
+    if spent_limit is None and unimproved_spent_limit is None:
+        return None
+    spent = min(spent_limit if spent_limit is not None else SPENT_LIMIT, SPENT_LIMIT)
+    unimproved = min(unimproved_spent_limit if unimproved_spent_limit is not None else UNIMPROVED_SPENT_LIMIT,
+                     UNIMPROVED_SPENT_LIMIT, spent)
+    return SolverConfigOverride(
+        termination_config=TerminationConfig(
+            spent_limit=Duration(milliseconds=int(max(spent, 0) * 1000)),
+            unimproved_spent_limit=Duration(milliseconds=int(max(unimproved, 0) * 1000))
+        )
+    )
+
+def construct_initial_solution(solution: RestockingSolution):
+    """
+    Custom construction heuristic, applied to the problem before the solve.
+
+    Starts high-rated, affordable, seasonal books at the top of the value
+    range and books with none of those traits at its bottom; the rest keep
+    their (warm start) quantity. Every quantity is clamped to
+    [min(quantities), max(quantities)], so the local search starts from a
+    valid, initialized solution.
+    """
     decisions = solution.decisions
-    if not decisions:
+    if not decisions or not solution.quantities:
         return
+    min_quantity = min(solution.quantities)
+    max_quantity = max(solution.quantities)
     
-    # Try to improve the solution by adjusting quantities for high-rated, affordable, seasonal books
-    current_date = solution.books[0].current_date if solution.books else None
-    if current_date:
-        month = current_date.month
-        seasonal_keywords = get_seasonal_keywords(month)  # Use utility function
-        
-        for decision in decisions:
-            book = next((b for b in solution.books if b.isbn == decision.isbn), None)
-            if book:
-                is_seasonal = any(keyword.lower() in f"{book.title} {book.author}".lower() 
-                                for keyword in seasonal_keywords)
-                is_affordable = book.price <= 8.0
-                is_highly_rated = book.rating >= 4.5
-                
-                if is_seasonal and is_affordable and is_highly_rated:
-                    # Increase quantity for good candidates
-                    decision.restock_quantity = min(30, decision.restock_quantity + 5)
-                elif not (is_seasonal or is_affordable or is_highly_rated):
-                    # Decrease quantity for less desirable books
-                    decision.restock_quantity = max(0, decision.restock_quantity - 5)
-    
-    # Remove decisions with zero quantity
-    solution.decisions = [d for d in decisions if d.restock_quantity > 0]
\ No newline at end of file
+    books_by_isbn = {b.isbn: b for b in solution.books}
+    for decision in decisions:
+        book = books_by_isbn.get(decision.isbn)
+        if book:
+            is_seasonal = book.seasonal_match_count > 0
+            is_affordable = book.price <= 8.0
+            is_highly_rated = book.rating >= 4.5
+
+            if is_seasonal and is_affordable and is_highly_rated:
+                # Start good candidates at the largest quantity
+                decision.restock_quantity = max_quantity
+            elif not (is_seasonal or is_affordable or is_highly_rated):
+                # Leave out less desirable books (as far as the value range allows)
+                decision.restock_quantity = min_quantity
+        decision.restock_quantity = min(max(decision.restock_quantity, min_quantity), max_quantity)
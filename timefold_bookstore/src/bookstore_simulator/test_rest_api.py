@@ -1,9 +1,15 @@
+import asyncio
 from fastapi.testclient import TestClient
 from unittest import mock
+import threading
 import time
 import requests
 from .rest_api import app, solutions  # Add solutions import
 from .domain import Book, RestockingDecision, RestockingSolution
+from .job_store import DISK_WRITE_SECONDS, JobStore, MemoryJobStore, SolutionState, SolutionStatus, SqliteJobStore
+from .scheduler import QueueFull, SolveScheduler
+from .solver import UNIMPROVED_SPENT_LIMIT, construct_initial_solution, termination_override
+from .utils import SEASONAL_KEYWORDS, seasonal_match_count
 import logging
 from unittest.mock import patch, Mock
 import pytest
@@ -204,8 +210,9 @@ def test_solution_timeout():
         "rating": 4.5  # Add required field
     }
     
-    # Start optimization
-    response = client.post("/optimize-restock", json=[mock_book])
+    # Start optimization, asking for a solve that ends within the polling window
+    response = client.post("/optimize-restock", json=[mock_book],
+                           params={"spent_limit": 10, "unimproved_spent_limit": 2})
     assert response.status_code == 200
     job_id = response.json()
     
@@ -226,5 +233,251 @@ def test_solution_timeout():
         
     pytest.fail("Solution timed out")  # Better than assert False
 
+def _state(status=SolutionStatus.SOLVED):
+    return SolutionState(solution=RestockingSolution(books=[], decisions=[]), status=status)
+
+def test_memory_job_store_evicts_finished_jobs_only():
+    """LRU and TTL eviction never drop a job that is still solving"""
+    store = MemoryJobStore(max_jobs=2, ttl=0.2)
+    store.put("solving", _state(SolutionStatus.SOLVING))
+    store.put("old", _state())
+    store.put("new", _state())
+    assert "solving" in store and "new" in store
+    assert "old" not in store
+
+    time.sleep(0.25)
+    assert "new" not in store
+    assert "solving" in store
+
+def test_job_records_are_shared_through_sqlite(tmp_path):
+    """A second worker's store sees the records the first one writes"""
+    path = str(tmp_path / "jobs.db")
+    first = JobStore(MemoryJobStore(), SqliteJobStore(path))
+    second = JobStore(MemoryJobStore(), SqliteJobStore(path))
+
+    first.put("job", _state(SolutionStatus.SOLVING))
+    assert second.record("job")["status"] == "SOLVING"
+    state = first.state("job")
+    state.status = SolutionStatus.SOLVED
+    first.put("job", state)
+    assert second.record("job") == {"status": "SOLVED", "score": None, "decisions": []}
+    assert "missing" not in second
+
+def test_job_store_throttles_disk_writes_of_new_best_solutions(tmp_path):
+    """Status changes always reach the disk tier; repeated updates of a solving job only every DISK_WRITE_SECONDS"""
+    store = JobStore(MemoryJobStore(), SqliteJobStore(str(tmp_path / "jobs.db")))
+    with mock.patch.object(store.disk, "put", wraps=store.disk.put) as disk_put:
+        store.put("job", _state(SolutionStatus.QUEUED))
+        state = _state(SolutionStatus.SOLVING)
+        for _ in range(50):
+            store.put("job", state)
+        assert disk_put.call_count == 2
+        assert store.record("job")["status"] == "SOLVING"
+        time.sleep(DISK_WRITE_SECONDS)
+        store.put("job", state)
+        assert disk_put.call_count == 3
+
+        state.status = SolutionStatus.SOLVED
+        store.put("job", state)
+        assert disk_put.call_count == 4
+        assert store.disk.get("job")["status"] == "SOLVED"
+
+def test_job_store_wait_wakes_on_update():
+    """A waiting reader returns once the job finishes, not after its timeout"""
+    store = JobStore()
+    store.put("job", _state(SolutionStatus.SOLVING))
+    finished = lambda record: SolutionStatus(record["status"]).finished
+    assert store.wait("job", 0.05, finished)["status"] == "SOLVING"
+
+    threading.Timer(0.1, lambda: store.put("job", _state(SolutionStatus.SOLVED))).start()
+    started = time.monotonic()
+    assert store.wait("job", 10, finished)["status"] == "SOLVED"
+    assert time.monotonic() - started < 5
+    assert store.wait("missing", 10, finished) is None
+
+def test_job_store_wait_only_wakes_for_its_job():
+    """Updates to other jobs do not wake a waiting reader, and ready only sees status and score"""
+    store = JobStore()
+    store.put("job", _state(SolutionStatus.SOLVING))
+    store.put("other", _state(SolutionStatus.SOLVING))
+    seen = []
+    def finished(summary):
+        seen.append(summary)
+        return SolutionStatus(summary["status"]).finished
+
+    def updates():
+        for _ in range(20):
+            store.put("other", _state(SolutionStatus.SOLVING))
+        store.put("job", _state(SolutionStatus.SOLVED))
+    threading.Timer(0.1, updates).start()
+    record = store.wait("job", 10, finished)
+    assert record == {"status": "SOLVED", "score": None, "decisions": []}
+    assert seen == [{"status": "SOLVING", "score": None}, {"status": "SOLVED", "score": None}]
+    assert not store._waits
+
+def test_job_store_async_waits_hold_no_threads(tmp_path):
+    """Hundreds of async waits are woken by a put from another thread without a thread each"""
+    store = JobStore()
+    store.put("job", _state(SolutionStatus.SOLVING))
+    finished = lambda summary: SolutionStatus(summary["status"]).finished
+
+    async def many_waits():
+        waits = [asyncio.ensure_future(store.wait_async("job", 10, finished)) for _ in range(200)]
+        await asyncio.sleep(0.1)
+        threads = threading.active_count()
+        threading.Timer(0.05, lambda: store.put("job", _state(SolutionStatus.SOLVED))).start()
+        return threads, await asyncio.gather(*waits)
+
+    before = threading.active_count()
+    started = time.monotonic()
+    threads, records = asyncio.run(many_waits())
+    assert threads <= before + 1
+    assert time.monotonic() - started < 5
+    assert all(record["status"] == "SOLVED" for record in records)
+    assert not store._waits
+    assert asyncio.run(store.wait_async("missing", 10, finished)) is None
+
+    # A job of another worker is re-read from the disk tier
+    path = str(tmp_path / "jobs.db")
+    owner, reader = JobStore(disk=SqliteJobStore(path)), JobStore(disk=SqliteJobStore(path))
+    owner.put("job", _state(SolutionStatus.SOLVING))
+    threading.Timer(0.1, lambda: owner.put("job", _state(SolutionStatus.SOLVED))).start()
+    assert asyncio.run(reader.wait_async("job", 10, finished))["status"] == "SOLVED"
+
+def test_solution_long_poll():
+    """GET /solutions/{job_id}?wait= answers once the solve is done"""
+    book = {
+        "title": "Test Book",
+        "isbn": "123-456-789",
+        "price": 5.99,
+        "current_stock": 1,
+        "author": "Test Author",
+        "rating": 4.5
+    }
+    response = client.post("/optimize-restock", json=[book],
+                           params={"spent_limit": 5, "unimproved_spent_limit": 1})
+    assert response.status_code == 200
+    job_id = response.json()
+
+    solution = client.get(f"/solutions/{job_id}", params={"wait": 30}).json()
+    assert solution["status"] == "SOLVED"
+    assert len(solution["decisions"]) == 1
+
+def test_scheduler_orders_by_priority_and_applies_backpressure():
+    """One solve at a time, highest priority next, a full queue is refused and cancel terminates"""
+    order, terminated = [], []
+    release = threading.Event()
+    scheduler = SolveScheduler(max_concurrent=1, max_queued=3, terminate=terminated.append)
+
+    def job(name):
+        def run(cancelled):
+            if name == "blocking":
+                while not (cancelled.is_set() or release.is_set()):
+                    time.sleep(0.01)
+            order.append(name)
+        return run
+
+    scheduler.submit("blocking", job("blocking"))
+    time.sleep(0.05)
+    scheduler.submit("low", job("low"), priority=0)
+    scheduler.submit("high", job("high"), priority=5)
+    scheduler.submit("dropped", job("dropped"), priority=1)
+    with pytest.raises(QueueFull) as full:
+        scheduler.submit("rejected", job("rejected"))
+    assert full.value.retry_after >= 1
+
+    assert scheduler.cancel("dropped") == "queued"
+    assert scheduler.cancel("blocking") == "running"
+    assert scheduler.cancel("unknown") is None
+    assert terminated == ["blocking"]
+    time.sleep(0.2)
+    assert order == ["blocking", "high", "low"]
+
+def test_scheduler_reports_failed_jobs():
+    """A run that raises is reported to on_failure and frees its slot"""
+    failed, done = [], threading.Event()
+    scheduler = SolveScheduler(max_concurrent=1, on_failure=lambda job_id, e: failed.append((job_id, str(e))))
+
+    def broken(cancelled):
+        raise ValueError("no solution")
+    scheduler.submit("broken", broken)
+    scheduler.submit("next", lambda cancelled: done.set())
+    assert done.wait(5)
+    assert failed == [("broken", "no solution")]
+    assert scheduler.running() == 0
+
+def test_failed_solve_finishes_the_job():
+    """A solve that raises ends as FAILED instead of staying SOLVING"""
+    book = {"title": "Test Book", "isbn": "123-456-789", "price": 5.99, "current_stock": 1,
+            "author": "Test Author", "rating": 4.5}
+    with patch("bookstore_simulator.rest_api.construct_initial_solution", side_effect=RuntimeError("broken")):
+        response = client.post("/optimize-restock", json=[book])
+        assert response.status_code == 200
+        job_id = response.json()
+        solution = client.get(f"/solutions/{job_id}", params={"wait": 10}).json()
+    assert solution["status"] == "FAILED"
+    assert client.get(f"/solutions/{job_id}/status").json()["isSolving"] is False
+
+def test_cancel_unknown_solution():
+    """Cancelling a job that does not exist is a 404"""
+    response = client.delete("/solutions/does-not-exist")
+    assert response.status_code == 404
+
+def test_cancel_job_held_by_another_worker():
+    """A DELETE for an unfinished job this worker's scheduler does not hold is a 409, not a silent no-op"""
+    solutions.put("remote", _state(SolutionStatus.SOLVING))
+    response = client.delete("/solutions/remote")
+    assert response.status_code == 409
+    assert solutions.record("remote")["status"] == "SOLVING"
+
+    solutions.put("remote", _state(SolutionStatus.SOLVED))
+    assert client.delete("/solutions/remote").status_code == 204
+    assert "remote" not in solutions
+
+def test_construction_heuristic_and_termination_override():
+    """The construction heuristic keeps quantities in the value range; overrides never exceed the limits"""
+    good = Book(title="Winter Tales", isbn="1", price=5.0, current_stock=1, author="A", rating=4.8,
+                current_date="2024-12-01T00:00:00", seasonal_match_count=1)
+    poor = Book(title="Ledger", isbn="2", price=30.0, current_stock=1, author="B", rating=3.0,
+                current_date="2024-12-01T00:00:00")
+    solution = RestockingSolution(
+        books=[good, poor],
+        decisions=[RestockingDecision(isbn=book.isbn, author=book.author, rating=book.rating,
+                                      current_date=book.current_date, genre=book.genre,
+                                      restock_quantity=1) for book in (good, poor)],
+        quantities=[0, 1, 2])
+    construct_initial_solution(solution)
+    assert [d.restock_quantity for d in solution.decisions] == [2, 0]
+
+    # Without 0 in the value range, nothing may leave it
+    for decision in solution.decisions:
+        decision.restock_quantity = 7
+    solution.quantities = [1, 2]
+    construct_initial_solution(solution)
+    assert [d.restock_quantity for d in solution.decisions] == [2, 1]
+
+    assert termination_override() is None
+    override = termination_override(spent_limit=5, unimproved_spent_limit=600)
+    assert override.termination_config.unimproved_spent_limit.milliseconds == 5000
+    override = termination_override(unimproved_spent_limit=600)
+    assert override.termination_config.unimproved_spent_limit.milliseconds == UNIMPROVED_SPENT_LIMIT * 1000
+
+def test_seasonal_match_count_matches_keyword_scan():
+    """The trie matcher counts the same keywords as scanning each month's list"""
+    import random
+    rng = random.Random(3)
+    keywords = [k for words in SEASONAL_KEYWORDS.values() for k in words]
+    fragments = keywords + ["the", "of", "a", "Blo", "ssom", "Middle", "-", "Earth", "ë", " ", ""]
+    texts = [("", ""), ("Blossoming Blossoms", "Som"), ("middle-earth", "BRONTË"), ("Heatwave", "Sunset")]
+    for _ in range(500):
+        title = rng.choice([" ", ""]).join(rng.choice(fragments) for _ in range(rng.randint(1, 5)))
+        texts.append((rng.choice([title, title.upper(), title.lower()]), rng.choice(fragments)))
+
+    for title, author in texts:
+        for month, words in SEASONAL_KEYWORDS.items():
+            expected = sum(1 for keyword in words
+                           if keyword.lower() in title.lower() or keyword.lower() in author.lower())
+            assert seasonal_match_count(title, author, month) == expected, (title, author, month)
+
 # Run with:
 # pytest -vv --log-cli-level=DEBUG src/bookstore_simulator/test_rest_api.py::test_network_failures
\ No newline at end of file
@@ -1,3 +1,6 @@
+import re
+from functools import lru_cache
+
 SEASONAL_KEYWORDS = {
             1: [
             "Habits", "Motivation", "Resolutions", "Change", "Clear", "Sincero", "Kiyosaki",
@@ -106,3 +109,70 @@ SEASONAL_KEYWORDS = {
 def get_seasonal_keywords(month: int) -> list[str]:
     """Get seasonal keywords for given month"""
     return SEASONAL_KEYWORDS.get(month, [])
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern substring matcher: all patterns compiled into one
+    trie-shaped regex, tried at every text position (longest match per
+    position, then expanded to the patterns that are prefixes of it).
+
+    The simulator's seasonal.KeywordMatcher is the same matcher; the service
+    is installed on its own and cannot import it, so it keeps this copy.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = sorted(set(patterns))
+        self.ids = {pattern: i for i, pattern in enumerate(self.patterns)}
+        self._regex = re.compile(f"(?=({_trie_regex(self.patterns)}))") if self.patterns else None
+
+    def match_ids(self, text: str) -> set[int]:
+        found = set()
+        if self._regex is None:
+            return found
+        for longest in self._regex.findall(text):
+            found.update(self.ids[longest[:end]] for end in range(1, len(longest) + 1)
+                         if longest[:end] in self.ids)
+        return found
+
+
+def _trie_regex(patterns) -> str:
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node):
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return render(trie)
+
+
+# Case-insensitive matcher over every month's keywords, plus how many times
+# each keyword is listed per month
+_MATCHER = KeywordMatcher(k.lower() for words in SEASONAL_KEYWORDS.values() for k in words)
+_MONTHS_BY_PATTERN = [[0] * 12 for _ in _MATCHER.patterns]
+for _month, _words in SEASONAL_KEYWORDS.items():
+    for _keyword in _words:
+        _MONTHS_BY_PATTERN[_MATCHER.ids[_keyword.lower()]][_month - 1] += 1
+
+
+@lru_cache(maxsize=65536)
+def seasonal_match_counts(title: str, author: str) -> tuple[int, ...]:
+    """Per-month count of seasonal keywords found in title/author (case-insensitive)."""
+    counts = [0] * 12
+    for pattern_id in _MATCHER.match_ids(f"{title} {author}".lower()):
+        for month, n in enumerate(_MONTHS_BY_PATTERN[pattern_id]):
+            counts[month] += n
+    return tuple(counts)
+
+
+def seasonal_match_count(title: str, author: str, month: int) -> int:
+    """Number of the month's seasonal keywords found in title/author."""
+    return seasonal_match_counts(str(title), str(author))[month - 1]